@@ -18,10 +18,15 @@ import pickle
 import json
 import os
 import traceback
+import hashlib
+import hmac
+import contextvars
+from contextlib import contextmanager
+from dataclasses import dataclass
 import pytz
 
 # Flask imports
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, g
 from flask_cors import CORS
 import markdown
 
@@ -41,10 +46,29 @@ from services.conversation import (
     FuzzyEntityExtractor,  # Fuzzy matching para typos
     FuzzyDocumentComparator  # Fuzzy similarity
 )
+from services.title_index import TitleIndex
+from services.tfidf_engine import SparseTopKScorer
+from services.tfidf_index import TfidfIndex
+from services.segments import SegmentSet
+from services.dense_index import DenseVectorIndex
+from services.hybrid import HybridQuery, HybridRetriever, validate_weights
+from services.bm25 import BM25FIndex, tokenize
+from services.result_cache import ResultCache
+from services.document_store import DocumentStore
+from services.index_registry import ArtifactMismatchError, IndexGeneration, IndexRegistry
+from services.facets import FacetIndex, normalize_filters
+from services.date_index import YearIndex, extract_year_range, parse_year_range, years_in_text
+from services.spelling import SpellingIndex
+from services.autocomplete import PrefixIndex
+from services.analyzer import EXPANSION_TERMS, analyze_query, expand_terms, normalize_text
+from services.positional_index import PositionalIndex, extract_proximity
+from services.pagination import CursorError, RankedList, decode_cursor, ranking_key
+from services.suggestion_features import STOPWORDS, TitleFeatures
+from services.reranker import FieldTerms, Reranker, load_weights
+from services.field_index import DEFAULT_FIELD_WEIGHTS, FieldIndex, normalize_field_weights
 
 # Machine Learning
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
 
 # ============================================================================
 # CONFIGURACIÓN INICIAL
@@ -67,8 +91,6 @@ if GEMINI_API_KEY:
         GENAI_AVAILABLE = False
         print("⚠️ No se pudo inicializar Gemini. Continuando sin GENAI.")
 
-embeddings_ready = False
-
 # Initialize services and event bus (DIP + Observer)
 factory = ServiceFactory(genai, GENAI_AVAILABLE)
 event_bus = EventBus()
@@ -97,133 +119,472 @@ document_comparator = DocumentComparator()    # Strategy: Comparación de docume
 # ============================================================================
 # ============================================================================
 
+CORPUS_FILE = 'corpus.bin'
+
 def load_documents():
-    """Carga los documentos desde clean_with_metadata.json"""
+    """Abre corpus.bin con mmap; si no existe (o es más antiguo que el JSON), carga clean_with_metadata.json"""
+    try:
+        if os.path.exists(CORPUS_FILE) and (
+            not os.path.exists('clean_with_metadata.json')
+            or os.path.getmtime(CORPUS_FILE) >= os.path.getmtime('clean_with_metadata.json')
+        ):
+            docs = DocumentStore.open(CORPUS_FILE)
+            print(f"✅ Documentos cargados: {len(docs)} (mmap de {CORPUS_FILE})")
+            return docs
+    except Exception as e:
+        print(f"⚠️ No se pudo abrir {CORPUS_FILE} ({e}); usando JSON")
+    
     try:
-        with open('clean_with_metadata.json', 'r', encoding='utf-8', errors="ignore") as f:
-            docs = json.load(f)
-        print(f"✅ Documentos cargados: {len(docs)}")
+        docs = DocumentStore.from_json('clean_with_metadata.json')
+        print(f"✅ Documentos cargados: {len(docs)} ({docs.nbytes / 1e6:.1f} MB en columnas)")
         return docs
     except FileNotFoundError:
         print("❌ Archivo clean_with_metadata.json no encontrado")
-        return []
+        return DocumentStore([])
     except Exception as e:
         print(f"❌ Error cargando documentos: {e}")
-        return []
-
-documents = load_documents()
+        return DocumentStore([])
 
 # ============================================================================
 # ÍNDICE TF-IDF LOCAL (sin necesidad de API)
 # ============================================================================
 
+def artifact_mismatch(message):
+    """Artefacto que no corresponde al resto de la generación.
+    Con una generación ya sirviendo, aborta la recarga (el registro conserva la activa y
+    anota last_error); en la primera carga sólo avisa y el artefacto queda fuera.
+    """
+    if index_registry.generation > 0:
+        raise ArtifactMismatchError(message)
+    print(f"⚠️ {message}. Ejecuta create_search_index.py.")
+
 def load_tfidf_index():
-    """Carga el índice TF-IDF local para búsqueda sin API"""
+    """Abre el índice TF-IDF local (tfidf_index/, con mmap) para búsqueda sin API"""
     try:
-        with open('search_index.pkl', 'rb') as f:
-            index_data = pickle.load(f)
-        print(f"✅ Índice TF-IDF cargado: {index_data['matrix'].shape[0]} docs x {index_data['matrix'].shape[1]} términos")
-        return index_data
+        index = TfidfIndex.open('tfidf_index')
+        print(f"✅ Índice TF-IDF cargado: {index.shape[0]} docs x {index.shape[1]} términos")
+        return index
     except FileNotFoundError:
-        print("⚠️ search_index.pkl no encontrado. Ejecuta create_search_index.py primero.")
+        print("⚠️ tfidf_index/ no encontrado. Ejecuta create_search_index.py primero.")
         return None
     except Exception as e:
         print(f"⚠️ Error cargando índice TF-IDF: {e}")
         return None
 
-tfidf_index = load_tfidf_index()
+def load_field_index(tfidf_index):
+    """Sub-índices por campo (field_index/, con mmap) del mismo build que tfidf_index; None si no hay"""
+    if not tfidf_index:
+        return None
+    try:
+        fields = FieldIndex.open('field_index')
+        if fields.build_id != tfidf_index.build_id or fields.shape != tfidf_index.shape:
+            artifact_mismatch("field_index/ no corresponde a tfidf_index/")
+            return None
+        print(f"✅ Sub-índices por campo cargados: {', '.join(fields.postings)}")
+        return fields
+    except ArtifactMismatchError:
+        raise
+    except FileNotFoundError:
+        print("⚠️ field_index/ no encontrado (sin pesos por campo). Ejecuta create_search_index.py.")
+        return None
+    except Exception as e:
+        print(f"⚠️ Error cargando sub-índices por campo: {e}")
+        return None
 
-def search_exact_title(query, top_k=15):
+def load_lsa_index(tfidf_index, segments=None):
+    """Carga la proyección LSA (TruncatedSVD) generada junto al índice TF-IDF.
+    Con segmentos delta, agrega sus filas proyectadas y omite los documentos borrados.
+    """
+    if not tfidf_index:
+        return None
+    try:
+        lsa_data = np.load('lsa_index.npz')
+        matrix, projection = lsa_data['matrix'], lsa_data['projection']
+        if projection.shape[0] != tfidf_index.shape[1] or matrix.shape[0] != tfidf_index.shape[0]:
+            artifact_mismatch("lsa_index.npz no corresponde al índice TF-IDF actual")
+            return None
+        print(f"✅ Índice LSA cargado: {matrix.shape[0]} docs x {matrix.shape[1]} dimensiones")
+        doc_ids = np.arange(matrix.shape[0])
+        if segments:
+            matrix = np.vstack([matrix, segments.delta_latent(projection)])
+            doc_ids = segments.live_ids()
+            matrix = matrix[doc_ids]
+        return {
+            'projection': projection,
+            'index': DenseVectorIndex(matrix, doc_ids)
+        }
+    except ArtifactMismatchError:
+        raise
+    except FileNotFoundError:
+        print("⚠️ lsa_index.npz no encontrado. Ejecuta create_search_index.py primero.")
+        return None
+    except Exception as e:
+        print(f"⚠️ Error cargando índice LSA: {e}")
+        return None
+
+# Backend léxico: 'tfidf' (por defecto) o 'bm25' (BM25F por campos)
+SEARCH_BACKEND = os.getenv('SEARCH_BACKEND', 'tfidf')
+
+def load_bm25_index(n_docs):
+    """Carga el índice BM25F por campos (backend alternativo al TF-IDF)"""
+    try:
+        bm25 = BM25FIndex.load('bm25_index.npz')
+        if len(bm25) != n_docs:
+            artifact_mismatch("bm25_index.npz no corresponde a los documentos actuales")
+            return None
+        print(f"✅ Índice BM25F cargado: {len(bm25)} docs x {len(bm25.vocabulary)} términos")
+        return bm25
+    except ArtifactMismatchError:
+        raise
+    except FileNotFoundError:
+        print("⚠️ bm25_index.npz no encontrado. Ejecuta create_search_index.py primero.")
+        return None
+    except Exception as e:
+        print(f"⚠️ Error cargando índice BM25F: {e}")
+        return None
+
+def load_spelling_index():
+    """Índice de trigramas del vocabulario para corregir tipeos en las consultas"""
+    try:
+        spelling = SpellingIndex.load('spelling_index.npz')
+        print(f"✅ Índice de tipeos cargado: {len(spelling)} términos")
+        return spelling
+    except FileNotFoundError:
+        print("⚠️ spelling_index.npz no encontrado. Ejecuta create_search_index.py (sin corrección de tipeos).")
+        return None
+    except Exception as e:
+        print(f"⚠️ Error cargando índice de tipeos: {e}")
+        return None
+
+# Pesos de la segunda etapa de ranking ({rasgo: peso}, ver services/reranker.py)
+RERANKER_WEIGHTS_FILE = os.getenv('RERANKER_WEIGHTS', os.path.join(os.path.dirname(__file__), 'reranker_weights.json'))
+
+def load_reranker(documents, deleted):
+    """Re-ranker con los términos por campo de esta generación; None si los pesos son inválidos"""
+    try:
+        weights = load_weights(RERANKER_WEIGHTS_FILE)
+    except Exception as e:
+        print(f"⚠️ Error cargando {RERANKER_WEIGHTS_FILE}: {e} (sin re-ranking)")
+        return None
+
+    def values(field):
+        all_values, value_ids, doc_ids = documents.postings(field)
+        # Cada valor internado se analiza una sola vez
+        value_terms = [normalize_text(value).split() for value in all_values]
+        for value_id, doc_id in zip(np.asarray(value_ids).tolist(), np.asarray(doc_ids).tolist()):
+            yield doc_id, value_terms[value_id]
+
+    def slugs():
+        for doc_id, href in enumerate(documents.hrefs()):
+            if href and doc_id not in deleted:
+                yield doc_id, normalize_text(href.rstrip('/').split('/')[-1].replace('-', ' ').replace('_', ' ')).split()
+
+    field_terms = FieldTerms.build(len(documents), {
+        'title': ((doc_id, normalize_text(title).split()) for doc_id, title in enumerate(documents.titles())
+                  if doc_id not in deleted),
+        'subject': values('dc:subject'),
+        'creator': values('dc:creator'),
+        'coverage': values('dc:coverage'),
+        'slug': slugs(),
+    })
+    print(f"✅ Re-ranker listo: {len(field_terms.vocabulary)} términos por campo")
+    return Reranker(field_terms, weights)
+
+SEGMENTS_DIR = 'segments'
+
+def load_segments(tfidf_index):
+    """Segmentos delta y tombstones (update_search_index.py) sobre el índice base; None si no hay"""
+    if not tfidf_index:
+        return None
+    try:
+        segments = SegmentSet.open(SEGMENTS_DIR, tfidf_index)
+    except Exception as e:
+        print(f"⚠️ {SEGMENTS_DIR}/ ignorado: {e}")
+        return None
+    if not segments:
+        return None
+    stats = segments.stats()
+    print(f"✅ Segmentos: {stats['deltas']} deltas ({stats['delta_documents']} docs), {stats['tombstones']} borrados")
+    return segments
+
+def load_categories():
+    """Carga categories.json (materias, autores, lugares); None si no existe"""
+    categories_file = os.path.join(os.path.dirname(__file__), 'categories.json')
+    try:
+        with open(categories_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"⚠️ Error cargando categorías: {e}")
+        return None
+
+# ============================================================================
+# GENERACIÓN DE ÍNDICES (recargable en caliente, ver services/index_registry.py)
+# ============================================================================
+
+@dataclass
+class SearchIndexes:
+    """Todos los índices de una generación; se reemplazan juntos, nunca por separado"""
+    documents: DocumentStore
+    title_index: TitleIndex
+    tfidf_index: Optional[TfidfIndex] = None
+    tfidf_scorer: Optional[SparseTopKScorer] = None
+    lsa_index: Optional[Dict] = None
+    bm25_index: Optional[BM25FIndex] = None
+    document_embeddings: Optional[Dict] = None
+    dense_index: Optional[DenseVectorIndex] = None
+    categories: Optional[Dict] = None
+    segments: Optional[SegmentSet] = None
+    facets: Optional[FacetIndex] = None
+    years: Optional[YearIndex] = None
+    spelling: Optional[SpellingIndex] = None
+    autocomplete: Optional[PrefixIndex] = None
+    positions: Optional[PositionalIndex] = None
+    title_features: Optional[TitleFeatures] = None
+    reranker: Optional[Reranker] = None
+    field_index: Optional[FieldIndex] = None
+
+def load_search_indexes(create_embeddings=False):
+    """Carga una generación completa desde disco.
+    create_embeddings: si faltan embeddings, generarlos con la API (sólo al iniciar)
+    ArtifactMismatchError si, con una generación ya sirviendo, los artefactos no son de un mismo build
+    """
+    base_documents = load_documents()
+    tfidf_index = load_tfidf_index()
+    if tfidf_index and tfidf_index.shape[0] != len(base_documents):
+        artifact_mismatch("tfidf_index/ no corresponde a los documentos actuales")
+        tfidf_index = None
+    tfidf_scorer = SparseTopKScorer.from_normalized_csc(tfidf_index.postings) if tfidf_index else None
+    bm25_index = load_bm25_index(len(base_documents)) if SEARCH_BACKEND == 'bm25' else None
+
+    # Base + segmentos delta (ids globales); los borrados conservan su id
+    segments = load_segments(tfidf_index)
+    documents = segments.documents(base_documents) if segments else base_documents
+    deleted = set(segments.deleted.tolist()) if segments else set()
+    if segments:
+        tfidf_scorer = segments.scorer(tfidf_scorer)
+
+    document_embeddings = load_embeddings(documents, create_missing=create_embeddings)
+    # Los documentos de los deltas no tienen embedding hasta compactar; los borrados se omiten
+    live_embeddings = {idx: vec for idx, vec in document_embeddings.items() if idx not in deleted}
+    categories = load_categories()
+    return SearchIndexes(
+        documents=documents,
+        # Índice invertido de títulos/hrefs (se construye una vez por generación)
+        title_index=TitleIndex(documents, deleted),
+        tfidf_index=tfidf_index,
+        # Una matriz por campo (mismo vocabulario) para pesos por campo en cada consulta
+        field_index=load_field_index(tfidf_index),
+        # Motor de puntaje disperso (postings normalizados, compartidos vía mmap)
+        tfidf_scorer=tfidf_scorer,
+        # Búsqueda semántica local (LSA): no requiere GEMINI_API_KEY
+        lsa_index=load_lsa_index(tfidf_index, segments),
+        bm25_index=bm25_index,
+        document_embeddings=document_embeddings,
+        # Matriz float32 contigua y normalizada (una fila por documento con embedding)
+        dense_index=DenseVectorIndex.from_embeddings(live_embeddings, len(documents)) if live_embeddings else None,
+        categories=categories,
+        segments=segments,
+        # Bitmaps por materia/autor/lugar para filtrar búsquedas de texto
+        facets=FacetIndex.from_documents(documents),
+        # Pares (año, doc) ordenados desde dc:date y títulos, para rangos de años
+        years=YearIndex.from_documents(documents, deleted),
+        # Trigramas del vocabulario: términos desconocidos -> el más cercano
+        spelling=load_spelling_index(),
+        # Claves ordenadas (bisect) de títulos y categorías para /api/suggest
+        autocomplete=PrefixIndex.build(categories, (title if idx not in deleted else ''
+                                                    for idx, title in enumerate(documents.titles()))),
+        # Posiciones por término para frases entre comillas y NEAR/k
+        positions=build_positional_index(documents, deleted),
+        # Años y palabras clave de cada título como ids enteros, para las sugerencias
+        title_features=TitleFeatures.build(documents.titles()),
+        # Términos por campo (título, materias, autores, lugares, href) y pesos de la segunda etapa
+        reranker=load_reranker(documents, deleted),
+    )
+
+def build_positional_index(documents, deleted):
+    """Índice posicional del título y de cada materia, autor y lugar (un valor no se une al siguiente)"""
+    def spans():
+        for doc_id, title in enumerate(documents.titles()):
+            if doc_id not in deleted:
+                yield doc_id, normalize_text(title).split()
+        for field in ('dc:subject', 'dc:creator', 'dc:coverage'):
+            values, value_ids, doc_ids = documents.postings(field)
+            # Cada valor internado se analiza una sola vez
+            value_terms = [normalize_text(value).split() for value in values]
+            for value_id, doc_id in zip(np.asarray(value_ids).tolist(), np.asarray(doc_ids).tolist()):
+                yield doc_id, value_terms[value_id]
+    return PositionalIndex.build(len(documents), spans())
+
+# Generación fijada por la solicitud en curso: una búsqueda termina sobre los
+# mismos índices con que empezó aunque entre tanto se publique otra generación
+_pinned_generation = contextvars.ContextVar('index_generation', default=None)
+
+def active_generation():
+    """Generación fijada para la solicitud en curso, o la activa del registro"""
+    return _pinned_generation.get() or index_registry.current
+
+def active_indexes() -> SearchIndexes:
+    return active_generation().indexes
+
+@contextmanager
+def pinned_generation():
+    """Fija la generación activa durante el bloque (no hace nada si ya hay una fijada)"""
+    if _pinned_generation.get() is not None:
+        yield _pinned_generation.get()
+        return
+    token = _pinned_generation.set(index_registry.current)
+    try:
+        yield _pinned_generation.get()
+    finally:
+        _pinned_generation.reset(token)
+
+# ============================================================================
+# PROYECCIÓN DE RESULTADOS
+# ============================================================================
+# Los recuperadores (rank_*) trabajan sólo con ids: retornan tuplas
+# (doc_id, score, match_type). Los diccionarios de respuesta se construyen
+# una única vez, y sólo para la página que efectivamente se devuelve.
+
+def materialize_results(hits, documents=None):
+    """Copia los documentos de los hits dados y les agrega relevance_score y _match_type.
+    documents: store de otra generación (p. ej. la de una lista paginada); por defecto la activa
+    """
+    if documents is None:
+        documents = active_indexes().documents
+    results = []
+    for idx, score, match_type in hits:
+        if 0 <= idx < len(documents):
+            doc = documents.to_dict(idx)
+            doc['relevance_score'] = float(score)
+            doc['_match_type'] = match_type
+            results.append(doc)
+    return results
+
+def rank_exact_title(query, top_k=15, allowed=None):
     """
     Búsqueda EXACTA por título - prioriza matches exactos y parciales.
     Se ejecuta ANTES de TF-IDF para encontrar documentos con título exacto.
+    Los candidatos salen del índice invertido (sin recorrer todo el corpus).
+    allowed: máscara de candidatos de los filtros por faceta (en todos los rank_*)
     """
-    query_lower = query.lower().strip()
-    results = []
-    
-    for idx, doc in enumerate(documents):
-        title = doc.get('title', '').lower()
-        href = doc.get('href', '').lower()
-        
-        score = 0
-        
-        # Match exacto de título (máxima prioridad)
-        if query_lower == title:
-            score = 1.0
-        # Título contiene la query completa
-        elif query_lower in title:
-            score = 0.9
-        # Query contiene el título completo
-        elif title and title in query_lower:
-            score = 0.85
-        # Match en URL/href
-        elif query_lower.replace(' ', '-') in href or query_lower.replace(' ', '') in href:
-            score = 0.8
-        # Match parcial de palabras clave
-        else:
-            query_words = set(query_lower.split())
-            title_words = set(title.split())
-            common = query_words & title_words
-            if len(common) >= 3:  # Al menos 3 palabras en común
-                score = 0.6 + (len(common) / len(query_words)) * 0.2
-        
-        if score > 0.5:
-            doc_copy = doc.copy()
-            doc_copy['relevance_score'] = score
-            doc_copy['_match_type'] = 'exact_title'
-            results.append((score, idx, doc_copy))
-    
-    # Ordenar por score descendente
-    results.sort(key=lambda x: x[0], reverse=True)
+    return [(idx, score, 'exact_title') for idx, score in active_indexes().title_index.search(query, top_k, allowed)]
+
+def search_exact_title(query, top_k=15):
+    """Búsqueda exacta por título (documentos materializados)"""
+    return materialize_results(rank_exact_title(query, top_k))
+
+def lexical_backend(ix):
+    """Backend léxico que puntúa en la generación dada: 'bm25' o 'tfidf'"""
+    return 'bm25' if ix.bm25_index is not None else 'tfidf'
+
+def rank_lexical(query, top_k=15, allowed=None):
+    """Top-k del backend léxico configurado (BM25F o TF-IDF): (índices, puntajes)"""
+    ix = active_indexes()
+    if ix.bm25_index is not None:
+        if not ix.segments:
+            return ix.bm25_index.top_k(tokenize(query), top_k, allowed=allowed)
+        # BM25F cubre sólo la base (hasta compactar): se piden extra por los borrados
+        ids, scores = ix.bm25_index.top_k(tokenize(query), top_k + len(ix.segments.deleted), allowed=allowed)
+        live = ~np.isin(ids, ix.segments.deleted)
+        return ids[live][:top_k], scores[live][:top_k]
+    
+    # Vectorizar la consulta
+    query_vector = ix.tfidf_index.transform([query])
+    
+    # Top-k por producto disperso (sólo columnas de los términos de la consulta)
+    return ix.tfidf_scorer.top_k(query_vector, top_k, min_score=0.01, allowed=allowed)
+
+# Pesos por campo cuando una solicitud pide campos; sobrescribibles con FIELD_WEIGHTS='{"title": 2}'
+def load_field_weights():
+    """Pesos por defecto de FIELD_WEIGHTS, validados al iniciar; si son inválidos se usan los de fábrica"""
+    try:
+        return normalize_field_weights(json.loads(os.getenv('FIELD_WEIGHTS') or '{}') or DEFAULT_FIELD_WEIGHTS)
+    except ValueError as e:
+        # json.JSONDecodeError también es ValueError
+        print(f"⚠️ FIELD_WEIGHTS inválido ({e}); se usan los pesos por defecto {DEFAULT_FIELD_WEIGHTS}")
+        return dict(DEFAULT_FIELD_WEIGHTS)
+
+FIELD_WEIGHTS = load_field_weights()
+
+def rank_fields(query, top_k=15, fields=None, allowed=None):
+    """TF-IDF con pesos por campo de la solicitud: suma ponderada de un producto disperso por campo.
+    Los documentos de segmentos delta entran al compactar (como BM25F).
+    """
+    ix = active_indexes()
+    try:
+        query_vector = ix.tfidf_index.transform([query])
+        extra = len(ix.segments.deleted) if ix.segments else 0
+        base_allowed = allowed[:ix.field_index.shape[0]] if allowed is not None else None
+        ids, scores = ix.field_index.top_k(query_vector, top_k + extra, fields, allowed=base_allowed)
+        if extra:
+            live = ~np.isin(ids, ix.segments.deleted)
+            ids, scores = ids[live][:top_k], scores[live][:top_k]
+        return [(idx, score, 'fields') for idx, score in zip(ids.tolist(), scores.tolist())]
+    except Exception as e:
+        print(f"❌ Error en búsqueda por campos: {e}")
+        return []
+
+def rank_with_tfidf(query, top_k=15, allowed=None):
+    """Búsqueda usando el índice léxico local (TF-IDF o BM25F; rápida, sin API)"""
+    ix = active_indexes()
+    if not ix.tfidf_index and ix.bm25_index is None:
+        return []
     
-    return [r[2] for r in results[:top_k]]
+    try:
+        top_indices, top_scores = rank_lexical(query, top_k, allowed)
+        match_type = lexical_backend(ix)
+        return [(idx, score, match_type) for idx, score in zip(top_indices.tolist(), top_scores.tolist())]
+    except Exception as e:
+        print(f"❌ Error en búsqueda TF-IDF: {e}")
+        return []
 
 def search_with_tfidf(query, top_k=15):
-    """Búsqueda usando TF-IDF local (rápida, sin API)"""
-    if not tfidf_index:
+    """Búsqueda léxica local (documentos materializados)"""
+    return materialize_results(rank_with_tfidf(query, top_k))
+
+def rank_with_lsa(query, top_k=15, min_score=0.1, allowed=None):
+    """Búsqueda semántica local: proyecta la consulta al espacio LSA (sin red)"""
+    ix = active_indexes()
+    if not ix.lsa_index:
         return []
     
     try:
-        vectorizer = tfidf_index['vectorizer']
-        tfidf_matrix = tfidf_index['matrix']
+        query_vector = ix.tfidf_index.transform([query])
+        # Sólo las filas de la proyección de los términos presentes en la consulta
+        query_latent = query_vector.data.astype(np.float32) @ ix.lsa_index['projection'][query_vector.indices]
         
-        # Vectorizar la consulta
-        query_vector = vectorizer.transform([query])
-        
-        # Calcular similitudes usando coseno
-        from sklearn.metrics.pairwise import cosine_similarity
-        similarities = cosine_similarity(query_vector, tfidf_matrix).flatten()
-        
-        # Obtener índices de los top_k más similares
-        top_indices = similarities.argsort()[-top_k:][::-1]
-        
-        results = []
-        for idx in top_indices:
-            if idx < len(documents) and similarities[idx] > 0.01:  # Umbral mínimo
-                doc = documents[idx].copy()
-                doc['relevance_score'] = float(similarities[idx])
-                results.append(doc)
-        
-        return results
+        top_ids, top_scores = ix.lsa_index['index'].top_k(query_latent, top_k, min_score=min_score, allowed=allowed)
+        return [(idx, score, 'lsa') for idx, score in zip(top_ids.tolist(), top_scores.tolist())]
     except Exception as e:
-        print(f"❌ Error en búsqueda TF-IDF: {e}")
+        print(f"❌ Error en búsqueda LSA: {e}")
         return []
 
-def load_embeddings():
-    """Carga embeddings desde pickle o los crea si no existen"""
+def search_with_lsa(query, top_k=15, min_score=0.1):
+    """Búsqueda semántica local (documentos materializados)"""
+    return materialize_results(rank_with_lsa(query, top_k, min_score))
+
+def load_embeddings(documents, create_missing=True):
+    """Carga embeddings desde pickle o los crea si no existen (create_missing)"""
     try:
         with open('embeddings_cache.pkl', 'rb') as f:
             embeddings = pickle.load(f)
         print(f"✅ Embeddings cargados: {len(embeddings)} documentos")
         return embeddings
     except FileNotFoundError:
+        if not create_missing:
+            return {}
         print("⚠️ embeddings_cache.pkl no encontrado. Creando embeddings...")
-        return create_embeddings_fallback()
+        return create_embeddings_fallback(documents)
     except Exception as e:
+        if not create_missing:
+            print(f"⚠️ Error cargando embeddings: {e}")
+            return {}
         print(f"⚠️ Error cargando embeddings: {e}. Recreando...")
-        return create_embeddings_fallback()
+        return create_embeddings_fallback(documents)
 
-def create_embeddings_fallback():
+def create_embeddings_fallback(documents):
     """Crea embeddings nuevos de manera optimizada (por lotes)"""
     embeddings = {}
     try:
@@ -237,8 +598,8 @@ def create_embeddings_fallback():
         indices_map = []
         
         # Preparar textos
-        for idx, doc in enumerate(documents):
-            text = f"{doc['title']} {doc['href']}"
+        for idx, (title, href) in enumerate(zip(documents.titles(), documents.hrefs())):
+            text = f"{title} {href}"
             texts_to_embed.append(text)
             indices_map.append(idx)
             
@@ -296,89 +657,153 @@ def create_embeddings_fallback():
         print(f"❌ Error crítico creando embeddings: {e}")
         return {}
 
-document_embeddings = load_embeddings()
-embeddings_ready = bool(document_embeddings)
-
 # ============================================================================
-# BÚSQUEDA SEMÁNTICA
+# VERSIÓN DEL ÍNDICE Y CACHE DE RESULTADOS
 # ============================================================================
 
-def search_documents(query, top_k=15, include_suggestions=True):
-    """
-    Busca documentos usando similitud semántica
-    Retorna hasta top_k documentos más relevantes y sugerencias de refinamiento
+# El sello que create_search_index.py escribe al terminar cubre todos los artefactos del
+# build (corpus, TF-IDF, campos, LSA, BM25F, tipeos); estos otros se actualizan por su cuenta
+BUILD_STAMP = 'build_stamp.json'
+INDEX_ARTIFACTS = [
+    'embeddings_cache.pkl', 'categories.json', 'segments/manifest.json', 'reranker_weights.json'
+]
+
+def compute_index_version():
+    """Huella de la generación en disco: contenido del sello del build + tamaño y mtime de los
+    artefactos que no reescribe el build. Un build a medio escribir no la cambia.
     """
-    try:
-        # Normalizar query
-        normalized_query = normalize_query(query)
-        print(f"🔍 Query normalizada: '{normalized_query}'")
-        
-        # PASO 1: Buscar matches EXACTOS por título primero
-        exact_results = search_exact_title(query, top_k)
-        if exact_results:
-            print(f"✅ Búsqueda exacta encontró {len(exact_results)} documentos")
-            suggestions = generate_search_suggestions(query, exact_results) if include_suggestions else []
-            return exact_results, suggestions
-        
-        # PASO 2: Si no hay matches exactos, usar TF-IDF
-        if tfidf_index:
-            print("🔄 Usando búsqueda TF-IDF local...")
-            results = search_with_tfidf(normalized_query, top_k)
-            if results:
-                print(f"📄 TF-IDF encontró {len(results)} documentos")
-                suggestions = generate_search_suggestions(query, results) if include_suggestions else []
-                return results, suggestions
+    digest = hashlib.sha1()
+    for name in [BUILD_STAMP] + INDEX_ARTIFACTS:
+        path = name if os.path.exists(name) else os.path.join(os.path.dirname(__file__), name)
+        try:
+            if name == BUILD_STAMP:
+                with open(path, 'rb') as f:
+                    digest.update(f.read())
             else:
-                print("⚠️ TF-IDF sin resultados; probando keywords...")
-        
-        # PASO 3: Fallback a búsqueda por keywords
-        results = search_by_keywords(normalized_query, top_k)
-        suggestions = generate_search_suggestions(query, results) if include_suggestions else []
-        return results, suggestions
-        
+                stat = os.stat(path)
+                digest.update(f"{name}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+        except OSError:
+            digest.update(f"{name}:-;".encode())
+    digest.update(f"backend:{SEARCH_BACKEND}".encode())
+    return digest.hexdigest()[:12]
+
+# Cache LRU + TTL de listas rankeadas (ids y puntajes), el único cache de búsquedas:
+# search_documents y search_page (primera página y cursores) leen de él. La clave
+# incluye la generación de índices y cada entrada la retiene hasta salir por LRU o TTL.
+SEARCH_PAGE_DEPTH = int(os.getenv('SEARCH_PAGE_DEPTH', '60'))
+
+# Candidatos de la primera etapa que pasan por el re-ranker (RERANKER_WEIGHTS para los pesos)
+RERANK_DEPTH = int(os.getenv('RERANK_DEPTH', '150'))
+ranked_lists = ResultCache(
+    max_entries=int(os.getenv('RANKED_LIST_CACHE_SIZE', '256')),
+    ttl=float(os.getenv('RANKED_LIST_CACHE_TTL', '900'))
+)
+
+def rank_with_embeddings(query, top_k=15, allowed=None):
+    """Búsqueda semántica: embedding de la consulta contra el índice denso"""
+    dense_index = active_indexes().dense_index
+    if dense_index is None:
+        return []
+    
+    try:
         # Generar embedding de la consulta (via factory/proxy)
         query_embedder = factory.make_query_embedding()
-        query_embedding = None
-        embed = query_embedder(normalized_query)
-        if embed is None:
-            # Fallback a búsqueda por keywords si no hay embedding
-            print("⚠️ No se pudo generar embedding; usando búsqueda por keywords...")
-            results = search_by_keywords(normalized_query, top_k)
-            suggestions = generate_search_suggestions(query, results) if include_suggestions else []
-            return results, suggestions
-        else:
-            query_embedding = embed
+        query_embedding = query_embedder(query)
+        if query_embedding is None:
+            print("⚠️ No se pudo generar embedding de la consulta")
+            return []
+        
+        # Un producto matriz-vector + argpartition
+        top_ids, top_scores = dense_index.top_k(query_embedding, top_k, allowed=allowed)
+        return [(idx, score, 'semantic') for idx, score in zip(top_ids.tolist(), top_scores.tolist())]
+    except Exception as e:
+        print(f"❌ Error en búsqueda semántica: {e}")
+        return []
 
-        # Calcular similitudes
-        similarities = []
-        for idx, doc_embedding in document_embeddings.items():
-            similarity = cosine_similarity(
-                [query_embedding],
-                [doc_embedding]
-            )[0][0]
-            similarities.append((idx, similarity))
+def search_with_embeddings(query, top_k=15):
+    """Búsqueda semántica con embeddings (documentos materializados)"""
+    return materialize_results(rank_with_embeddings(query, top_k))
 
-        # Ordenar por similitud
-        similarities.sort(key=lambda x: x[1], reverse=True)
+# ============================================================================
+# BÚSQUEDA HÍBRIDA (recuperadores en paralelo + RRF)
+# ============================================================================
 
-        # Retornar top_k documentos
-        results = []
-        for idx, score in similarities[:top_k]:
-            if idx < len(documents):
-                doc = documents[idx].copy()
-                doc['relevance_score'] = float(score)
-                results.append(doc)
+# 'cascade' (primer paso con resultados gana) o 'hybrid' (fusión RRF)
+SEARCH_MODE = os.getenv('SEARCH_MODE', 'cascade')
 
-        print(f"📄 Encontrados {len(results)} documentos relevantes")
-        
-        # Generar sugerencias si se solicita
-        suggestions = []
-        if include_suggestions:
-            suggestions = generate_search_suggestions(query, results)
-            if suggestions:
-                print(f"💡 Generadas {len(suggestions)} sugerencias de refinamiento")
-        
-        event_bus.publish('search.done', {'query': normalized_query, 'results_count': len(results), 'suggestions_count': len(suggestions)})
+# Pesos RRF por recuperador; sobrescribibles con HYBRID_WEIGHTS='{"tfidf": 1.5}'
+DEFAULT_HYBRID_WEIGHTS = {'exact_title': 1.0, 'tfidf': 1.0, 'keywords': 0.5, 'dense': 0.8}
+
+def load_hybrid_weights():
+    """Pesos RRF de HYBRID_WEIGHTS, validados al iniciar; si son inválidos se usan los de fábrica"""
+    try:
+        return validate_weights(json.loads(os.getenv('HYBRID_WEIGHTS') or '{}'), DEFAULT_HYBRID_WEIGHTS)
+    except ValueError as e:
+        # json.JSONDecodeError también es ValueError
+        print(f"⚠️ HYBRID_WEIGHTS inválido ({e}); se usan los pesos por defecto {DEFAULT_HYBRID_WEIGHTS}")
+        return dict(DEFAULT_HYBRID_WEIGHTS)
+
+HYBRID_WEIGHTS = load_hybrid_weights()
+
+# Plazo por recuperador en segundos (el denso puede llamar a la API de Gemini)
+HYBRID_DEADLINES = {'exact_title': 0.2, 'tfidf': 0.3, 'keywords': 0.3, 'dense': 1.5}
+
+def _retrieve_exact_title(query: HybridQuery, depth: int):
+    return [idx for idx, _, _ in rank_exact_title(query.raw, depth, query.allowed)]
+
+def _retrieve_tfidf(query: HybridQuery, depth: int):
+    return [idx for idx, _, _ in rank_with_tfidf(query.normalized, depth, query.allowed)]
+
+def _retrieve_keywords(query: HybridQuery, depth: int):
+    return [idx for idx, _, _ in rank_by_keywords(query.normalized, depth, query.allowed)]
+
+def _retrieve_dense(query: HybridQuery, depth: int):
+    """Embeddings de Gemini si existen; si no, proyección LSA local"""
+    hits = (rank_with_embeddings(query.normalized, depth, query.allowed)
+            or rank_with_lsa(query.normalized, depth, allowed=query.allowed))
+    return [idx for idx, _, _ in hits]
+
+hybrid_retriever = HybridRetriever(
+    {
+        'exact_title': _retrieve_exact_title,
+        'tfidf': _retrieve_tfidf,
+        'keywords': _retrieve_keywords,
+        'dense': _retrieve_dense,
+    },
+    weights=HYBRID_WEIGHTS,
+    deadlines=HYBRID_DEADLINES,
+)
+
+def rank_hybrid(query, normalized_query, top_k=15, allowed=None):
+    """Ejecuta todos los recuperadores en paralelo y fusiona sus rankings (RRF)"""
+    fused = hybrid_retriever.search(HybridQuery(query, normalized_query, allowed), top_k)
+    return [(idx, score, 'hybrid') for idx, score in fused]
+
+def search_hybrid(query, normalized_query, top_k=15):
+    """Búsqueda híbrida (documentos materializados)"""
+    return materialize_results(rank_hybrid(query, normalized_query, top_k))
+
+# ============================================================================
+# BÚSQUEDA SEMÁNTICA
+# ============================================================================
+
+def search_documents(query, top_k=15, include_suggestions=True, mode=None, filters=None, years=None):
+    """
+    Busca documentos usando similitud semántica
+    Retorna hasta top_k documentos más relevantes y sugerencias de refinamiento
+    mode: 'cascade' o 'hybrid' (por defecto SEARCH_MODE)
+    filters: {'materias'|'autores'|'lugares': valor, [valores] (OR) o {'all': [...]}}; AND entre facetas
+    years: (inicio, fin) inclusive; sólo documentos con algún año (dc:date o título) en el rango
+    Es la primera página de search_page: comparte con ella la lista rankeada cacheada en
+    ranked_lists (hasta max(top_k, SEARCH_PAGE_DEPTH) documentos) y sólo materializa los top_k
+    primeros; no pide las facetas, así que nunca se calculan por esta vía
+    """
+    try:
+        ranked = rank_search_list(query, mode, filters, years, depth=top_k)
+        hits = ranked.page(0, top_k)
+        results = materialize_results(hits, ranked.generation.indexes.documents)
+        suggestions = (generate_search_suggestions(query, [idx for idx, _, _ in hits], ranked.generation.indexes)
+                       if include_suggestions else [])
         return results, suggestions
         
     except Exception as e:
@@ -386,6 +811,248 @@ def search_documents(query, top_k=15, include_suggestions=True):
         traceback.print_exc()
         return [], []
 
+def candidate_mask(ix, query, filters, years):
+    """
+    Candidatos de los filtros ya normalizados, el rango de años y las frases/NEAR de la consulta.
+    Retorna (texto a puntuar sin comillas ni operadores, máscara o None si no hay restricciones)
+    """
+    query, phrases, nears = extract_proximity(query)
+    # Candidatos de los filtros: AND/OR de bitmaps, antes de puntuar texto
+    allowed = ix.facets.select(filters) if filters else None
+    if years:
+        # Rango de años: dos búsquedas binarias sobre el índice ordenado
+        year_mask = ix.years.mask(*years)
+        allowed = year_mask if allowed is None else allowed & year_mask
+    if (phrases or nears) and ix.positions is not None:
+        # Frases exactas ("consejo de gabinete") y NEAR/k sobre el índice posicional
+        near_terms = [(analyze_terms(first), analyze_terms(second), k) for first, second, k in nears]
+        proximity_mask = ix.positions.mask(
+            [analyze_terms(phrase) for phrase in phrases],
+            [(first[0], second[0], k) for first, second, k in near_terms if len(first) == len(second) == 1])
+        if proximity_mask is not None:
+            allowed = proximity_mask if allowed is None else allowed & proximity_mask
+        print(f"🧩 Frases {phrases}, NEAR {nears}")
+    if allowed is not None:
+        print(f"🏷️ Filtros {filters or {}}, años {years or '-'}: {int(allowed.sum())} documentos candidatos")
+    return query, allowed
+
+def matched_documents(ix, query, allowed, hits, fields=None):
+    """
+    Ids de todos los documentos que cumplen la consulta, no sólo los rankeados: los que
+    comparten algún término con ella dentro de los candidatos (mismo umbral que el léxico)
+    más los hits. Sin texto, los candidatos de los filtros. Con fields, sólo en esos campos.
+    """
+    ids = [np.fromiter((idx for idx, _, _ in hits), dtype=np.int64)]
+    normalized = normalize_query(query)
+    if normalized and fields and ix.field_index is not None:
+        base_allowed = allowed[:ix.field_index.shape[0]] if allowed is not None else None
+        ids.append(ix.field_index.score(ix.tfidf_index.transform([normalized]), fields, base_allowed)[0])
+    elif normalized and ix.tfidf_index is not None and ix.tfidf_scorer is not None:
+        matched, scores = ix.tfidf_scorer.score(ix.tfidf_index.transform([normalized]), allowed)
+        ids.append(matched[scores >= 0.01])
+    elif not normalized and allowed is not None:
+        ids.append(np.flatnonzero(allowed))
+    ids = np.unique(np.concatenate(ids))
+    if ix.segments:
+        ids = ids[~np.isin(ids, ix.segments.deleted)]
+    return ids
+
+def facet_counts(ix, doc_ids):
+    """Distribución de un conjunto de documentos por materia, autor, lugar y década (para drill-down)"""
+    counts = ix.facets.counts(doc_ids) if ix.facets is not None else {}
+    if ix.years is not None:
+        counts['decadas'] = ix.years.decade_counts(doc_ids)
+    return counts
+
+def rank_documents(query, top_k, mode, allowed=None, fields=None):
+    """Hits (doc_id, score, match_type) de la cascada o del modo híbrido, sin materializar
+    fields: pesos por campo ya normalizados ({campo: peso}); si vienen, el ranking es sólo
+    el TF-IDF por campos con esos pesos (sin cascada ni re-ranking que los contradigan)
+    """
+    # Normalizar query
+    normalized_query = normalize_query(query)
+    print(f"🔍 Query normalizada: '{normalized_query}'")
+    
+    if fields and active_indexes().field_index is not None:
+        hits = rank_fields(normalized_query, top_k, fields, allowed)
+        print(f"📄 Búsqueda por campos {fields} encontró {len(hits)} documentos")
+        return hits
+    
+    # La primera etapa entrega más candidatos que top_k si hay segunda etapa (RERANK_DEPTH=0 la desactiva)
+    rerank = RERANK_DEPTH > 0 and active_indexes().reranker is not None
+    depth = max(top_k, RERANK_DEPTH) if rerank else top_k
+    if mode == 'hybrid':
+        # Modo híbrido: todos los recuperadores en paralelo + fusión RRF
+        hits = rank_hybrid(query, normalized_query, depth, allowed)
+        print(f"📄 Búsqueda híbrida encontró {len(hits)} documentos")
+    else:
+        hits = _rank_cascade(query, normalized_query, depth, allowed)
+    return rerank_hits(query, normalized_query, hits, top_k) if rerank else hits
+
+def rerank_hits(query, normalized_query, hits, top_k):
+    """Segunda etapa: rasgos baratos de los candidatos (matriz x pesos) y nuevo orden; conserva match_type"""
+    ix = active_indexes()
+    if ix.reranker is None or len(hits) < 2:
+        return hits[:top_k]
+    doc_ids = np.fromiter((idx for idx, _, _ in hits), dtype=np.int64, count=len(hits))
+    first_stage = np.fromiter((score for _, score, _ in hits), dtype=np.float32, count=len(hits))
+    terms = [term for term in normalized_query.split() if term not in STOPWORDS]
+
+    # Frase exacta: la consulta normalizada completa consecutiva en algún campo del índice posicional.
+    # Sólo rasgos de la forma normalizada: la lista cacheada es la misma para "ddhh" y "derechos humanos"
+    exact_phrase = None
+    phrase = normalized_query.split()
+    if len(phrase) > 1 and ix.positions is not None:
+        exact_phrase = np.isin(doc_ids, ix.positions.phrase_docs(phrase))
+
+    # Años nombrados en la consulta (si no se quitaron antes como filtro)
+    year_match = None
+    query_years = years_in_text(normalized_query)
+    if query_years and ix.years is not None:
+        year_match = np.isin(doc_ids, np.concatenate([ix.years.docs_between(y, y) for y in query_years]))
+
+    features = ix.reranker.features(terms, doc_ids, first_stage, exact_phrase, year_match)
+    order, scores = ix.reranker.rerank(features, top_k)
+    return [(hits[i][0], float(score), hits[i][2]) for i, score in zip(order.tolist(), scores.tolist())]
+
+def search_page(query='', page_size=6, cursor=None, include_suggestions=False, mode=None, filters=None, years=None,
+                fields=None):
+    """
+    Una página de resultados y el cursor de la siguiente.
+    Sin cursor rankea la consulta hasta SEARCH_PAGE_DEPTH documentos y guarda la lista;
+    con cursor sólo rebana la lista guardada (no vuelve a puntuar). En ambos casos se
+    materializan únicamente los documentos de la página.
+    Retorna (documentos, sugerencias, next_cursor, total, facetas); CursorError si el cursor
+    es inválido o su lista ya salió del cache. Las facetas cuentan todos los documentos que
+    cumplen la consulta y se calculan una vez por lista, la primera vez que se piden.
+    """
+    if cursor:
+        key, offset = decode_cursor(cursor)
+        ranked = ranked_lists.get(key)
+        if ranked is None:
+            raise CursorError("El cursor expiró; repite la búsqueda")
+        print(f"📑 Página desde cursor: documentos {offset + 1}-{min(offset + page_size, len(ranked))} de {len(ranked)}")
+    else:
+        ranked, offset = rank_search_list(query, mode, filters, years, fields), 0
+
+    # Los ids son de la generación con que se rankeó la lista
+    page = ranked.page(offset, page_size)
+    results = materialize_results(page, ranked.generation.indexes.documents)
+    suggestions = (generate_search_suggestions(query, [idx for idx, _, _ in page], ranked.generation.indexes)
+                   if include_suggestions and query else [])
+    return results, suggestions, ranked.next_cursor(offset, page_size), len(ranked), ranked.facets
+
+def ranking_query_key(ix, query, fields=None):
+    """Parte de la clave de ranked_lists que depende del texto: la consulta normalizada (tildes,
+    plurales, abreviaturas y tipeos ya resueltos), las frases/NEAR analizadas y, sólo si el paso
+    de título exacto encuentra algo (compara el texto literal), la consulta en minúsculas.
+    """
+    text, phrases, nears = extract_proximity(query)
+    title_key = None
+    if text.strip() and not (fields and ix.field_index is not None) and ix.title_index.search(text, 1):
+        title_key = text.lower().strip()
+    return (normalize_query(text), tuple(analyze_query(phrase) for phrase in phrases),
+            tuple((analyze_query(first), analyze_query(second), k) for first, second, k in nears), title_key)
+
+def rank_search_list(query, mode=None, filters=None, years=None, fields=None, depth=0):
+    """Lista rankeada (hasta max(depth, SEARCH_PAGE_DEPTH) hits) de una consulta, desde ranked_lists si ya existe
+    fields: pesos por campo ya normalizados (normalize_field_weights)
+    Las facetas de la lista (matched_documents + facet_counts) se calculan sólo si se leen.
+    """
+    depth = max(depth, SEARCH_PAGE_DEPTH)
+    with pinned_generation() as generation:
+        mode = mode or SEARCH_MODE
+        filters = normalize_filters(filters)
+        key = ranking_key((ranking_query_key(generation.indexes, query, fields), mode, json.dumps(filters, sort_keys=True),
+                           tuple(years) if years else None, json.dumps(fields or {}, sort_keys=True), depth,
+                           generation.number))
+        ranked = ranked_lists.get(key)
+        if ranked is not None:
+            print(f"⚡ Lista rankeada desde cache: '{query}'")
+            return ranked
+        try:
+            query, allowed = candidate_mask(generation.indexes, query, filters, years)
+            hits = rank_documents(query, depth, mode, allowed, fields)
+        except Exception as e:
+            print(f"❌ Error en búsqueda: {e}")
+            traceback.print_exc()
+            return RankedList(key, (), generation)
+        ix = generation.indexes
+        ranked = RankedList(key, tuple(hits), generation,
+                            lambda: facet_counts(ix, matched_documents(ix, query, allowed, hits, fields)))
+        ranked_lists.put(key, ranked)
+        return ranked
+
+def _rank_cascade(query, normalized_query, top_k, allowed=None):
+    """Cascada: el primer paso con resultados gana. Retorna hits (doc_id, score, match_type)"""
+    # PASO 1: Buscar matches EXACTOS por título primero
+    hits = rank_exact_title(query, top_k, allowed)
+    if hits:
+        print(f"✅ Búsqueda exacta encontró {len(hits)} documentos")
+        return hits
+    
+    ix = active_indexes()
+    
+    # PASO 2: Si no hay matches exactos, usar TF-IDF (o BM25F según SEARCH_BACKEND)
+    if ix.tfidf_index or ix.bm25_index is not None:
+        print("🔄 Usando búsqueda TF-IDF local...")
+        hits = rank_with_tfidf(normalized_query, top_k, allowed)
+        if hits:
+            print(f"📄 TF-IDF encontró {len(hits)} documentos")
+            return hits
+        print("⚠️ TF-IDF sin resultados; probando keywords...")
+    
+    # PASO 3: Búsqueda semántica con embeddings (índice denso)
+    if ix.dense_index is not None:
+        print("🔄 Usando búsqueda semántica...")
+        hits = rank_with_embeddings(normalized_query, top_k, allowed)
+        if hits:
+            print(f"📄 Búsqueda semántica encontró {len(hits)} documentos")
+            return hits
+        print("⚠️ Búsqueda semántica sin resultados...")
+    
+    # PASO 3b: Sin embeddings de Gemini, búsqueda semántica local (LSA)
+    if ix.lsa_index:
+        print("🔄 Usando búsqueda semántica local (LSA)...")
+        hits = rank_with_lsa(normalized_query, top_k, allowed=allowed)
+        if hits:
+            print(f"📄 LSA encontró {len(hits)} documentos")
+            return hits
+        print("⚠️ LSA sin resultados; probando keywords...")
+    
+    # PASO 4: Fallback a búsqueda por keywords
+    return rank_by_keywords(normalized_query, top_k, allowed)
+
+# Límites de /api/search/batch (como page_size en /api/search)
+BATCH_MAX_QUERIES = int(os.getenv('BATCH_MAX_QUERIES', '100'))
+BATCH_MAX_TOP_K = int(os.getenv('BATCH_MAX_TOP_K', '50'))
+
+def search_documents_batch(queries, top_k=15):
+    """
+    Búsqueda léxica para muchas consultas a la vez (evaluación, calentamiento de cache),
+    con el mismo backend que search_documents (SEARCH_BACKEND).
+    Con TF-IDF vectoriza todas las consultas normalizadas en un solo transform y las puntúa
+    con un único producto disperso matriz-matriz contra el índice; BM25F no tiene forma
+    matricial y puntúa consulta por consulta.
+    Retorna (una lista de documentos por consulta en el mismo orden, backend que puntuó).
+    """
+    with pinned_generation():
+        ix = active_indexes()
+        backend = lexical_backend(ix)
+        if not queries:
+            return [], backend
+        normalized_queries = [normalize_query(q) for q in queries]
+        if backend == 'bm25':
+            return [materialize_results(rank_with_tfidf(q, top_k)) for q in normalized_queries], backend
+        if not ix.tfidf_index:
+            return [[] for _ in queries], backend
+
+        query_matrix = ix.tfidf_index.transform(normalized_queries)
+        return [
+            materialize_results((idx, score, 'tfidf') for idx, score in zip(top_indices.tolist(), top_scores.tolist()))
+            for top_indices, top_scores in ix.tfidf_scorer.top_k_batch(query_matrix, top_k, min_score=0.01)
+        ], backend
+
 # ============================================================================
 # NORMALIZACIÓN DE QUERIES
 # ============================================================================
@@ -410,36 +1077,24 @@ def is_query_too_generic(query, min_word_length=15):
     
     return False
 
-def extract_categories_from_results(results):
-    """Analiza títulos de resultados para extraer categorías/temas comunes"""
-    if not results:
+# Año ya presente en la consulta (entonces no se sugiere agregar uno)
+QUERY_YEAR_RE = re.compile(r'\b(19\d{2}|20\d{2})\b')
+
+def extract_categories_from_results(doc_ids, indexes=None):
+    """Temas comunes en los títulos de los resultados (ids precalculados al cargar, sin regex)"""
+    features = (indexes or active_indexes()).title_features
+    if features is None or not doc_ids:
         return []
-    
-    import re
-    from collections import Counter
-    
-    # Extraer palabras clave significativas de los títulos
-    keywords = []
-    for doc in results:
-        title = doc.get('title', '')
-        # Extraer años
-        years = re.findall(r'\b(19\d{2}|20\d{2})\b', title)
-        keywords.extend(years)
-        
-        # Extraer palabras significativas (>3 caracteres, no stopwords)
-        stopwords = {'de', 'la', 'el', 'los', 'las', 'del', 'para', 'por', 'con', 'en', 'a', 'y', 'o', 'un', 'una'}
-        words = re.findall(r'\b[a-záéíóúñ]{4,}\b', title.lower())
-        keywords.extend([w for w in words if w not in stopwords])
-    
-    # Contar frecuencias
-    counter = Counter(keywords)
-    # Retornar las 5 más comunes (excluyendo la consulta original)
-    return [word for word, count in counter.most_common(8) if count > 1]
-
-def generate_search_suggestions(query, results):
-    """Genera sugerencias de refinamiento basadas en consulta y resultados"""
+    # Las 8 más comunes que se repiten en más de un título
+    return features.common_terms(doc_ids)
+
+def generate_search_suggestions(query, doc_ids, indexes=None):
+    """Genera sugerencias de refinamiento basadas en consulta y resultados
+    doc_ids: ids de los resultados; indexes: generación con que se rankearon (por defecto la activa)
+    """
+    indexes = indexes or active_indexes()
     suggestions = []
-    categories = extract_categories_from_results(results)
+    categories = extract_categories_from_results(doc_ids, indexes)
     
     query_lower = query.lower()
     
@@ -455,18 +1110,13 @@ def generate_search_suggestions(query, results):
             })
     
     # Detectar si hay años en los resultados
-    import re
-    years_in_results = set()
-    for doc in results:
-        years = re.findall(r'\b(19\d{2}|20\d{2})\b', doc.get('title', ''))
-        years_in_results.update(years)
-    
-    if years_in_results and not re.search(r'\b(19\d{2}|20\d{2})\b', query):
-        sorted_years = sorted(years_in_results)[:5]
+    years_in_results = indexes.title_features.years(doc_ids) if indexes.title_features is not None else []
+    
+    if years_in_results and not QUERY_YEAR_RE.search(query):
         suggestions.append({
             'type': 'add_year',
             'message': '📅 **Prueba especificar un año:**',
-            'options': sorted_years
+            'options': years_in_results[:5]
         })
     
     # Sugerencias de especificidad
@@ -484,134 +1134,49 @@ def generate_search_suggestions(query, results):
     
     return suggestions
 
-def normalize_query(query):
-    """Normaliza y expande consultas para mejor búsqueda"""
-    import unicodedata
-    
+def normalize_query(query, expand=True):
+    """Normaliza y expande consultas para mejor búsqueda (mismo analizador que el índice)
+    expand: corregir tipeos y aplicar el mapeo de abreviaturas (False para frases exactas)
+    """
     if not isinstance(query, str):
         return ""
-        
-    normalized = query.lower().strip()
-    
-    # Remover acentos
-    normalized = ''.join(
-        c for c in unicodedata.normalize('NFD', normalized)
-        if unicodedata.category(c) != 'Mn'
-    )
-    
-    # Stemming básico para plurales (igual que en create_search_index.py)
-    words = normalized.split()
-    stemmed_words = []
-    for word in words:
-        # Si termina en 'es' (árboles -> árbol, canciones -> cancion)
-        if word.endswith('es') and len(word) > 4:
-            word = word[:-2]
-        # Si termina en 's' (casas -> casa)
-        elif word.endswith('s') and len(word) > 3 and not word.endswith('ss'):
-            word = word[:-1]
-        stemmed_words.append(word)
-    
-    normalized = ' '.join(stemmed_words)
-    
-    # Mapeo de términos y abreviaturas comunes
-    term_mapping = {
-        'dicta': 'dictadura militar',
-        'ddhh': 'derechos humanos',
-        'dd.hh': 'derechos humanos',
-        'dd hh': 'derechos humanos',
-        'mir': 'movimiento izquierda revolucionaria',
-        'pc': 'partido comunista',
-        'ps': 'partido socialista',
-        'pdc': 'partido democrata cristiano',
-        'golpe': 'golpe estado 1973',
-        'pinochet': 'dictadura militar pinochet',
-        'allende': 'salvador allende',
-        'aylwin': 'patricio aylwin',
-        '73': '1973',
-        '74': '1974',
-        '75': '1975',
-        '76': '1976',
-        '80': '1980',
-        '90': '1990',
-        'fotos': 'fotografias',
-        'imagenes': 'fotografias',
-        'pics': 'fotografias',
-    }
     
-    # Aplicar mapeo
-    for abbrev, full_term in term_mapping.items():
-        if abbrev in normalized:
-            normalized = normalized.replace(abbrev, full_term)
-    
-    return normalized
+    # Minúsculas, sin acentos, stemming de plurales (memoizado por consulta)
+    normalized = analyze_query(query)
+    if not expand:
+        return normalized
+    
+    # Tipeos ("dictadra", "allendee"): términos fuera del vocabulario -> el más cercano;
+    # las abreviaturas ("ddhh", "dicta") se respetan para que las expanda el paso siguiente
+    normalized = correct_spelling(normalized)
+    
+    # Abreviaturas ("ddhh", "mir"): una pasada, sólo palabras completas
+    return expand_terms(normalized)
+
+def analyze_terms(text):
+    """Términos normalizados (sin expandir) en orden, como los del índice posicional"""
+    return normalize_query(text, expand=False).split()
+
+def correct_spelling(normalized_query):
+    """Reemplaza términos fuera del vocabulario por el más cercano (trigramas + Levenshtein acotado)"""
+    spelling = active_indexes().spelling
+    if spelling is None:
+        return normalized_query
+    corrected, corrections = spelling.correct(normalized_query, keep=EXPANSION_TERMS)
+    if corrections:
+        print(f"✏️ Tipeos corregidos: {corrections}")
+    return corrected
+
+def rank_by_keywords(query, top_k=6, allowed=None):
+    """Búsqueda fallback por palabras clave cuando GENAI no está disponible"""
+    # Score: número de palabras en común + bonus por substring exacto (postings del índice de títulos)
+    hits = [(idx, score, 'keywords') for idx, score in active_indexes().title_index.search_keywords(query, top_k, allowed)]
+    print(f"📄 Encontrados {len(hits)} documentos por keywords")
+    return hits
 
 def search_by_keywords(query, top_k=6):
-    """Búsqueda fallback por palabras clave cuando GENAI no está disponible"""
-    query_lower = query.lower()
-    query_words = set(query_lower.split())
-    
-    scored_docs = []
-    for idx, doc in enumerate(documents):
-        title_lower = doc['title'].lower()
-        # Calcular score basado en coincidencias de palabras
-        title_words = set(title_lower.split())
-        common_words = query_words.intersection(title_words)
-        
-        # Score: número de palabras en común + bonus por coincidencia exacta
-        score = len(common_words)
-        if query_lower in title_lower:
-            score += 10  # Bonus por substring exacto
-        
-        if score > 0:
-            doc_copy = doc.copy()
-            doc_copy['relevance_score'] = float(score)
-            scored_docs.append((score, idx, doc_copy))
-    
-    # Ordenar por score descendente
-    scored_docs.sort(key=lambda x: x[0], reverse=True)
-    
-    # Retornar top_k
-    results = [doc for _, _, doc in scored_docs[:top_k]]
-    print(f"📄 Encontrados {len(results)} documentos por keywords")
-    return results
-    
-    # Remover acentos
-    normalized = ''.join(
-        c for c in unicodedata.normalize('NFD', normalized)
-        if unicodedata.category(c) != 'Mn'
-    )
-    
-    # Mapeo de términos y abreviaturas comunes
-    term_mapping = {
-        'dicta': 'dictadura militar',
-        'ddhh': 'derechos humanos',
-        'dd.hh': 'derechos humanos',
-        'dd hh': 'derechos humanos',
-        'mir': 'movimiento izquierda revolucionaria',
-        'pc': 'partido comunista',
-        'ps': 'partido socialista',
-        'pdc': 'partido democrata cristiano',
-        'golpe': 'golpe estado 1973',
-        'pinochet': 'dictadura militar pinochet',
-        'allende': 'salvador allende',
-        'aylwin': 'patricio aylwin',
-        '73': '1973',
-        '74': '1974',
-        '75': '1975',
-        '76': '1976',
-        '80': '1980',
-        '90': '1990',
-        'fotos': 'fotografias',
-        'imagenes': 'fotografias',
-        'pics': 'fotografias',
-    }
-    
-    # Aplicar mapeo
-    for abbrev, full_term in term_mapping.items():
-        if abbrev in normalized:
-            normalized = normalized.replace(abbrev, full_term)
-    
-    return normalized
+    """Búsqueda por palabras clave (documentos materializados)"""
+    return materialize_results(rank_by_keywords(query, top_k))
 
 # ============================================================================
 # DETECCIÓN DE TIPO DE CONVERSACIÓN
@@ -989,7 +1554,10 @@ def handle_follow_up_message(query: str, session: ConversationSession) -> tuple:
     if entities['topics']:
         query_parts.extend(entities['topics'])
     if entities['years']:
-        query_parts.append(f"{min(entities['years'])}")
+        # Siempre como rango ("1980-1985", "1985-1985"): la búsqueda lo aplica como filtro
+        # exacto por fecha, mientras que un año suelto sería sólo un término más
+        years = entities['years']
+        query_parts.append(f"{min(years)}-{max(years)}")
     if entities['doc_types']:
         query_parts.extend(entities['doc_types'])
     
@@ -1039,10 +1607,50 @@ def compare_and_format_results(new_docs: List[Dict], session: ConversationSessio
     
     return response
 
+# ============================================================================
+# REGISTRO DE ÍNDICES: CARGA INICIAL Y RECARGA EN CALIENTE
+# ============================================================================
+
+# Consultas con que se calienta una generación nueva antes de publicarla
+WARMUP_QUERIES = ['dictadura militar', 'derechos humanos', 'aylwin']
+
+def load_generation():
+    """Loader del registro: sólo la primera carga puede generar embeddings con la API"""
+    return load_search_indexes(create_embeddings=index_registry.generation == 0)
+
+def warm_search_indexes(indexes):
+    """Ejecuta búsquedas locales sobre la generación nueva (páginas mmap y caches calientes)"""
+    token = _pinned_generation.set(IndexGeneration(0, 'warmup', 0.0, indexes))
+    try:
+        for query in WARMUP_QUERIES:
+            rank_exact_title(query, 5)
+            rank_with_tfidf(query, 5)
+            rank_with_lsa(query, 5)
+            rank_by_keywords(query, 5)
+    finally:
+        _pinned_generation.reset(token)
+
+index_registry = IndexRegistry(load_generation, compute_index_version, warmup=warm_search_indexes)
+index_registry.reload(force=True)
+
+# Vigilar los artefactos (segundos entre revisiones; 0 desactiva)
+index_registry.start_watcher(float(os.getenv('INDEX_WATCH_INTERVAL', '30')))
+
 # ============================================================================
 # RUTAS DE LA API
 # ============================================================================
 
+@app.before_request
+def pin_index_generation():
+    """Cada solicitud usa de principio a fin la generación activa al llegar"""
+    g.index_generation_token = _pinned_generation.set(index_registry.current)
+
+@app.teardown_request
+def release_index_generation(exc=None):
+    token = g.pop('index_generation_token', None)
+    if token is not None:
+        _pinned_generation.reset(token)
+
 
 @app.route('/api/chat', methods=['POST', 'OPTIONS'])
 def chat():
@@ -1069,9 +1677,18 @@ def chat():
 
         # Obtener query de JSON o form
         data = request.get_json(silent=True)
+        filters = years = cursor = fields = None
         if data and isinstance(data, dict):
             query = data.get('query', '')
             session_id = data.get('session_id', 'default')
+            # Cursor de una respuesta anterior ("más resultados"): no se vuelve a buscar
+            cursor = data.get('cursor')
+            # Filtros opcionales: {"materias": ["Derechos Humanos"], "lugares": "Santiago"}
+            filters = data.get('filters')
+            # Rango de años opcional: "1980-1985", 1985 o [1980, 1985]
+            years = data.get('years')
+            # Pesos por campo opcionales: ["creator"] (sólo autores) o {"coverage": 3}
+            fields = data.get('fields')
             print(f"✅ Query from JSON: '{query}'")
         else:
             query = request.form.get('query', '')
@@ -1083,6 +1700,9 @@ def chat():
         print(f"🆔 Session ID: {session_id}")
         event_bus.publish('chat.received', {'query': query})
 
+        if cursor:
+            return chat_next_page(cursor, session_id)
+
         if not query:
             print("❌ Query vacía")
             return jsonify({
@@ -1091,6 +1711,17 @@ def chat():
                 'details': 'La consulta no puede estar vacía.'
             }), 400
 
+        try:
+            filters = normalize_filters(filters)
+            years = parse_year_range(years)
+            fields = normalize_field_weights(fields, FIELD_WEIGHTS)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': 'Filtros inválidos',
+                'details': str(e)
+            }), 400
+
         # Obtener o crear sesión del usuario
         session = get_or_create_session(session_id)
         print(f"📋 Session creada/recuperada. Historial: {len(session.search_history)} búsquedas")
@@ -1115,7 +1746,7 @@ def chat():
                     'success': True,
                     'response': response_html,
                     'documents': [],
-                    'embeddings_ready': embeddings_ready,
+                    'embeddings_ready': bool(active_indexes().document_embeddings),
                     'conversation_type': conversation_type,
                     'session_id': session_id
                 })
@@ -1139,7 +1770,7 @@ def chat():
                     'success': True,
                     'response': response_html,
                     'documents': [],
-                    'embeddings_ready': embeddings_ready,
+                    'embeddings_ready': bool(active_indexes().document_embeddings),
                     'conversation_type': 'follow_up_branch',
                     'session_id': session_id
                 })
@@ -1150,7 +1781,7 @@ def chat():
                     'success': True,
                     'response': markdown.markdown("✅ ¿En qué más te puedo ayudar?"),
                     'documents': [],
-                    'embeddings_ready': embeddings_ready,
+                    'embeddings_ready': bool(active_indexes().document_embeddings),
                     'conversation_type': 'follow_up_satisfied',
                     'session_id': session_id
                 })
@@ -1162,8 +1793,19 @@ def chat():
         # ============ FLUJO NORMAL (primera búsqueda o búsqueda refinada) ============
         # PASO 3: SI ES 'search', BUSCAR DOCUMENTOS (6 documentos) Y SUGERENCIAS
         print(f"🔍 Realizando búsqueda de documentos...")
-        relevant_docs, suggestions = search_documents(query, top_k=6, include_suggestions=True)
-        print(f"📄 Encontrados {len(relevant_docs)} documentos")
+        # Rangos explícitos en la consulta ("1980-1985", "entre 1973 y 1990", "años 80"): filtro
+        # exacto por fecha; un número suelto ("decreto 1800") sigue siendo un término de búsqueda
+        search_query = query
+        if not years:
+            text_query, years = extract_year_range(query)
+            if years:
+                search_query = text_query or query
+                print(f"📅 Rango de años {years[0]}-{years[1]}; texto: '{search_query}'")
+        relevant_docs, suggestions, next_cursor, total, facets = search_page(search_query, page_size=6,
+                                                                             include_suggestions=True,
+                                                                             filters=filters, years=years,
+                                                                             fields=fields)
+        print(f"📄 Encontrados {len(relevant_docs)} documentos (de {total} rankeados)")
         if suggestions:
             print(f"💡 Generadas {len(suggestions)} sugerencias")
         
@@ -1183,7 +1825,10 @@ def chat():
             'success': True,
             'response': response_html,
             'documents': relevant_docs,
-            'embeddings_ready': embeddings_ready,
+            'next_cursor': next_cursor,
+            'total_results': total,
+            'facets': facets,
+            'embeddings_ready': bool(active_indexes().document_embeddings),
             'conversation_type': conversation_type,
             'session_id': session_id
         })
@@ -1200,16 +1845,78 @@ def chat():
             'details': str(e)
         }), 500
 
+def chat_next_page(cursor, session_id):
+    """Siguiente página de una búsqueda del chat: rebana la lista rankeada, sin IA ni nuevo puntaje"""
+    try:
+        docs, _, next_cursor, total, facets = search_page(page_size=6, cursor=cursor)
+    except CursorError as e:
+        return jsonify({
+            'success': False,
+            'error': 'Cursor inválido',
+            'details': str(e)
+        }), 400
+
+    response_text = f"📚 **Más documentos relacionados** ({total} en total):\n\n"
+    for i, doc in enumerate(docs, 1):
+        response_text += f"{i}. **{doc['title']}**\n"
+        response_text += f"   🔗 [Ver documento]({doc['href']})\n\n"
+    if not docs:
+        response_text = "No hay más documentos para esta búsqueda."
+    event_bus.publish('response.generated', {'chars': len(response_text), 'docs': len(docs)})
+
+    return jsonify({
+        'success': True,
+        'response': markdown.markdown(response_text),
+        'documents': docs,
+        'next_cursor': next_cursor,
+        'total_results': total,
+        'facets': facets,
+        'embeddings_ready': bool(active_indexes().document_embeddings),
+        'conversation_type': 'more_results',
+        'session_id': session_id
+    })
+
 @app.route('/api/health', methods=['GET'])
 def health():
     """Endpoint de health check"""
+    generation = active_generation()
+    ix = generation.indexes
     return jsonify({
         'status': 'ok',
-        'documents_loaded': len(documents),
-        'embeddings_loaded': len(document_embeddings),
+        'documents_loaded': len(ix.documents),
+        'embeddings_loaded': len(ix.document_embeddings or {}),
+        'lsa_available': ix.lsa_index is not None,
+        'search_backend': 'bm25' if ix.bm25_index is not None else 'tfidf',
+        'segments': ix.segments.stats() if ix.segments else None,
+        'index_version': generation.version,
+        'index_generation': generation.number,
+        'index_registry': index_registry.status(),
+        'ranked_lists': ranked_lists.stats(),
         'genai_available': GENAI_AVAILABLE
     })
 
+@app.route('/api/admin/reload-indexes', methods=['POST'])
+def reload_indexes():
+    """
+    Recarga los índices en segundo plano (sin reiniciar el proceso).
+    Requiere el header X-Admin-Token igual a ADMIN_TOKEN; sin ADMIN_TOKEN el endpoint está desactivado.
+    Body opcional: { force: bool, wait: bool }
+    """
+    admin_token = os.getenv('ADMIN_TOKEN')
+    # Comparación en tiempo constante (no filtra por timing cuántos caracteres coinciden)
+    sent_token = request.headers.get('X-Admin-Token', '')
+    if not admin_token or not hmac.compare_digest(sent_token.encode('utf-8'), admin_token.encode('utf-8')):
+        return jsonify({'success': False, 'error': 'No autorizado'}), 403
+    
+    data = request.get_json(silent=True) or {}
+    force = bool(data.get('force', True))
+    if data.get('wait'):
+        swapped = index_registry.reload(force=force)
+        return jsonify({'success': True, 'swapped': swapped, 'index_registry': index_registry.status()})
+    
+    started = index_registry.reload_async(force=force)
+    return jsonify({'success': True, 'started': started, 'index_registry': index_registry.status()}), 202
+
 @app.route('/api/categories', methods=['GET'])
 def get_categories():
     """
@@ -1217,13 +1924,23 @@ def get_categories():
     Incluye: materias (dc:subject), autores (dc:creator), lugares (dc:coverage)
     """
     try:
-        # Cargar categorías desde archivo
-        categories_file = os.path.join(os.path.dirname(__file__), 'categories.json')
+        # Categorías de la generación activa (categories.json se recarga con los índices)
+        ix = active_indexes()
+        documents = ix.documents
         
-        if os.path.exists(categories_file):
-            with open(categories_file, 'r', encoding='utf-8') as f:
-                all_categories = json.load(f)
-            
+        if ix.categories is not None:
+            all_categories = ix.categories
+        elif len(documents):
+            # Sin categories.json: conteos directos desde el almacén de documentos
+            all_categories = {
+                'materias': documents.value_counts('dc:subject'),
+                'autores': documents.value_counts('dc:creator'),
+                'lugares': documents.value_counts('dc:coverage')
+            }
+        else:
+            all_categories = None
+        
+        if all_categories is not None:
             # Limitar a top 100 por categoría para UI
             result = {
                 'materias': all_categories.get('materias', [])[:100],
@@ -1253,16 +1970,60 @@ def get_categories():
             'error': str(e)
         }), 500
 
+@app.route('/api/suggest', methods=['GET'])
+def suggest():
+    """
+    Autocompletado para el frontend (una llamada por tecla)
+    Query string: prefix=alle&limit=8&types=materias,autores,lugares,titulos
+    """
+    prefix = request.args.get('prefix', '')
+    try:
+        limit = int(request.args.get('limit', 8))
+    except ValueError:
+        limit = 0
+    if not 0 < limit <= 20:
+        return jsonify({
+            'success': False,
+            'error': 'limit debe ser un entero entre 1 y 20'
+        }), 400
+    types = [t for t in request.args.get('types', '').split(',') if t] or None
+
+    autocomplete = active_indexes().autocomplete
+    return jsonify({
+        'success': True,
+        'prefix': prefix,
+        'suggestions': autocomplete.suggest(prefix, limit, types) if autocomplete else []
+    })
+
 @app.route('/api/search-by-category', methods=['POST'])
 def search_by_category():
     """
     Busca documentos filtrando por categoría específica
-    Body: { category_type: 'materias'|'autores'|'lugares', category_name: 'Derechos Humanos' }
+    Body: { category_type: 'materias'|'autores'|'lugares', category_name: 'Derechos Humanos',
+            query: 'dictadura' (opcional), filters: {'lugares': 'Santiago'} (opcional, más facetas),
+            years: '1980-1985' (opcional, con query) }
+    Con query, los resultados se ordenan por relevancia dentro de la categoría.
     """
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            data = {}
         category_type = data.get('category_type', '')
         category_name = data.get('category_name', '')
+        query = data.get('query') or ''
+        
+        if not isinstance(query, str):
+            return jsonify({
+                'success': False,
+                'error': 'query debe ser un texto'
+            }), 400
+        query = query.strip()
+        
+        if not isinstance(category_type, str) or not isinstance(category_name, str):
+            return jsonify({
+                'success': False,
+                'error': 'category_type y category_name deben ser textos'
+            }), 400
         
         if not category_type or not category_name:
             return jsonify({
@@ -1284,36 +2045,49 @@ def search_by_category():
                 'error': 'Tipo de categoría inválido'
             }), 400
         
-        # Cargar documentos con metadatos
-        metadata_file = os.path.join(os.path.dirname(__file__), 'clean_with_metadata.json')
-        
-        if os.path.exists(metadata_file):
-            with open(metadata_file, 'r', encoding='utf-8', errors='ignore') as f:
-                docs_with_metadata = json.load(f)
-        else:
-            # Fallback a documentos normales
-            docs_with_metadata = documents
+        if query:
+            try:
+                filters = data.get('filters') or {}
+                if not isinstance(filters, dict):
+                    # Mismo mensaje que normalize_filters en /api/search
+                    raise ValueError("filters debe ser un objeto {faceta: valores}")
+                filters = normalize_filters({**filters, category_type: [category_name]})
+                years = parse_year_range(data.get('years'))
+            except (TypeError, ValueError) as e:
+                return jsonify({
+                    'success': False,
+                    'error': f'Filtros inválidos: {e}'
+                }), 400
+            docs, _ = search_documents(query, top_k=15, include_suggestions=False, filters=filters, years=years)
+            results = [{
+                'title': doc.get('title', doc.get('dc:title', 'Sin título')),
+                'href': doc.get('href', ''),
+                'subject': doc.get('dc:subject', [])[:3],
+                'creator': doc.get('dc:creator', [])[:2],
+                'coverage': doc.get('dc:coverage', []),
+                'relevance_score': doc.get('relevance_score')
+            } for doc in docs]
+            return jsonify({
+                'success': True,
+                'category_type': category_type,
+                'category_name': category_name,
+                'query': query,
+                'results': results,
+                'count': len(results)
+            })
         
-        # Filtrar documentos que contengan la categoría
+        # Filtrar documentos que contengan la categoría (los primeros 15 en orden del archivo)
+        documents = active_indexes().documents
         results = []
-        category_lower = category_name.lower()
-        
-        for doc in docs_with_metadata:
-            field_values = doc.get(field, [])
-            if isinstance(field_values, list):
-                for val in field_values:
-                    if category_lower in val.lower():
-                        results.append({
-                            'title': doc.get('title', doc.get('dc:title', 'Sin título')),
-                            'href': doc.get('href', ''),
-                            'subject': doc.get('dc:subject', [])[:3],
-                            'creator': doc.get('dc:creator', [])[:2],
-                            'coverage': doc.get('dc:coverage', [])
-                        })
-                        break
-            
-            if len(results) >= 15:
-                break
+        for idx in documents.match_values(field, category_name, limit=15).tolist():
+            doc = documents[idx]
+            results.append({
+                'title': doc.get('title', doc.get('dc:title', 'Sin título')),
+                'href': doc.get('href', ''),
+                'subject': documents.values('dc:subject', idx)[:3],
+                'creator': documents.values('dc:creator', idx)[:2],
+                'coverage': documents.values('dc:coverage', idx)
+            })
         
         return jsonify({
             'success': True,
@@ -1331,6 +2105,128 @@ def search_by_category():
             'error': str(e)
         }), 500
 
+@app.route('/api/search', methods=['GET', 'POST'])
+def search():
+    """
+    Búsqueda paginada por cursor
+    Body (o query string): { query: 'dictadura', page_size: 10, filters: {...}, years: '1980-1985',
+                             fields: ['creator'] | {'coverage': 3} }
+    Página siguiente: { cursor: '<next_cursor de la respuesta anterior>', page_size: 10 }
+    """
+    try:
+        data = request.get_json(silent=True) if request.method == 'POST' else None
+        if not isinstance(data, dict):
+            data = request.args.to_dict()
+        query = (data.get('query') or '').strip()
+        cursor = data.get('cursor') or None
+        mode = data.get('mode') or None
+        try:
+            page_size = int(data.get('page_size', 10))
+        except (TypeError, ValueError):
+            page_size = 0
+
+        if not 0 < page_size <= 50:
+            return jsonify({
+                'success': False,
+                'error': 'page_size debe ser un entero entre 1 y 50'
+            }), 400
+
+        if not query and not cursor:
+            return jsonify({
+                'success': False,
+                'error': 'Se requiere query o cursor'
+            }), 400
+
+        if mode not in (None, 'cascade', 'hybrid'):
+            return jsonify({
+                'success': False,
+                'error': "mode debe ser 'cascade' o 'hybrid'"
+            }), 400
+
+        try:
+            filters = normalize_filters(data.get('filters'))
+            years = parse_year_range(data.get('years'))
+            fields = normalize_field_weights(data.get('fields'), FIELD_WEIGHTS)
+            docs, _, next_cursor, total, facets = search_page(query, page_size=page_size, cursor=cursor,
+                                                              mode=mode, filters=filters, years=years,
+                                                              fields=fields)
+        except ValueError as e:
+            # Incluye CursorError (cursor mal formado o expirado)
+            return jsonify({
+                'success': False,
+                'error': 'Parámetros inválidos',
+                'details': str(e)
+            }), 400
+
+        return jsonify({
+            'success': True,
+            'query': query,
+            'documents': docs,
+            'count': len(docs),
+            'total': total,
+            'next_cursor': next_cursor,
+            'facets': facets
+        })
+
+    except Exception as e:
+        print(f"Error en búsqueda paginada: {e}")
+        traceback.print_exc()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/search/batch', methods=['POST'])
+def search_batch():
+    """
+    Búsqueda léxica (TF-IDF o BM25F, según SEARCH_BACKEND) de varias consultas en una sola llamada
+    Body: { queries: ['dictadura', 'fotos Aylwin', ...], top_k: 15 }
+    Hasta BATCH_MAX_QUERIES consultas y top_k entre 1 y BATCH_MAX_TOP_K; la respuesta
+    indica en backend qué índice puntuó el lote
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        queries = data.get('queries', [])
+        top_k = data.get('top_k', 15)
+
+        if not isinstance(queries, list) or not all(isinstance(q, str) for q in queries):
+            return jsonify({
+                'success': False,
+                'error': 'Se requiere queries como lista de textos'
+            }), 400
+
+        if len(queries) > BATCH_MAX_QUERIES:
+            return jsonify({
+                'success': False,
+                'error': f'Máximo {BATCH_MAX_QUERIES} consultas por lote'
+            }), 400
+
+        if isinstance(top_k, bool) or not isinstance(top_k, int) or not 0 < top_k <= BATCH_MAX_TOP_K:
+            return jsonify({
+                'success': False,
+                'error': f'top_k debe ser un entero entre 1 y {BATCH_MAX_TOP_K}'
+            }), 400
+
+        batch_results, backend = search_documents_batch(queries, top_k=top_k)
+
+        return jsonify({
+            'success': True,
+            'results': [
+                {'query': q, 'documents': docs, 'count': len(docs)}
+                for q, docs in zip(queries, batch_results)
+            ],
+            'count': len(queries),
+            'backend': backend
+        })
+
+    except Exception as e:
+        print(f"Error en búsqueda por lotes: {e}")
+        traceback.print_exc()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @app.route('/', methods=['GET'])
 def index():
     """Ruta raíz"""
@@ -1341,7 +2237,10 @@ def index():
             'chat': '/api/chat (POST)',
             'health': '/api/health (GET)',
             'categories': '/api/categories (GET)',
-            'search_by_category': '/api/search-by-category (POST)'
+            'search_by_category': '/api/search-by-category (POST)',
+            'search': '/api/search (GET/POST)',
+            'suggest': '/api/suggest?prefix= (GET)',
+            'search_batch': '/api/search/batch (POST)'
         }
     })
 
@@ -1353,8 +2252,8 @@ if __name__ == '__main__':
     print("\n" + "="*70)
     print("🚀 INICIANDO CHATBOT DEL ARCHIVO PATRIMONIAL UAH")
     print("="*70)
-    print(f"📊 Documentos cargados: {len(documents)}")
-    print(f"🧠 Embeddings disponibles: {len(document_embeddings)}")
+    print(f"📊 Documentos cargados: {len(active_indexes().documents)}")
+    print(f"🧠 Embeddings disponibles: {len(active_indexes().document_embeddings or {})}")
     print(f"🤖 Gemini API: {'✅ Disponible' if GENAI_AVAILABLE else '❌ No disponible'}")
     print(f"🌐 Servidor Flask: http://localhost:5000")
     print(f"🔗 Frontend esperado: http://localhost:8080 (vía Nginx)")
@@ -3,105 +3,91 @@ Script MEJORADO para crear índice de búsqueda TF-IDF local
 Incluye: título, href, dc:subject, dc:creator, dc:coverage
 """
 import json
-import pickle
+import os
+import time
 from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.decomposition import TruncatedSVD
 import numpy as np
 
+from services.analyzer import normalize_text
+from services.bm25 import BM25FIndex, tokenize
+from services.document_store import DocumentStore
+from services.field_index import FieldIndex
+from services.spelling import SpellingIndex
+from services.tfidf_index import TfidfIndex
+
+# Dimensiones del espacio latente (LSA) para búsqueda semántica sin API
+LSA_COMPONENTS = 200
+
+# Sello del build: se escribe al final, cuando todos los artefactos ya están en disco;
+# la API sólo recarga cuando cambia (no a mitad de una reconstrucción)
+BUILD_STAMP = 'build_stamp.json'
+
 def load_documents():
     with open('clean_with_metadata.json', 'r', encoding='utf-8', errors='ignore') as f:
         docs = json.load(f)
     print(f"📂 {len(docs)} documentos cargados desde clean_with_metadata.json")
     return docs
 
-import unicodedata
-
-def normalize_text(text):
-    """
-    Normalización robusta para búsqueda:
-    1. Minúsculas
-    2. Eliminar acentos
-    3. Manejo simple de plurales (stemming básico)
-    """
-    if not isinstance(text, str):
-        text = str(text)
-    
-    # Minúsculas y eliminación de acentos
-    text = text.lower()
-    text = ''.join(c for c in unicodedata.normalize('NFD', text) if unicodedata.category(c) != 'Mn')
-    
-    # Stemming básico para plurales (muy simple para español)
-    words = text.split()
-    stemmed_words = []
-    for word in words:
-        # Si termina en 'es' (árboles -> árbol, canciones -> cancion)
-        if word.endswith('es') and len(word) > 4:
-            word = word[:-2]
-        # Si termina en 's' (casas -> casa)
-        elif word.endswith('s') and len(word) > 3 and not word.endswith('ss'):
-            word = word[:-1]
-        stemmed_words.append(word)
-    
-    return ' '.join(stemmed_words)
+def document_text(doc):
+    """Texto normalizado de un documento para el índice TF-IDF (también lo usan los segmentos delta)"""
+    parts = []
+    
+    # TÍTULO (campo principal) - repetido 3 veces para dar más peso
+    title = doc.get('title', '')
+    parts.append(title)
+    parts.append(title)
+    parts.append(title)
+    
+    # HREF (puntos de acceso, contiene palabras clave de la URL)
+    href = doc.get('href', '')
+    # Extraer palabras de la URL (después del dominio)
+    if href:
+        url_parts = href.split('/')[-1].replace('-', ' ').replace('_', ' ')
+        parts.append(url_parts)
+    
+    # DC:SUBJECT (materias)
+    subjects = doc.get('dc:subject', [])
+    if isinstance(subjects, list):
+        parts.extend(subjects[:15])
+    elif subjects:
+        parts.append(str(subjects))
+    
+    # DC:CREATOR (autores)
+    creators = doc.get('dc:creator', [])
+    if isinstance(creators, list):
+        parts.extend(creators[:10])
+    elif creators:
+        parts.append(str(creators))
+    
+    # DC:COVERAGE (lugares)
+    coverages = doc.get('dc:coverage', [])
+    if isinstance(coverages, list):
+        parts.extend(coverages[:5])
+    elif coverages:
+        parts.append(str(coverages))
+    
+    # DC:DATE (fechas)
+    dates = doc.get('dc:date', [])
+    if isinstance(dates, list):
+        parts.extend([str(d) for d in dates[:3]])
+    elif dates:
+        parts.append(str(dates))
+    
+    # Unir todo y NORMALIZAR
+    full_text = ' '.join(str(p) for p in parts if p)
+    # Aquí aplicamos la normalización para que el índice contenga términos normalizados
+    return normalize_text(full_text)
 
 def create_search_index(documents):
     """Crea índice TF-IDF COMPLETO para búsqueda"""
     print("🔄 Creando índice de búsqueda TF-IDF MEJORADO (con stemming)...")
     
-    texts = []
-    for doc in documents:
-        parts = []
-        
-        # TÍTULO (campo principal) - repetido 3 veces para dar más peso
-        title = doc.get('title', '')
-        parts.append(title)
-        parts.append(title)
-        parts.append(title)
-        
-        # HREF (puntos de acceso, contiene palabras clave de la URL)
-        href = doc.get('href', '')
-        # Extraer palabras de la URL (después del dominio)
-        if href:
-            url_parts = href.split('/')[-1].replace('-', ' ').replace('_', ' ')
-            parts.append(url_parts)
-        
-        # DC:SUBJECT (materias)
-        subjects = doc.get('dc:subject', [])
-        if isinstance(subjects, list):
-            parts.extend(subjects[:15])
-        elif subjects:
-            parts.append(str(subjects))
-        
-        # DC:CREATOR (autores)
-        creators = doc.get('dc:creator', [])
-        if isinstance(creators, list):
-            parts.extend(creators[:10])
-        elif creators:
-            parts.append(str(creators))
-        
-        # DC:COVERAGE (lugares)
-        coverages = doc.get('dc:coverage', [])
-        if isinstance(coverages, list):
-            parts.extend(coverages[:5])
-        elif coverages:
-            parts.append(str(coverages))
-        
-        # DC:DATE (fechas)
-        dates = doc.get('dc:date', [])
-        if isinstance(dates, list):
-            parts.extend([str(d) for d in dates[:3]])
-        elif dates:
-            parts.append(str(dates))
-        
-        # Unir todo y NORMALIZAR
-        full_text = ' '.join(str(p) for p in parts if p)
-        # Aquí aplicamos la normalización para que el índice contenga términos normalizados
-        normalized_text = normalize_text(full_text)
-        texts.append(normalized_text)
+    texts = [document_text(doc) for doc in documents]
     
     # Crear vectorizador TF-IDF con configuración optimizada
     vectorizer = TfidfVectorizer(
-        max_features=15000,      # Más vocabulario
-        ngram_range=(1, 3),      # Hasta trigramas para frases como "Consejo de Gabinete"
+        ngram_range=(1, 1),      # Sólo palabras: las frases ("Consejo de Gabinete") usan el índice posicional de la API
         stop_words=None,         # Mantener todas las palabras
         min_df=1,                # Incluir términos raros
         max_df=0.90,             # Excluir términos muy comunes
@@ -114,25 +100,153 @@ def create_search_index(documents):
     
     return {
         'vectorizer': vectorizer,
-        'matrix': tfidf_matrix,
-        'texts': texts
+        'matrix': tfidf_matrix
+    }
+
+def _as_list(value, limit):
+    """Valores de un campo Dublin Core como lista de textos (máximo limit)"""
+    if isinstance(value, list):
+        return [str(v) for v in value[:limit]]
+    return [str(value)] if value else []
+
+def document_fields(doc):
+    """Textos normalizados por campo para el índice BM25F (sin repetir el título)"""
+    return {
+        'title': normalize_text(doc.get('title', '')),
+        'subject': normalize_text(' '.join(_as_list(doc.get('dc:subject', []), 15))),
+        'creator': normalize_text(' '.join(_as_list(doc.get('dc:creator', []), 10))),
+        'coverage': normalize_text(' '.join(_as_list(doc.get('dc:coverage', []), 5))),
+        'date': normalize_text(' '.join(_as_list(doc.get('dc:date', []), 3))),
+    }
+
+def field_texts(doc):
+    """Textos normalizados por campo para los sub-índices TF-IDF (document_fields + slug del href)"""
+    href = doc.get('href', '')
+    slug = href.split('/')[-1].replace('-', ' ').replace('_', ' ') if href else ''
+    return {**document_fields(doc), 'slug': normalize_text(slug)}
+
+def create_field_index(index_data, documents, build_id):
+    """Una matriz por campo con el vocabulario e idf del TF-IDF principal (pesos por campo al consultar)"""
+    print("🔄 Creando sub-índices TF-IDF por campo...")
+    vectorizer = index_data['vectorizer']
+    texts = [field_texts(doc) for doc in documents]
+    fields = FieldIndex.from_matrices({field: vectorizer.transform([t[field] for t in texts])
+                                       for field in texts[0]} if texts else {}, build_id)
+    print(f"✅ Sub-índices por campo: {', '.join(f'{f} ({m.nnz})' for f, m in fields.postings.items())}")
+    return fields
+
+def create_bm25_index(documents):
+    """Crea índice BM25F (backend alternativo al TF-IDF) con largos por campo"""
+    print("🔄 Creando índice BM25F por campos...")
+    
+    field_tokens = []
+    for doc in documents:
+        fields = document_fields(doc)
+        field_tokens.append({field: tokenize(text) for field, text in fields.items()})
+    
+    bm25 = BM25FIndex.build(field_tokens)
+    print(f"✅ BM25F creado: {len(bm25)} docs x {len(bm25.vocabulary)} términos")
+    return bm25
+
+def create_lsa_index(tfidf_matrix, n_components=LSA_COMPONENTS):
+    """
+    Proyección LSA (TruncatedSVD) de la matriz TF-IDF.
+    Retorna la matriz densa de documentos y la proyección términos -> espacio latente,
+    ambas float32, para proyectar consultas localmente (sin Gemini).
+    """
+    n_components = max(1, min(n_components, min(tfidf_matrix.shape) - 1))
+    print(f"🔄 Calculando proyección LSA ({n_components} dimensiones)...")
+    
+    svd = TruncatedSVD(n_components=n_components, random_state=42)
+    doc_matrix = svd.fit_transform(tfidf_matrix).astype(np.float32)
+    
+    print(f"✅ LSA listo: varianza explicada {svd.explained_variance_ratio_.sum():.1%}")
+    
+    return {
+        'matrix': doc_matrix,
+        'projection': np.ascontiguousarray(svd.components_.T, dtype=np.float32)
     }
 
+def create_spelling_index(index_data, documents):
+    """Índice de trigramas para corregir tipeos: unigramas del vocabulario TF-IDF + palabras de títulos"""
+    vectorizer, matrix = index_data['vectorizer'], index_data['matrix']
+    document_freq = np.diff(matrix.tocsc().indptr)
+    term_counts = {term: int(document_freq[i]) for term, i in vectorizer.vocabulary_.items() if ' ' not in term}
+    
+    # Los títulos aportan también palabras que max_df dejó fuera del vocabulario
+    title_counts = {}
+    for doc in documents:
+        for token in set(tokenize(normalize_text(doc.get('title', '')))):
+            title_counts[token] = title_counts.get(token, 0) + 1
+    for token, count in title_counts.items():
+        term_counts[token] = max(term_counts.get(token, 0), count)
+    
+    spelling = SpellingIndex.build(term_counts)
+    print(f"✅ Índice de tipeos: {len(spelling)} términos")
+    return spelling
+
 def save_index(index_data):
-    with open('search_index.pkl', 'wb') as f:
-        pickle.dump(index_data, f)
-    print("💾 Índice guardado en search_index.pkl")
+    """Índice TF-IDF sin pickle: .npy cargables con mmap + manifest.json (ver services/tfidf_index.py)"""
+    tfidf_index = TfidfIndex.from_vectorizer(index_data['vectorizer'], index_data['matrix'])
+    tfidf_index.save('tfidf_index')
+    print("💾 Índice guardado en tfidf_index/")
+    return tfidf_index.build_id
+
+def save_field_index(fields):
+    fields.save('field_index')
+    print("💾 Sub-índices por campo guardados en field_index/")
+
+def save_bm25_index(bm25):
+    bm25.save('bm25_index.npz')
+    print("💾 Índice BM25F guardado en bm25_index.npz")
+
+def save_corpus(documents):
+    """Corpus binario para abrir con mmap al iniciar la API (ver services/document_store.py)"""
+    DocumentStore(documents).save('corpus.bin')
+    print("💾 Corpus binario guardado en corpus.bin")
+
+def save_spelling_index(spelling):
+    spelling.save('spelling_index.npz')
+    print("💾 Índice de tipeos guardado en spelling_index.npz")
+
+def save_lsa_index(lsa_data):
+    np.savez('lsa_index.npz', matrix=lsa_data['matrix'], projection=lsa_data['projection'])
+    print("💾 Índice LSA guardado en lsa_index.npz")
+
+def write_build_stamp(build_id, n_docs):
+    """Sello del build (build_id del TF-IDF, documentos, hora) vía archivo temporal + rename"""
+    with open(f'{BUILD_STAMP}.tmp', 'w', encoding='utf-8') as f:
+        json.dump({'build_id': build_id, 'documents': n_docs, 'built_at': time.time()}, f)
+    os.replace(f'{BUILD_STAMP}.tmp', BUILD_STAMP)
+    print(f"💾 Sello del build {build_id} guardado en {BUILD_STAMP}")
+
+def build_indexes(documents, stamp=True):
+    """Construye y guarda todos los artefactos de búsqueda (también la compactación de segmentos)
+    stamp: escribir el sello al terminar; False si el llamador aún debe actualizar otros
+    archivos de la misma generación (lo escribe él con write_build_stamp). Retorna el build_id.
+    """
+    save_corpus(documents)
+    index = create_search_index(documents)
+    build_id = save_index(index)
+    save_field_index(create_field_index(index, documents, build_id))
+    save_spelling_index(create_spelling_index(index, documents))
+    save_lsa_index(create_lsa_index(index['matrix']))
+    save_bm25_index(create_bm25_index(documents))
+    if stamp:
+        write_build_stamp(build_id, len(documents))
+    return build_id
 
 if __name__ == "__main__":
     print("=" * 50)
     print("🔍 CREACIÓN DE ÍNDICE TF-IDF MEJORADO")
     print("=" * 50)
     
-    documents = load_documents()
-    index = create_search_index(documents)
-    save_index(index)
+    build_indexes(load_documents())
     
     print("=" * 50)
     print("✅ ÍNDICE LISTO - Incluye título, href, subjects,")
-    print("   creators, coverage y dates")
+    print("   creators, coverage y dates + proyección LSA")
+    print("   + índice BM25F por campos (SEARCH_BACKEND=bm25)")
+    print("   + trigramas del vocabulario (tolerancia a tipeos)")
+    print("   + sub-índices por campo (pesos por consulta)")
     print("=" * 50)
@@ -10,17 +10,10 @@ import json
 import re
 from collections import Counter
 
-def clean_text(text):
-    """Limpia caracteres mal codificados"""
-    replacements = {
-        '\u00c3\u00a1': 'á', '\u00c3\u00a9': 'é', '\u00c3\u00ad': 'í', 
-        '\u00c3\u00b3': 'ó', '\u00c3\u00ba': 'ú', '\u00c3\u00b1': 'ñ',
-        '\u00c2': '', 'Ã¡': 'á', 'Ã©': 'é', 'Ã­': 'í', 'Ã³': 'ó', 
-        'Ãº': 'ú', 'Ã±': 'ñ'
-    }
-    for old, new in replacements.items():
-        text = text.replace(old, new)
-    return text.strip()
+from services.facets import clean_category
+
+# La misma limpieza que usan los filtros por faceta de la API
+clean_text = clean_category
 
 def extract_doc_type(title):
     """Extrae tipo de documento del título (busca palabras clave)"""
@@ -0,0 +1,114 @@
+"""
+Analizador de texto compartido por la construcción de índices y la API.
+
+``create_search_index.py`` normaliza los documentos y ``api_chatbot.py`` las
+consultas con estas mismas funciones, así los tokens de la consulta y los del
+índice coinciden siempre:
+
+- minúsculas y acentos fuera con una tabla de ``str.translate`` (cada carácter
+  se descompone una sola vez);
+- tokens con el patrón del TfidfVectorizer y stemming simple de plurales;
+- expansión de abreviaturas ("ddhh", "mir", "pc") en una sola pasada de una
+  expresión compilada que respeta los límites de palabra: "mir" ya no
+  reescribe "mirada" ni "ps" el interior de otra palabra; la corrección de
+  tipeos deja intactas las claves (``EXPANSION_TERMS``);
+- ``analyze_query`` memoizado (LRU) para las consultas que se repiten.
+"""
+
+import re
+import unicodedata
+from functools import lru_cache
+from typing import List
+
+# Mismo patrón de tokens que el TfidfVectorizer de create_search_index.py
+TOKEN_PATTERN = re.compile(r'(?u)\b[\w-]+\b')
+
+# Consultas distintas recordadas por analyze_query
+QUERY_CACHE_SIZE = 4096
+
+# Términos y abreviaturas comunes -> su forma expandida (se analizan igual que el texto)
+TERM_EXPANSIONS = {
+    'dicta': 'dictadura militar',
+    'ddhh': 'derechos humanos',
+    'dd.hh': 'derechos humanos',
+    'dd hh': 'derechos humanos',
+    'mir': 'movimiento izquierda revolucionaria',
+    'pc': 'partido comunista',
+    'ps': 'partido socialista',
+    'pdc': 'partido democrata cristiano',
+    'golpe': 'golpe estado 1973',
+    'pinochet': 'dictadura militar pinochet',
+    'allende': 'salvador allende',
+    'aylwin': 'patricio aylwin',
+    '73': '1973',
+    '74': '1974',
+    '75': '1975',
+    '76': '1976',
+    '80': '1980',
+    '90': '1990',
+    'fotos': 'fotografias',
+    'imagenes': 'fotografias',
+    'pics': 'fotografias',
+}
+
+
+class _AccentTable(dict):
+    """Tabla para str.translate: cada carácter sin sus acentos, calculado una vez por carácter"""
+
+    def __missing__(self, codepoint: int) -> str:
+        decomposed = unicodedata.normalize('NFD', chr(codepoint))
+        self[codepoint] = ''.join(c for c in decomposed if unicodedata.category(c) != 'Mn')
+        return self[codepoint]
+
+
+_ACCENTS = _AccentTable()
+
+
+def strip_accents(text: str) -> str:
+    """'Concepción' -> 'Concepcion' (la ñ queda como n)"""
+    return text if text.isascii() else text.translate(_ACCENTS)
+
+
+def stem(word: str) -> str:
+    """Stemming básico de plurales en español"""
+    # Si termina en 'es' (árboles -> árbol, canciones -> cancion)
+    if word.endswith('es') and len(word) > 4:
+        return word[:-2]
+    # Si termina en 's' (casas -> casa)
+    if word.endswith('s') and len(word) > 3 and not word.endswith('ss'):
+        return word[:-1]
+    return word
+
+
+def tokens(text) -> List[str]:
+    """Tokens normalizados: minúsculas, sin acentos ni puntuación, plurales recortados"""
+    if not isinstance(text, str):
+        text = str(text)
+    return [stem(token) for token in TOKEN_PATTERN.findall(strip_accents(text.lower()))]
+
+
+def normalize_text(text) -> str:
+    """Texto normalizado (tokens separados por un espacio); forma de los documentos en el índice"""
+    return ' '.join(tokens(text))
+
+
+# Claves y expansiones en su forma normalizada ('fotos' -> 'foto', 'dd.hh' -> 'dd hh');
+# las claves más largas primero para que 'dd hh' gane sobre prefijos más cortos
+_EXPANSIONS = {normalize_text(term): normalize_text(expansion) for term, expansion in TERM_EXPANSIONS.items()}
+_EXPANSION_RE = re.compile(
+    r'(?<!\S)(?:' + '|'.join(re.escape(term) for term in sorted(_EXPANSIONS, key=len, reverse=True)) + r')(?!\S)'
+)
+
+# Términos de las claves: la corrección de tipeos no los toca ('ddhh', 'dicta' no están en el vocabulario)
+EXPANSION_TERMS = frozenset(term for key in _EXPANSIONS for term in key.split())
+
+
+def expand_terms(normalized: str) -> str:
+    """Reemplaza abreviaturas por su forma expandida en una sola pasada (sólo palabras completas)"""
+    return _EXPANSION_RE.sub(lambda match: _EXPANSIONS[match.group(0)], normalized)
+
+
+@lru_cache(maxsize=QUERY_CACHE_SIZE)
+def analyze_query(query: str) -> str:
+    """normalize_text memoizado para consultas"""
+    return normalize_text(query)
@@ -0,0 +1,128 @@
+"""
+Autocompletado (type-ahead) sobre títulos y categorías.
+
+Cada entrada (un título o una materia/autor/lugar de ``categories.json``) se
+indexa bajo una clave por palabra: el texto en minúsculas y sin acentos desde
+el inicio de esa palabra ("salvador allende gossens", "allende gossens",
+"gossens"). Las claves quedan en una lista ordenada; un prefijo se resuelve
+con dos ``bisect`` y el tramo resultante se ordena por ``count`` (documentos
+de la categoría, o documentos con ese título) con ``argpartition``. Los
+prefijos de 1-2 letras, los de tramos más largos, se memorizan.
+
+Se construye una vez por generación de índices, junto con los demás.
+"""
+
+import re
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+from .analyzer import strip_accents
+
+
+# Tipos de categoría de categories.json que se sugieren (además de 'titulos')
+CATEGORY_TYPES = ('materias', 'autores', 'lugares')
+TITLE_TYPE = 'titulos'
+
+# Palabras por entrada que abren una clave y largo máximo de cada clave
+MAX_WORDS = 12
+MAX_KEY_LENGTH = 64
+
+# Prefijos con resultados memorizados (los de tramos más largos)
+MEMO_PREFIX_LENGTH = 2
+
+_WORD_START = re.compile(r'(?u)\b\w')
+
+
+def fold(text: str) -> str:
+    """Minúsculas, sin acentos y con espacios simples (forma de las claves y de los prefijos)"""
+    text = text.lower()
+    text = strip_accents(text)
+    return ' '.join(text.split())
+
+
+class PrefixIndex:
+    """Claves ordenadas (una por palabra de cada entrada) -> entrada, con puntaje por count"""
+
+    def __init__(self, texts: Sequence[str], types: Sequence[str], counts: Sequence[int],
+                 keys: List[str], key_entries: np.ndarray, key_starts: np.ndarray):
+        self.texts = list(texts)
+        self.types = list(types)
+        self.counts = np.asarray(counts, dtype=np.int64)
+        self.keys = keys
+        self.key_entries = np.asarray(key_entries, dtype=np.int32)
+        # Más documentos primero; a igual count, la clave que empieza la entrada
+        self._scores = self.counts[self.key_entries] * 2 + np.asarray(key_starts, dtype=np.int64)
+        self._type_ids = {name: i for i, name in enumerate(dict.fromkeys(self.types))}
+        self._entry_types = np.asarray([self._type_ids[t] for t in self.types], dtype=np.int8)
+        self._memo: Dict[tuple, List[Dict]] = {}
+
+    @classmethod
+    def build(cls, categories: Optional[Mapping[str, List[Dict]]], titles: Iterable[str]) -> 'PrefixIndex':
+        """Desde categories.json ({tipo: [{'name', 'count'}]}) y los títulos vigentes ('' = borrado)"""
+        texts, types, counts = [], [], []
+        for category_type in CATEGORY_TYPES:
+            for item in (categories or {}).get(category_type, []):
+                texts.append(item['name'])
+                types.append(category_type)
+                counts.append(int(item.get('count', 0)))
+
+        # Títulos repetidos ("Carta", "Fotografía") son una entrada con su cantidad de documentos
+        title_counts: Dict[str, int] = {}
+        for title in titles:
+            title = ' '.join(title.split())
+            if title:
+                title_counts[title] = title_counts.get(title, 0) + 1
+        for title, count in title_counts.items():
+            texts.append(title)
+            types.append(TITLE_TYPE)
+            counts.append(count)
+
+        pairs = []
+        for entry_id, text in enumerate(texts):
+            folded = fold(text)
+            for match in list(_WORD_START.finditer(folded))[:MAX_WORDS]:
+                pairs.append((folded[match.start():match.start() + MAX_KEY_LENGTH], entry_id, match.start() == 0))
+        pairs.sort()
+        return cls(texts, types, counts,
+                   [key for key, _, _ in pairs],
+                   np.asarray([entry for _, entry, _ in pairs], dtype=np.int32),
+                   np.asarray([start for _, _, start in pairs], dtype=bool))
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def suggest(self, prefix: str, limit: int = 8, types: Optional[Sequence[str]] = None) -> List[Dict]:
+        """Hasta limit entradas con alguna palabra que empieza con prefix, por count descendente"""
+        prefix = fold(prefix)[:MAX_KEY_LENGTH]
+        if not prefix or limit <= 0:
+            return []
+        memo_key = (prefix, limit) if types is None and len(prefix) <= MEMO_PREFIX_LENGTH else None
+        if memo_key in self._memo:
+            return self._memo[memo_key]
+
+        lo = bisect_left(self.keys, prefix)
+        hi = bisect_left(self.keys, prefix + '\U0010ffff', lo)
+        positions = np.arange(lo, hi)
+        if types is not None:
+            wanted = [self._type_ids[t] for t in types if t in self._type_ids]
+            positions = positions[np.isin(self._entry_types[self.key_entries[lo:hi]], wanted)]
+
+        # Sobre-muestreo: una entrada puede aparecer por varias de sus palabras
+        take = min(len(positions), limit * 4)
+        if take < len(positions):
+            positions = positions[np.argpartition(-self._scores[positions], take - 1)[:take]]
+        positions = positions[np.lexsort((positions, -self._scores[positions]))]
+
+        results, seen = [], set()
+        for entry_id in self.key_entries[positions].tolist():
+            if entry_id not in seen:
+                seen.add(entry_id)
+                results.append({'text': self.texts[entry_id], 'type': self.types[entry_id],
+                                'count': int(self.counts[entry_id])})
+                if len(results) == limit:
+                    break
+        if memo_key is not None:
+            self._memo[memo_key] = results
+        return results
@@ -0,0 +1,161 @@
+"""
+Backend BM25F: alternativa al índice TfidfVectorizer.
+
+Cada campo (título, materias, autores, lugares, fechas) guarda su propia
+frecuencia de término y su largo por documento, así la normalización por largo
+favorece a los títulos archivísticos cortos sin repetir el título 3 veces.
+
+Los postings son arreglos (estilo CSR): ``indptr[t]:indptr[t+1]`` delimita los
+documentos del término ``t`` en ``doc_ids`` y sus frecuencias por campo en ``tf``.
+Una consulta sólo toca los postings de sus términos.
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .analyzer import TOKEN_PATTERN
+from .tfidf_engine import select_top_k
+
+
+FIELDS = ('title', 'subject', 'creator', 'coverage', 'date')
+
+# Peso y normalización por largo (b) de cada campo, en el orden de FIELDS
+DEFAULT_FIELD_WEIGHTS = (3.0, 1.5, 1.0, 1.0, 0.5)
+DEFAULT_FIELD_B = (0.75, 0.5, 0.5, 0.5, 0.0)
+DEFAULT_K1 = 1.2
+
+def tokenize(text: str) -> List[str]:
+    """Tokens en minúsculas (el texto ya debe venir normalizado)"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25FIndex:
+    """Índice BM25F con postings en arreglos y largos por campo precalculados"""
+
+    def __init__(self,
+                 vocabulary: Sequence[str],
+                 indptr: np.ndarray,
+                 doc_ids: np.ndarray,
+                 tf: np.ndarray,
+                 field_lengths: np.ndarray,
+                 field_weights: Sequence[float] = DEFAULT_FIELD_WEIGHTS,
+                 field_b: Sequence[float] = DEFAULT_FIELD_B,
+                 k1: float = DEFAULT_K1):
+        self.vocabulary = {term: i for i, term in enumerate(vocabulary)}
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.doc_ids = np.asarray(doc_ids, dtype=np.int32)
+        self.tf = np.asarray(tf, dtype=np.float32)
+        self.field_lengths = np.asarray(field_lengths, dtype=np.float32)
+        self.n_docs = self.field_lengths.shape[0]
+        self.k1 = k1
+
+        df = np.diff(self.indptr).astype(np.float32)
+        self.idf = np.log1p((self.n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+        self.set_field_params(field_weights, field_b)
+
+    def set_field_params(self, field_weights: Sequence[float], field_b: Sequence[float]) -> None:
+        """Precalcula w_f / (1 - b_f + b_f * len_f / avglen_f) por documento y campo"""
+        weights = np.asarray(field_weights, dtype=np.float32)
+        b = np.asarray(field_b, dtype=np.float32)
+        avg = self.field_lengths.mean(axis=0) if self.n_docs else np.ones(len(FIELDS), dtype=np.float32)
+        avg[avg == 0] = 1.0
+        norm = 1.0 - b + b * self.field_lengths / avg
+        self._field_factors = (weights / norm).astype(np.float32)
+
+    # ------------------------------------------------------------------
+    # Construcción y persistencia
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def build(cls, field_tokens: Sequence[Dict[str, List[str]]], **params) -> 'BM25FIndex':
+        """Construye el índice desde tokens por campo: [{'title': [...], 'subject': [...]}, ...]"""
+        vocabulary: Dict[str, int] = {}
+        terms, docs, fields, counts = [], [], [], []
+        field_lengths = np.zeros((len(field_tokens), len(FIELDS)), dtype=np.float32)
+
+        for doc_id, doc_fields in enumerate(field_tokens):
+            for f, field in enumerate(FIELDS):
+                tokens = doc_fields.get(field, [])
+                field_lengths[doc_id, f] = len(tokens)
+                tf: Dict[str, int] = {}
+                for token in tokens:
+                    tf[token] = tf.get(token, 0) + 1
+                for token, count in tf.items():
+                    terms.append(vocabulary.setdefault(token, len(vocabulary)))
+                    docs.append(doc_id)
+                    fields.append(f)
+                    counts.append(count)
+
+        # Ordenar el vocabulario alfabéticamente (ids estables entre construcciones)
+        sorted_terms = sorted(vocabulary)
+        remap = np.empty(len(vocabulary), dtype=np.int64)
+        for new_id, term in enumerate(sorted_terms):
+            remap[vocabulary[term]] = new_id
+
+        terms = remap[np.asarray(terms, dtype=np.int64)] if terms else np.empty(0, dtype=np.int64)
+        docs = np.asarray(docs, dtype=np.int64)
+        n_docs = max(len(field_tokens), 1)
+
+        # Una fila de postings por par (término, documento) con sus tf por campo
+        keys, rows = np.unique(terms * n_docs + docs, return_inverse=True)
+        tf_matrix = np.zeros((len(keys), len(FIELDS)), dtype=np.float32)
+        np.add.at(tf_matrix, (rows, np.asarray(fields, dtype=np.int64)), np.asarray(counts, dtype=np.float32))
+
+        posting_terms = keys // n_docs
+        indptr = np.searchsorted(posting_terms, np.arange(len(sorted_terms) + 1))
+        return cls(sorted_terms, indptr, keys % n_docs, tf_matrix, field_lengths, **params)
+
+    def save(self, path: str) -> None:
+        vocabulary = sorted(self.vocabulary, key=self.vocabulary.get)
+        np.savez(
+            path,
+            vocabulary=np.asarray(vocabulary, dtype=str),
+            indptr=self.indptr,
+            doc_ids=self.doc_ids,
+            tf=self.tf,
+            field_lengths=self.field_lengths,
+        )
+
+    @classmethod
+    def load(cls, path: str, **params) -> 'BM25FIndex':
+        data = np.load(path, allow_pickle=False)
+        return cls(data['vocabulary'].tolist(), data['indptr'], data['doc_ids'],
+                   data['tf'], data['field_lengths'], **params)
+
+    # ------------------------------------------------------------------
+    # Puntaje
+    # ------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return self.n_docs
+
+    def score(self, tokens: Sequence[str], allowed: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Puntajes BM25F de los documentos candidatos (los que contienen algún término).
+        allowed: máscara booleana opcional (n_docs) que restringe los candidatos.
+        """
+        term_ids = np.asarray(sorted({self.vocabulary[t] for t in tokens if t in self.vocabulary}), dtype=np.int64)
+        if len(term_ids) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        starts, ends = self.indptr[term_ids], self.indptr[term_ids + 1]
+        lengths = ends - starts
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+
+        docs = self.doc_ids[offsets]
+        idf = np.repeat(self.idf[term_ids], lengths)
+        if allowed is not None:
+            keep = allowed[docs]
+            offsets, docs, idf = offsets[keep], docs[keep], idf[keep]
+        pseudo_tf = (self.tf[offsets] * self._field_factors[docs]).sum(axis=1)
+        contributions = idf * pseudo_tf / (self.k1 + pseudo_tf)
+
+        ids, inverse = np.unique(docs, return_inverse=True)
+        scores = np.bincount(inverse, weights=contributions).astype(np.float32)
+        return ids.astype(np.int64), scores
+
+    def top_k(self, tokens: Sequence[str], k: int, min_score: float = 0.0,
+              allowed: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Los k documentos con mayor puntaje BM25F (ids, puntajes) en orden descendente"""
+        ids, scores = self.score(tokens, allowed)
+        return select_top_k(ids, scores, k, min_score)
@@ -0,0 +1,177 @@
+"""
+Índice numérico de años (dc:date y años en títulos) para filtrar por rango.
+
+Hasta ahora un año de la consulta ("fotos 1980-1985") era un token más para
+TF-IDF. Aquí cada documento aporta los años de su ``dc:date`` (rangos como
+"1980-1985" se expanden) y los que aparecen en su título; los pares
+(año, doc_id) quedan en dos arreglos ordenados por año. Un rango se resuelve
+con dos búsquedas binarias (``searchsorted``) más el tramo de k documentos que
+cae dentro: O(log n + k), y el resultado es una máscara de candidatos que se
+combina con los filtros por faceta antes de puntuar el texto.
+"""
+
+import re
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+MIN_YEAR, MAX_YEAR = 1800, 2099
+
+# Rango máximo que se expande desde un dc:date como "1900-1990"
+MAX_SPAN = 100
+
+_YEAR = r'(1[89]\d{2}|20\d{2})'
+_YEAR_RE = re.compile(rf'\b{_YEAR}\b')
+_DATE_RANGE_RE = re.compile(rf'^\s*\[?(?:ca\.?\s*)?{_YEAR}\s*[-–/]\s*{_YEAR}\]?\s*$')
+
+# Expresiones de rango en consultas, de la más específica a la más general
+_QUERY_PATTERNS = [
+    (re.compile(rf'\b(?:entre|desde|de)\s+(?:el\s+)?(?:año\s+)?{_YEAR}\s+(?:y|a|al|hasta)\s+(?:el\s+)?{_YEAR}\b'), 'range'),
+    (re.compile(rf'\b{_YEAR}\s*(?:-|–|/|\ba\b|\bal\b|\bhasta\b)\s*{_YEAR}\b'), 'range'),
+    (re.compile(r'\b(?:década\s+de(?:l)?|decada\s+de(?:l)?|años|anos)\s+(?:los\s+)?(?:19)?([2-9])0s?\b'), 'decade'),
+    (re.compile(rf'\bantes\s+de(?:l)?\s+(?:año\s+)?{_YEAR}\b'), 'before'),
+    (re.compile(rf'\bhasta(?:\s+el)?\s+(?:año\s+)?{_YEAR}\b'), 'until'),
+    (re.compile(rf'\b(?:después|despues)\s+de(?:l)?\s+(?:año\s+)?{_YEAR}\b'), 'after'),
+    (re.compile(rf'\bdesde(?:\s+el)?\s+(?:año\s+)?{_YEAR}\b'), 'since'),
+]
+
+
+def years_in_text(text: str) -> List[int]:
+    """Años (1800-2099) mencionados en un texto"""
+    return [int(y) for y in _YEAR_RE.findall(text or '')]
+
+
+def years_in_date(value: str) -> List[int]:
+    """Años de un valor de dc:date ('1985', '1985-03-12', '1980-1985', 'ca. 1973', 's.f.')"""
+    match = _DATE_RANGE_RE.match(value or '')
+    if match:
+        start, end = sorted((int(match.group(1)), int(match.group(2))))
+        if end - start <= MAX_SPAN:
+            return list(range(start, end + 1))
+    return years_in_text(value)
+
+
+def extract_year_range(query: str, lone_years: bool = False) -> Tuple[str, Optional[Tuple[int, int]]]:
+    """Separa un rango de años de la consulta: ('fotos 1980-1985') -> ('fotos', (1980, 1985)).
+
+    Acepta sólo formas explícitas: "1980-1985", "entre 1973 y 1990", "años 80",
+    "antes de 1973", "hasta 1973", "después de 1990" y "desde 1990". Un número
+    suelto ("decreto 1800", "ley 2000 de 1990") queda en el texto como un término
+    más; lone_years=True también lo toma como año (varios forman el rango
+    min-max), para valores que son sólo años como el parámetro years de la API.
+    Retorna (consulta sin el rango, None) si no hay años.
+    """
+    text = query.lower()
+    spans: List[Tuple[int, int]] = []
+    years: List[Tuple[int, int]] = []
+    for pattern, kind in _QUERY_PATTERNS:
+        for match in pattern.finditer(text):
+            if any(s < match.end() and match.start() < e for s, e in spans):
+                continue
+            spans.append(match.span())
+            if kind == 'range':
+                years.append(tuple(sorted((int(match.group(1)), int(match.group(2))))))
+            elif kind == 'decade':
+                decade = 1900 + int(match.group(1)) * 10
+                years.append((decade, decade + 9))
+            elif kind in ('before', 'until'):
+                years.append((MIN_YEAR, int(match.group(1)) - (kind == 'before')))
+            else:
+                years.append((int(match.group(1)) + (kind == 'after'), MAX_YEAR))
+    for match in (_YEAR_RE.finditer(text) if lone_years else ()):
+        if not any(s <= match.start() < e for s, e in spans):
+            spans.append(match.span())
+            years.append((int(match.group(1)), int(match.group(1))))
+    if not years:
+        return query, None
+
+    remaining = query
+    for start, end in sorted(spans, reverse=True):
+        remaining = remaining[:start] + ' ' + remaining[end:]
+    return ' '.join(remaining.split()), (min(s for s, _ in years), max(e for _, e in years))
+
+
+def parse_year_range(value) -> Optional[Tuple[int, int]]:
+    """Rango explícito de la API: '1980-1985', 1985 o [1980, 1985]; ValueError si es inválido"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, int) and not isinstance(value, bool):
+        start = end = value
+    elif isinstance(value, str):
+        _, years = extract_year_range(value, lone_years=True)
+        if years is None:
+            raise ValueError(f"Rango de años inválido: {value}")
+        start, end = years
+    elif isinstance(value, (list, tuple)) and len(value) == 2 and all(isinstance(v, int) for v in value):
+        start, end = value
+    else:
+        raise ValueError("years debe ser '1980-1985', un año o [inicio, fin]")
+    if start > end:
+        start, end = end, start
+    return max(start, MIN_YEAR), min(end, MAX_YEAR)
+
+
+class YearIndex:
+    """Pares (año, doc_id) ordenados por año; consultas por rango con búsqueda binaria"""
+
+    def __init__(self, years: np.ndarray, doc_ids: np.ndarray, n_docs: int):
+        self.years = years
+        self.doc_ids = doc_ids
+        self.n_docs = n_docs
+        # Décadas de cada documento (CSR documento -> décadas, sin repetir) para contar resultados
+        pairs = np.unique(np.stack([doc_ids.astype(np.int64), years.astype(np.int64) // 10 * 10]).reshape(2, -1), axis=1)
+        self.decades = pairs[1].astype(np.int16)
+        self.decade_indptr = np.zeros(n_docs + 1, dtype=np.int64)
+        np.cumsum(np.bincount(pairs[0], minlength=n_docs), out=self.decade_indptr[1:])
+
+    @classmethod
+    def from_documents(cls, documents, deleted: Iterable[int] = ()) -> 'YearIndex':
+        """Desde un DocumentStore/ChainedDocumentStore: dc:date (por valor internado) + títulos.
+        deleted: ids borrados (tombstones) que no deben aparecer en ningún rango.
+        """
+        values, value_ids, doc_ids = documents.postings('dc:date')
+        parsed = [years_in_date(value) for value in values]
+        year_list, doc_list = [], []
+        for value_id, doc_id in zip(np.asarray(value_ids).tolist(), np.asarray(doc_ids).tolist()):
+            for year in parsed[value_id]:
+                year_list.append(year)
+                doc_list.append(doc_id)
+
+        for doc_id, title in enumerate(documents.titles()):
+            for year in years_in_text(title):
+                year_list.append(year)
+                doc_list.append(doc_id)
+
+        pairs = np.unique(np.asarray([year_list, doc_list], dtype=np.int32).reshape(2, -1), axis=1)
+        pairs = pairs[:, ~np.isin(pairs[1], np.asarray(list(deleted), dtype=np.int32))]
+        return cls(pairs[0].astype(np.int16), pairs[1], len(documents))
+
+    def __len__(self) -> int:
+        return len(self.years)
+
+    @property
+    def span(self) -> Optional[Tuple[int, int]]:
+        """(primer año, último año) del corpus"""
+        return (int(self.years[0]), int(self.years[-1])) if len(self.years) else None
+
+    def docs_between(self, start: int, end: int) -> np.ndarray:
+        """Ids de documento (ascendentes, sin repetir) con algún año en [start, end]"""
+        lo = np.searchsorted(self.years, start, side='left')
+        hi = np.searchsorted(self.years, end, side='right')
+        return np.unique(self.doc_ids[lo:hi])
+
+    def decade_counts(self, doc_ids) -> List[dict]:
+        """[{'name': 1970, 'count'}] por década (cronológico) de los documentos dados"""
+        doc_ids = np.asarray(doc_ids, dtype=np.int64)
+        starts = self.decade_indptr[doc_ids]
+        lengths = self.decade_indptr[doc_ids + 1] - starts
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        decades, counts = np.unique(self.decades[offsets], return_counts=True)
+        return [{'name': int(decade), 'count': int(count)} for decade, count in zip(decades, counts)]
+
+    def mask(self, start: int, end: int) -> np.ndarray:
+        """Máscara booleana de candidatos (combinable con FacetIndex.select)"""
+        mask = np.zeros(self.n_docs, dtype=bool)
+        mask[self.docs_between(start, end)] = True
+        return mask
@@ -0,0 +1,85 @@
+"""
+Índice vectorial denso para la búsqueda semántica.
+
+Los embeddings (``embeddings_cache.pkl``: dict doc_id -> vector) se copian una
+sola vez a una matriz float32 contigua y normalizada. Cada consulta es un único
+producto matriz-vector seguido de ``argpartition``; ``doc_ids`` traduce filas a
+ids de documento porque no todos los documentos tienen embedding.
+"""
+
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .tfidf_engine import select_top_k
+
+
+class DenseVectorIndex:
+    """Matriz de embeddings normalizados (una fila por documento con embedding)"""
+
+    def __init__(self, vectors: np.ndarray, doc_ids: Sequence[int]):
+        matrix = np.ascontiguousarray(vectors, dtype=np.float32)
+        if matrix.ndim != 2:
+            raise ValueError("vectors debe ser una matriz 2D (documentos x dimensiones)")
+        doc_ids = np.asarray(doc_ids, dtype=np.int64)
+        if len(doc_ids) != matrix.shape[0]:
+            raise ValueError("doc_ids debe tener una entrada por fila de vectors")
+
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix /= norms
+
+        self.matrix = matrix
+        self.doc_ids = doc_ids
+
+    @classmethod
+    def from_embeddings(cls, embeddings: Dict[int, Sequence[float]], n_docs: Optional[int] = None) -> Optional['DenseVectorIndex']:
+        """Construye el índice desde el dict de embeddings_cache.pkl.
+
+        Se descartan entradas vacías, ids fuera del corpus (si se indica n_docs)
+        y vectores cuya dimensión no coincide con la mayoritaria.
+        Retorna None si no queda ningún vector válido.
+        """
+        items = [
+            (int(idx), vec) for idx, vec in embeddings.items()
+            if vec is not None and len(vec) > 0 and (n_docs is None or 0 <= int(idx) < n_docs)
+        ]
+        if not items:
+            return None
+
+        dims = [len(vec) for _, vec in items]
+        dim = max(set(dims), key=dims.count)
+        items = sorted((idx, vec) for idx, vec in items if len(vec) == dim)
+
+        vectors = np.empty((len(items), dim), dtype=np.float32)
+        for row, (_, vec) in enumerate(items):
+            vectors[row] = vec
+        return cls(vectors, [idx for idx, _ in items])
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+    @property
+    def dim(self) -> int:
+        return self.matrix.shape[1]
+
+    def top_k(self, query_vector: Sequence[float], k: int, min_score: float = -np.inf,
+              allowed: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Los k documentos más similares (ids de documento, similitud coseno).
+        allowed: máscara booleana opcional por id de documento; sólo se comparan esas filas.
+        """
+        query = np.asarray(query_vector, dtype=np.float32).ravel()
+        if query.shape[0] != self.dim:
+            raise ValueError(f"Dimensión de consulta {query.shape[0]} != dimensión del índice {self.dim}")
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        if allowed is None:
+            rows = np.arange(len(self.doc_ids))
+            scores = self.matrix @ (query / norm)
+        else:
+            rows = np.flatnonzero(allowed[self.doc_ids])
+            scores = self.matrix[rows] @ (query / norm)
+        rows, top_scores = select_top_k(rows, scores, k, min_score)
+        return self.doc_ids[rows], top_scores
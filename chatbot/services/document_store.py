@@ -0,0 +1,508 @@
+"""
+Almacén columnar del corpus (reemplaza la lista de diccionarios).
+
+En vez de ~12k dicts con las mismas claves repetidas y los mismos textos de
+metadatos duplicados, el corpus queda en unas pocas columnas:
+
+- ``title`` y ``href``: un único buffer UTF-8 por columna + arreglo de offsets
+- ``dc:subject``, ``dc:creator``, ``dc:coverage``, ``dc:date``: valores
+  internados (cada texto distinto se guarda una vez) y listas de ids por
+  documento en formato CSR (``indptr`` + ``ids``)
+
+``store[i]`` retorna una vista liviana (``DocumentRecord``, con ``__slots__``)
+que se comporta como el dict original para lectura (``doc['title']``,
+``doc.get('dc:subject', [])``). ``to_dict`` materializa una copia cuando hace
+falta un dict real (respuestas JSON).
+
+Formato binario (``corpus.bin``, lo escribe create_search_index.py):
+
+    cabecera   MAGIC, versión, n_docs, n_campos, n_secciones
+    tabla      por sección: nombre, dtype, offset, cantidad
+    secciones  arreglos crudos (alineados a 8 bytes): flags, offsets y datos
+               UTF-8 de title/href, indptr/ids y tabla de valores de cada campo
+
+``DocumentStore.open`` lo abre con ``mmap``: ningún arreglo se copia, los
+textos se decodifican al acceder a cada documento y, al ser un mapeo de sólo
+lectura del mismo archivo, los workers de gunicorn comparten las páginas.
+"""
+
+import json
+import mmap
+import os
+import struct
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+
+# Columnas de texto (una por documento)
+TEXT_FIELDS = ('title', 'href')
+
+# Campos Dublin Core multivaluados, guardados como ids internados
+LIST_FIELDS = ('dc:subject', 'dc:creator', 'dc:coverage', 'dc:date')
+
+# Bits por campo en _flags: presente en el original / valor escalar (no lista)
+_PRESENT = 1
+_SCALAR = 2
+
+MAGIC = b'UAHDOCS\0'
+FORMAT_VERSION = 1
+_HEADER = struct.Struct('<8sIIII')
+_SECTION = struct.Struct('<32s8sQQ')
+_ALIGN = 8
+
+
+class _TextColumn:
+    """Textos concatenados en un buffer UTF-8 con offsets (sin un str por documento)"""
+
+    __slots__ = ('buffer', 'offsets')
+
+    def __init__(self, buffer: Union[bytes, memoryview], offsets: np.ndarray):
+        self.buffer = buffer
+        self.offsets = offsets
+
+    @classmethod
+    def from_strings(cls, values: Sequence[str]) -> '_TextColumn':
+        encoded = [value.encode('utf-8') for value in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(e) for e in encoded], out=offsets[1:])
+        return cls(b''.join(encoded), offsets)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, idx: int) -> str:
+        return str(self.buffer[self.offsets[idx]:self.offsets[idx + 1]], 'utf-8')
+
+    def __iter__(self) -> Iterator[str]:
+        buffer, offsets = self.buffer, self.offsets.tolist()
+        for start, end in zip(offsets, offsets[1:]):
+            yield str(buffer[start:end], 'utf-8')
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.buffer) + self.offsets.nbytes
+
+
+class _ListColumn:
+    """Campo multivaluado: vocabulario internado + ids por documento (CSR)"""
+
+    __slots__ = ('values', 'indptr', 'ids', '_lookup')
+
+    def __init__(self, values: _TextColumn, indptr: np.ndarray, ids: np.ndarray):
+        self.values = values
+        self.indptr = indptr
+        self.ids = ids
+        self._lookup: Optional[Dict[str, int]] = None
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Sequence[str]]) -> '_ListColumn':
+        lookup: Dict[str, int] = {}
+        ids: List[int] = []
+        lengths = np.zeros(len(rows), dtype=np.int64)
+        for idx, row in enumerate(rows):
+            lengths[idx] = len(row)
+            ids.extend(lookup.setdefault(value, len(lookup)) for value in row)
+
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        column = cls(_TextColumn.from_strings(list(lookup)), indptr, np.asarray(ids, dtype=np.int32))
+        column._lookup = lookup
+        return column
+
+    def row_ids(self, idx: int) -> np.ndarray:
+        return self.ids[self.indptr[idx]:self.indptr[idx + 1]]
+
+    def row(self, idx: int) -> List[str]:
+        values = self.values
+        return [values[i] for i in self.row_ids(idx).tolist()]
+
+    def value_id(self, value: str) -> Optional[int]:
+        if self._lookup is None:
+            self._lookup = {text: i for i, text in enumerate(self.values)}
+        return self._lookup.get(value)
+
+    def doc_ids(self) -> np.ndarray:
+        """Documento dueño de cada posición de ``ids`` (para operaciones vectorizadas)"""
+        return np.repeat(np.arange(len(self.indptr) - 1, dtype=np.int32), np.diff(self.indptr))
+
+    @property
+    def nbytes(self) -> int:
+        return self.indptr.nbytes + self.ids.nbytes + self.values.nbytes
+
+
+class DocumentRecord:
+    """Vista de un documento del almacén; se lee como el dict original"""
+
+    __slots__ = ('_store', 'doc_id')
+
+    def __init__(self, store: 'DocumentStore', doc_id: int):
+        self._store = store
+        self.doc_id = doc_id
+
+    @property
+    def title(self) -> str:
+        return self._store.title(self.doc_id)
+
+    @property
+    def href(self) -> str:
+        return self._store.href(self.doc_id)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self._store.field(self.doc_id, key, default)
+
+    def __getitem__(self, key: str) -> Any:
+        missing = object()
+        value = self._store.field(self.doc_id, key, missing)
+        if value is missing:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: str) -> bool:
+        missing = object()
+        return self._store.field(self.doc_id, key, missing) is not missing
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self._store.to_dict(self.doc_id)
+
+    # Compatibilidad con el código que hacía documents[idx].copy()
+    copy = to_dict
+
+    def __repr__(self) -> str:
+        return f"DocumentRecord({self.doc_id}, {self.title!r})"
+
+
+class DocumentStore:
+    """Corpus en columnas; ``store[i]`` es una vista y ``to_dict(i)`` una copia"""
+
+    def __init__(self, documents: Sequence[Dict[str, Any]]):
+        n_fields = len(TEXT_FIELDS) + len(LIST_FIELDS)
+        flags = bytearray(len(documents) * n_fields)
+        # Claves fuera del esquema o valores no representables (raro; se guardan tal cual)
+        self._extras: Dict[int, Dict[str, Any]] = {}
+
+        texts: Dict[str, List[str]] = {field: [] for field in TEXT_FIELDS}
+        lists: Dict[str, List[List[str]]] = {field: [] for field in LIST_FIELDS}
+
+        for idx, doc in enumerate(documents):
+            base = idx * n_fields
+            for f, field in enumerate(TEXT_FIELDS):
+                value = doc.get(field)
+                if isinstance(value, str):
+                    flags[base + f] = _PRESENT
+                    texts[field].append(value)
+                else:
+                    texts[field].append('')
+                    if field in doc:
+                        self._extras.setdefault(idx, {})[field] = value
+
+            for f, field in enumerate(LIST_FIELDS, start=len(TEXT_FIELDS)):
+                value = doc.get(field)
+                if isinstance(value, list) and all(isinstance(v, str) for v in value):
+                    flags[base + f] = _PRESENT
+                    lists[field].append(value)
+                elif isinstance(value, str):
+                    flags[base + f] = _PRESENT | _SCALAR
+                    lists[field].append([value])
+                else:
+                    lists[field].append([])
+                    if field in doc:
+                        self._extras.setdefault(idx, {})[field] = value
+
+            for key in doc.keys() - set(TEXT_FIELDS) - set(LIST_FIELDS):
+                self._extras.setdefault(idx, {})[key] = doc[key]
+
+        self._attach(
+            np.frombuffer(bytes(flags), dtype=np.uint8).reshape(len(documents), n_fields),
+            {field: _TextColumn.from_strings(values) for field, values in texts.items()},
+            {field: _ListColumn.from_rows(rows) for field, rows in lists.items()},
+            self._extras,
+        )
+
+    def _attach(self, flags: np.ndarray, texts: Dict[str, _TextColumn],
+                lists: Dict[str, _ListColumn], extras: Dict[int, Dict[str, Any]]) -> None:
+        self._flags = flags
+        self._texts = texts
+        self._lists = lists
+        self._extras = extras
+        self._field_index = {field: i for i, field in enumerate(TEXT_FIELDS + LIST_FIELDS)}
+
+    @classmethod
+    def from_json(cls, path: str) -> 'DocumentStore':
+        """Carga un JSON de lista de documentos (p. ej. clean_with_metadata.json)"""
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            return cls(json.load(f))
+
+    # ------------------------------------------------------------------
+    # Formato binario (mmap)
+    # ------------------------------------------------------------------
+
+    def _sections(self) -> List[tuple]:
+        """(nombre, arreglo) en el orden en que se escriben"""
+        sections = [('flags', self._flags.reshape(-1))]
+        for field, column in self._texts.items():
+            sections.append((f'{field}.offsets', column.offsets))
+            sections.append((f'{field}.data', np.frombuffer(column.buffer, dtype=np.uint8)))
+        for field, column in self._lists.items():
+            sections.append((f'{field}.indptr', column.indptr))
+            sections.append((f'{field}.ids', column.ids))
+            sections.append((f'{field}.values.offsets', column.values.offsets))
+            sections.append((f'{field}.values.data', np.frombuffer(column.values.buffer, dtype=np.uint8)))
+        extras = json.dumps({str(k): v for k, v in self._extras.items()}, ensure_ascii=False)
+        sections.append(('extras', np.frombuffer(extras.encode('utf-8'), dtype=np.uint8)))
+        return sections
+
+    def save(self, path: str) -> None:
+        """Escribe el formato binario (vía archivo temporal + rename, seguro con lectores abiertos)"""
+        sections = self._sections()
+        position = _HEADER.size + _SECTION.size * len(sections)
+        table, layout = [], []
+        for name, array in sections:
+            position = -(-position // _ALIGN) * _ALIGN
+            table.append(_SECTION.pack(name.encode(), array.dtype.str.encode(), position, array.size))
+            layout.append((position, array))
+            position += array.nbytes
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(self), self._flags.shape[1], len(sections)))
+            f.write(b''.join(table))
+            for offset, array in layout:
+                f.write(b'\0' * (offset - f.tell()))
+                f.write(np.ascontiguousarray(array).tobytes())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def open(cls, path: str) -> 'DocumentStore':
+        """Abre un corpus binario con mmap (O(1): no lee ni decodifica documentos)"""
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, n_docs, n_fields, n_sections = _HEADER.unpack_from(mapped, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} no es un corpus binario")
+        if version != FORMAT_VERSION or n_fields != len(TEXT_FIELDS) + len(LIST_FIELDS):
+            raise ValueError(f"{path}: versión de formato {version} no soportada (se espera {FORMAT_VERSION})")
+
+        view = memoryview(mapped)
+        arrays: Dict[str, np.ndarray] = {}
+        spans: Dict[str, tuple] = {}
+        for i in range(n_sections):
+            name, dtype, offset, count = _SECTION.unpack_from(mapped, _HEADER.size + i * _SECTION.size)
+            name = name.rstrip(b'\0').decode()
+            arrays[name] = np.frombuffer(view, dtype=np.dtype(dtype.rstrip(b'\0').decode()), count=count, offset=offset)
+            spans[name] = (offset, offset + arrays[name].nbytes)
+
+        def text_column(prefix: str) -> _TextColumn:
+            start, end = spans[f'{prefix}.data']
+            return _TextColumn(view[start:end], arrays[f'{prefix}.offsets'])
+
+        store = cls.__new__(cls)
+        store._attach(
+            arrays['flags'].reshape(n_docs, n_fields),
+            {field: text_column(field) for field in TEXT_FIELDS},
+            {field: _ListColumn(text_column(f'{field}.values'), arrays[f'{field}.indptr'], arrays[f'{field}.ids'])
+             for field in LIST_FIELDS},
+            {int(k): v for k, v in json.loads(arrays['extras'].tobytes().decode('utf-8')).items()},
+        )
+        return store
+
+    # ------------------------------------------------------------------
+    # Acceso por documento
+    # ------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return self._flags.shape[0]
+
+    def __getitem__(self, idx: int) -> DocumentRecord:
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError(idx)
+        return DocumentRecord(self, idx)
+
+    def __iter__(self) -> Iterator[DocumentRecord]:
+        for idx in range(len(self)):
+            yield DocumentRecord(self, idx)
+
+    def title(self, idx: int) -> str:
+        return self._texts['title'][idx]
+
+    def href(self, idx: int) -> str:
+        return self._texts['href'][idx]
+
+    def values(self, field: str, idx: int) -> List[str]:
+        """Valores de un campo multivaluado (lista vacía si no existe)"""
+        return self._lists[field].row(idx)
+
+    def field(self, idx: int, key: str, default: Any = None) -> Any:
+        """Valor de un campo tal como venía en el JSON original (o default)"""
+        column = self._field_index.get(key)
+        if column is not None:
+            flags = self._flags[idx, column]
+            if flags & _PRESENT:
+                if key in self._texts:
+                    return self._texts[key][idx]
+                values = self._lists[key].row(idx)
+                return values[0] if flags & _SCALAR else values
+        extras = self._extras.get(idx)
+        if extras is not None and key in extras:
+            return extras[key]
+        return default
+
+    def to_dict(self, idx: int) -> Dict[str, Any]:
+        """Copia del documento como dict (mismas claves que el JSON original)"""
+        missing = object()
+        doc = {}
+        for key in TEXT_FIELDS + LIST_FIELDS:
+            value = self.field(idx, key, missing)
+            if value is not missing:
+                doc[key] = value
+        doc.update(self._extras.get(idx, {}))
+        return doc
+
+    # ------------------------------------------------------------------
+    # Acceso por columna
+    # ------------------------------------------------------------------
+
+    def titles(self) -> Iterator[str]:
+        return iter(self._texts['title'])
+
+    def hrefs(self) -> Iterator[str]:
+        return iter(self._texts['href'])
+
+    def value_counts(self, field: str) -> List[Dict[str, Any]]:
+        """[{'name', 'count'}] de un campo multivaluado, de mayor a menor frecuencia"""
+        column = self._lists[field]
+        counts = np.bincount(column.ids, minlength=len(column.values))
+        order = sorted(range(len(counts)), key=lambda i: (-counts[i], i))
+        return [{'name': column.values[i], 'count': int(counts[i])} for i in order if counts[i] > 0]
+
+    def postings(self, field: str) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """(valores distintos, id de valor, id de documento) de cada ocurrencia del campo"""
+        column = self._lists[field]
+        return list(column.values), column.ids, column.doc_ids()
+
+    def match_values(self, field: str, text: str, limit: Optional[int] = None) -> np.ndarray:
+        """Ids de documento (ascendentes) con algún valor del campo que contenga text.
+
+        La comparación de texto se hace una vez por valor internado, no por documento.
+        """
+        column = self._lists[field]
+        text = text.lower()
+        matching = np.fromiter((i for i, value in enumerate(column.values) if text in value.lower()), dtype=np.int32)
+        if len(matching) == 0:
+            return np.empty(0, dtype=np.int32)
+        docs = np.unique(column.doc_ids()[np.isin(column.ids, matching)])
+        return docs[:limit] if limit is not None else docs
+
+    @property
+    def nbytes(self) -> int:
+        """Tamaño aproximado de las columnas (sin contar extras)"""
+        return (self._flags.nbytes
+                + sum(c.nbytes for c in self._texts.values())
+                + sum(c.nbytes for c in self._lists.values()))
+
+
+class ChainedDocumentStore:
+    """Varios almacenes (base + segmentos delta) vistos como uno, con ids globales.
+
+    Los documentos borrados (tombstones) conservan su id para no desplazar los
+    índices, pero no aparecen en conteos ni filtros por categoría.
+    """
+
+    def __init__(self, stores: Sequence[DocumentStore], deleted: Sequence[int] = ()):
+        self.stores = list(stores)
+        self.offsets = np.zeros(len(self.stores) + 1, dtype=np.int64)
+        np.cumsum([len(store) for store in self.stores], out=self.offsets[1:])
+        self.deleted = np.unique(np.asarray(deleted, dtype=np.int64))
+
+    def _locate(self, idx: int):
+        segment = int(np.searchsorted(self.offsets, idx, side='right')) - 1
+        return self.stores[segment], idx - int(self.offsets[segment])
+
+    def _local_deleted(self, segment: int) -> np.ndarray:
+        start, end = self.offsets[segment], self.offsets[segment + 1]
+        return self.deleted[(self.deleted >= start) & (self.deleted < end)] - start
+
+    # ------------------------------------------------------------------
+    # Misma interfaz de lectura que DocumentStore
+    # ------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return int(self.offsets[-1])
+
+    def __getitem__(self, idx: int) -> DocumentRecord:
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError(idx)
+        return DocumentRecord(self, idx)
+
+    def __iter__(self) -> Iterator[DocumentRecord]:
+        for idx in range(len(self)):
+            yield DocumentRecord(self, idx)
+
+    def title(self, idx: int) -> str:
+        store, local = self._locate(idx)
+        return store.title(local)
+
+    def href(self, idx: int) -> str:
+        store, local = self._locate(idx)
+        return store.href(local)
+
+    def values(self, field: str, idx: int) -> List[str]:
+        store, local = self._locate(idx)
+        return store.values(field, local)
+
+    def field(self, idx: int, key: str, default: Any = None) -> Any:
+        store, local = self._locate(idx)
+        return store.field(local, key, default)
+
+    def to_dict(self, idx: int) -> Dict[str, Any]:
+        store, local = self._locate(idx)
+        return store.to_dict(local)
+
+    def titles(self) -> Iterator[str]:
+        for store in self.stores:
+            yield from store.titles()
+
+    def hrefs(self) -> Iterator[str]:
+        for store in self.stores:
+            yield from store.hrefs()
+
+    def value_counts(self, field: str) -> List[Dict[str, Any]]:
+        """Conteos por valor sumados entre segmentos (sin documentos borrados)"""
+        totals: Dict[str, int] = {}
+        for segment, store in enumerate(self.stores):
+            column = store._lists[field]
+            live = ~np.isin(column.doc_ids(), self._local_deleted(segment))
+            counts = np.bincount(column.ids[live], minlength=len(column.values))
+            for value_id in np.flatnonzero(counts).tolist():
+                name = column.values[value_id]
+                totals[name] = totals.get(name, 0) + int(counts[value_id])
+        ranked = sorted(totals.items(), key=lambda item: -item[1])
+        return [{'name': name, 'count': count} for name, count in ranked]
+
+    def postings(self, field: str) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """Como DocumentStore.postings, con ids globales y sin documentos borrados"""
+        values: List[str] = []
+        value_ids, doc_ids = [], []
+        for segment, store in enumerate(self.stores):
+            names, ids, docs = store.postings(field)
+            live = ~np.isin(docs, self._local_deleted(segment))
+            value_ids.append(ids[live].astype(np.int64) + len(values))
+            doc_ids.append(docs[live].astype(np.int64) + self.offsets[segment])
+            values.extend(names)
+        return values, np.concatenate(value_ids), np.concatenate(doc_ids)
+
+    def match_values(self, field: str, text: str, limit: Optional[int] = None) -> np.ndarray:
+        matches = [store.match_values(field, text) + self.offsets[segment]
+                   for segment, store in enumerate(self.stores)]
+        docs = np.concatenate(matches) if matches else np.empty(0, dtype=np.int64)
+        docs = docs[~np.isin(docs, self.deleted)]
+        return docs[:limit] if limit is not None else docs
+
+    @property
+    def nbytes(self) -> int:
+        return sum(store.nbytes for store in self.stores)
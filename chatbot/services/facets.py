@@ -0,0 +1,219 @@
+"""
+Filtros por faceta (materias, autores, lugares) con bitmaps de documentos.
+
+Para cada valor de ``dc:subject``, ``dc:creator`` y ``dc:coverage`` (limpiado
+igual que en ``extract_categories.py``) se guarda el conjunto de documentos que
+lo tienen: ids ordenados para los valores poco frecuentes y, para los
+frecuentes, un bitmap empaquetado precalculado (1 bit por documento). Un filtro
+como "materia Derechos Humanos Y lugar Santiago" se resuelve con OR/AND de
+bitmaps en numpy, sin recorrer documentos en Python; el resultado es la máscara
+de candidatos a la que se restringe el puntaje de texto.
+
+Las mismas postings se guardan también por documento (documento -> ids de
+valor), así la distribución de un conjunto de resultados (cuántos documentos
+por materia, autor o lugar) es un ``bincount`` sobre los ids de esos
+documentos, sin recorrer sus diccionarios.
+"""
+
+from typing import Dict, List, Mapping, Optional, Sequence, Union
+
+import numpy as np
+
+
+# Tipo de categoría (como en categories.json) -> campo Dublin Core
+FACET_FIELDS = {
+    'materias': 'dc:subject',
+    'autores': 'dc:creator',
+    'lugares': 'dc:coverage',
+}
+
+# Un valor con al menos n_docs / DENSE_RATIO documentos se guarda como bitmap
+# (a partir de ahí el bitmap ocupa menos que la lista de ids int32)
+DENSE_RATIO = 32
+
+# Valores por faceta en una distribución de resultados (los más frecuentes)
+COUNT_LIMIT = 10
+
+# Textos de filtro distintos recordados por faceta (match memoizado mientras viva la generación)
+MATCH_CACHE_SIZE = 4096
+
+# Filtro de una faceta: un texto, una lista (OR) o {'any': [...]} / {'all': [...]}
+FacetFilter = Union[str, Sequence[str], Mapping[str, Sequence[str]]]
+
+
+def clean_category(text: str) -> str:
+    """Limpia caracteres mal codificados"""
+    replacements = {
+        '\u00c3\u00a1': 'á', '\u00c3\u00a9': 'é', '\u00c3\u00ad': 'í', 
+        '\u00c3\u00b3': 'ó', '\u00c3\u00ba': 'ú', '\u00c3\u00b1': 'ñ',
+        '\u00c2': '', 'Ã¡': 'á', 'Ã©': 'é', 'Ã­': 'í', 'Ã³': 'ó', 
+        'Ãº': 'ú', 'Ã±': 'ñ'
+    }
+    for old, new in replacements.items():
+        text = text.replace(old, new)
+    return text.strip()
+
+
+def normalize_filters(filters: Optional[Mapping[str, FacetFilter]]) -> Dict[str, Dict[str, List[str]]]:
+    """Valida y lleva los filtros a {faceta: {'any'|'all': [textos]}}; ValueError si son inválidos"""
+    if not filters:
+        return {}
+    if not isinstance(filters, Mapping):
+        raise ValueError("filters debe ser un objeto {faceta: valores}")
+    normalized = {}
+    for facet, spec in filters.items():
+        if facet not in FACET_FIELDS:
+            raise ValueError(f"Faceta desconocida: {facet} (válidas: {', '.join(FACET_FIELDS)})")
+        if isinstance(spec, str):
+            spec = {'any': [spec]}
+        elif not isinstance(spec, Mapping):
+            spec = {'any': spec}
+        unknown = set(spec) - {'any', 'all'}
+        if unknown:
+            raise ValueError(f"Operador de filtro desconocido: {', '.join(sorted(unknown))}")
+        clauses = {}
+        for operator, texts in spec.items():
+            texts = [texts] if isinstance(texts, str) else texts
+            if not isinstance(texts, (list, tuple)) or not all(isinstance(t, str) for t in texts):
+                raise ValueError(f"Los valores de {facet} deben ser textos")
+            texts = [t.strip() for t in texts if t.strip()]
+            if texts:
+                clauses[operator] = texts
+        if clauses:
+            normalized[facet] = clauses
+    return normalized
+
+
+class _Facet:
+    """Postings de una faceta: por valor, ids de documento ordenados (+ bitmap si es frecuente)"""
+
+    def __init__(self, names: List[str], indptr: np.ndarray, doc_ids: np.ndarray, n_docs: int):
+        self.names = names
+        self._lower = [name.lower() for name in names]
+        # Nombre en minúsculas -> ids de valor (varios nombres limpios pueden coincidir sin mayúsculas)
+        self._exact: Dict[str, List[int]] = {}
+        for value_id, name in enumerate(self._lower):
+            self._exact.setdefault(name, []).append(value_id)
+        self._matches: Dict[str, List[int]] = {}
+        self.indptr = indptr
+        self.doc_ids = doc_ids
+        self.n_docs = n_docs
+        counts = np.diff(indptr)
+        self._dense = {
+            int(value_id): self._pack(self.docs(value_id))
+            for value_id in np.flatnonzero(counts * DENSE_RATIO >= max(n_docs, 1))
+        }
+        # Las mismas postings por documento (CSR documento -> ids de valor) para contar resultados
+        order = np.argsort(doc_ids, kind='stable')
+        self.doc_values = np.repeat(np.arange(len(names), dtype=np.int32), counts)[order]
+        self.doc_indptr = np.zeros(n_docs + 1, dtype=np.int64)
+        np.cumsum(np.bincount(doc_ids, minlength=n_docs), out=self.doc_indptr[1:])
+
+    def _pack(self, doc_ids: np.ndarray) -> np.ndarray:
+        mask = np.zeros(self.n_docs, dtype=bool)
+        mask[doc_ids] = True
+        return np.packbits(mask)
+
+    def docs(self, value_id: int) -> np.ndarray:
+        return self.doc_ids[self.indptr[value_id]:self.indptr[value_id + 1]]
+
+    def match(self, text: str) -> List[int]:
+        """Valores de un texto de filtro (sin distinguir mayúsculas): el valor con ese nombre exacto
+        si existe; si no, los que lo contienen, como /api/search-by-category. Memoizado por texto.
+        """
+        text = text.lower().strip()
+        value_ids = self._matches.get(text)
+        if value_ids is None:
+            value_ids = self._exact.get(text)
+            if value_ids is None:
+                value_ids = [value_id for value_id, name in enumerate(self._lower) if text and text in name]
+            if len(self._matches) >= MATCH_CACHE_SIZE:
+                self._matches.pop(next(iter(self._matches)), None)
+            self._matches[text] = value_ids
+        return value_ids
+
+    def counts(self, doc_ids: np.ndarray, limit: int = COUNT_LIMIT) -> List[Dict[str, object]]:
+        """[{'name', 'count'}] de los valores más frecuentes entre los documentos dados"""
+        starts = self.doc_indptr[doc_ids]
+        lengths = self.doc_indptr[doc_ids + 1] - starts
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        counts = np.bincount(self.doc_values[offsets], minlength=len(self.names))
+        value_ids = np.flatnonzero(counts)
+        if len(value_ids) > limit:
+            value_ids = value_ids[np.argpartition(-counts[value_ids], limit - 1)[:limit]]
+        # De mayor a menor; los empates en el orden de los valores (como value_counts)
+        value_ids = value_ids[np.lexsort((value_ids, -counts[value_ids]))]
+        return [{'name': self.names[v], 'count': int(counts[v])} for v in value_ids.tolist()]
+
+    def bitmap(self, text: str) -> np.ndarray:
+        """Bitmap empaquetado de los documentos con algún valor que contenga text"""
+        value_ids = self.match(text)
+        dense = [self._dense[v] for v in value_ids if v in self._dense]
+        sparse = [self.docs(v) for v in value_ids if v not in self._dense]
+        if sparse:
+            dense.append(self._pack(np.concatenate(sparse)))
+        if not dense:
+            return np.zeros((self.n_docs + 7) // 8, dtype=np.uint8)
+        return np.bitwise_or.reduce(dense)
+
+
+class FacetIndex:
+    """Bitmaps por valor de cada faceta, construidos una vez por generación de índices"""
+
+    def __init__(self, n_docs: int, facets: Dict[str, _Facet]):
+        self.n_docs = n_docs
+        self.facets = facets
+
+    @classmethod
+    def from_documents(cls, documents) -> 'FacetIndex':
+        """Desde un DocumentStore (o ChainedDocumentStore) usando sus columnas internadas"""
+        facets = {}
+        for facet, field in FACET_FIELDS.items():
+            values, value_ids, doc_ids = documents.postings(field)
+            # Valores crudos -> nombres limpios (los de categories.json); se descartan los de 1 carácter
+            names: Dict[str, int] = {}
+            mapping = np.full(len(values), -1, dtype=np.int64)
+            for raw_id, raw in enumerate(values):
+                name = clean_category(raw)
+                if len(name) > 1:
+                    mapping[raw_id] = names.setdefault(name, len(names))
+            name_ids = mapping[np.asarray(value_ids, dtype=np.int64)]
+            keep = name_ids >= 0
+            pairs = np.unique(np.stack([name_ids[keep], np.asarray(doc_ids, dtype=np.int64)[keep]]), axis=1)
+            indptr = np.zeros(len(names) + 1, dtype=np.int64)
+            np.cumsum(np.bincount(pairs[0], minlength=len(names)), out=indptr[1:])
+            facets[facet] = _Facet(list(names), indptr, pairs[1].astype(np.int32), len(documents))
+        return cls(len(documents), facets)
+
+    def values(self, facet: str) -> List[str]:
+        """Nombres (limpios) de los valores de una faceta"""
+        return self.facets[facet].names
+
+    def counts(self, doc_ids, limit: int = COUNT_LIMIT) -> Dict[str, List[Dict[str, object]]]:
+        """Distribución por faceta de un conjunto de documentos: {faceta: [{'name', 'count'}]}"""
+        doc_ids = np.asarray(doc_ids, dtype=np.int64)
+        return {facet: index.counts(doc_ids, limit) for facet, index in self.facets.items()}
+
+    def bitmap(self, filters: Mapping[str, FacetFilter]) -> Optional[np.ndarray]:
+        """Bitmap empaquetado de los documentos que cumplen todos los filtros (None si no hay filtros).
+
+        Dentro de una faceta, una lista es OR ({'all': [...]} pide todos los valores);
+        entre facetas es AND. Cada texto coincide con los valores que lo contienen.
+        """
+        facet_bitmaps = []
+        for facet, clauses in normalize_filters(filters).items():
+            index = self.facets[facet]
+            if 'any' in clauses:
+                facet_bitmaps.append(np.bitwise_or.reduce([index.bitmap(text) for text in clauses['any']]))
+            if 'all' in clauses:
+                facet_bitmaps.append(np.bitwise_and.reduce([index.bitmap(text) for text in clauses['all']]))
+        if not facet_bitmaps:
+            return None
+        return np.bitwise_and.reduce(facet_bitmaps)
+
+    def select(self, filters: Mapping[str, FacetFilter]) -> Optional[np.ndarray]:
+        """Máscara booleana (una posición por documento) de los candidatos; None si no hay filtros"""
+        bitmap = self.bitmap(filters)
+        if bitmap is None:
+            return None
+        return np.unpackbits(bitmap, count=self.n_docs).astype(bool)
@@ -0,0 +1,166 @@
+"""
+Sub-índices TF-IDF por campo con pesos elegidos al consultar.
+
+``create_search_index.py`` arma el TF-IDF principal con un solo texto por
+documento (título x3, href, materias, autores, lugares y fechas): cambiar el
+peso de un campo obliga a reconstruir. Aquí cada campo tiene su propia matriz
+documentos x términos sobre el MISMO vocabulario e idf del índice principal
+(la consulta se vectoriza una vez con ``TfidfIndex.transform``), y el puntaje
+es la suma ponderada de los productos dispersos de cada campo:
+
+    puntaje(d) = sum_f peso_f * coseno(consulta, campo_f(d))
+
+Los pesos llegan con cada solicitud ("sólo autores", "más peso a lugares").
+En disco es un directorio ``field_index/`` con un ``manifest.json`` y los
+postings (CSC) de cada campo en ``.npy`` abiertos con mmap, atados al
+``build_id`` del TF-IDF principal.
+"""
+
+import json
+import os
+from typing import Dict, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import scipy.sparse as sp
+
+from .tfidf_engine import SparseTopKScorer, l2_normalize_rows, select_top_k
+
+
+FORMAT = 'tfidf-fields'
+FORMAT_VERSION = 1
+
+FIELDS = ('title', 'slug', 'subject', 'creator', 'coverage', 'date')
+
+# Pesos que reproducen el texto único del índice principal (título repetido 3 veces)
+DEFAULT_FIELD_WEIGHTS = {'title': 3.0, 'slug': 1.0, 'subject': 1.0, 'creator': 1.0, 'coverage': 1.0, 'date': 1.0}
+
+# Pesos de una solicitud: lista de campos (sólo esos, con su peso por defecto) o {campo: peso}
+FieldWeights = Union[str, Sequence[str], Mapping[str, float]]
+
+
+def normalize_field_weights(spec: Optional[FieldWeights],
+                            defaults: Mapping[str, float] = DEFAULT_FIELD_WEIGHTS) -> Dict[str, float]:
+    """Valida y lleva los pesos a {campo: peso > 0}; {} si no se pidieron; ValueError si son inválidos.
+
+    ['creator'] busca sólo en autores; {'coverage': 3} sube lugares y deja el resto por
+    defecto; {'title': 0} excluye títulos.
+    """
+    if not spec:
+        return {}
+    if isinstance(spec, str):
+        # Query string de GET: fields=creator,coverage
+        spec = [field.strip() for field in spec.split(',') if field.strip()]
+    if isinstance(spec, Mapping):
+        weights = dict(defaults)
+        overrides = spec
+    elif isinstance(spec, (list, tuple)):
+        weights = {}
+        overrides = {}
+        for field in spec:
+            if not isinstance(field, str):
+                raise ValueError("fields debe ser una lista de campos o un objeto {campo: peso}")
+            overrides[field] = defaults.get(field, 1.0)
+    else:
+        raise ValueError("fields debe ser una lista de campos o un objeto {campo: peso}")
+    unknown = set(overrides) - set(FIELDS)
+    if unknown:
+        raise ValueError(f"Campo desconocido: {', '.join(sorted(unknown))} (válidos: {', '.join(FIELDS)})")
+    for field, weight in overrides.items():
+        if isinstance(weight, bool) or not isinstance(weight, (int, float)) or weight < 0:
+            raise ValueError(f"El peso de {field} debe ser un número >= 0")
+        weights[field] = float(weight)
+    weights = {field: weight for field, weight in weights.items() if weight > 0}
+    if not weights:
+        raise ValueError("Al menos un campo debe tener peso > 0")
+    return weights
+
+
+class FieldIndex:
+    """Un SparseTopKScorer por campo (vocabulario compartido); puntaje = suma ponderada"""
+
+    def __init__(self, postings: Mapping[str, sp.csc_matrix], build_id: str):
+        self.postings = dict(postings)
+        self.build_id = build_id
+        self.scorers = {field: SparseTopKScorer.from_normalized_csc(csc) for field, csc in self.postings.items()}
+
+    @property
+    def shape(self):
+        """(documentos, términos)"""
+        return next(iter(self.postings.values())).shape
+
+    @classmethod
+    def from_matrices(cls, matrices: Mapping[str, sp.spmatrix], build_id: str) -> 'FieldIndex':
+        """Desde matrices documentos x términos por campo (p. ej. vectorizer.transform de cada campo)"""
+        postings = {}
+        for field, matrix in matrices.items():
+            csc = l2_normalize_rows(matrix).tocsc()
+            csc.sort_indices()
+            csc.data = csc.data.astype(np.float32)
+            csc.indices = csc.indices.astype(np.int32)
+            csc.indptr = csc.indptr.astype(np.int32)
+            postings[field] = csc
+        return cls(postings, build_id)
+
+    def save(self, directory: str) -> None:
+        """Escribe cada arreglo vía archivo temporal + rename; el manifiesto va al final"""
+        os.makedirs(directory, exist_ok=True)
+        files = {}
+        for field, csc in self.postings.items():
+            for name in ('data', 'indices', 'indptr'):
+                filename = f'{field}_{name}.npy'
+                path = os.path.join(directory, filename)
+                with open(f'{path}.tmp', 'wb') as f:
+                    np.save(f, np.ascontiguousarray(getattr(csc, name)))
+                os.replace(f'{path}.tmp', path)
+                files[f'{field}_{name}'] = filename
+
+        n_docs, n_terms = self.shape
+        manifest = {
+            'format': FORMAT,
+            'version': FORMAT_VERSION,
+            'build_id': self.build_id,
+            'n_docs': n_docs,
+            'n_terms': n_terms,
+            'fields': {field: int(csc.nnz) for field, csc in self.postings.items()},
+            'files': files,
+        }
+        path = os.path.join(directory, 'manifest.json')
+        with open(f'{path}.tmp', 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(f'{path}.tmp', path)
+
+    @classmethod
+    def open(cls, directory: str) -> 'FieldIndex':
+        """Abre los postings de cada campo con mmap (sin copiar arreglos)"""
+        with open(os.path.join(directory, 'manifest.json'), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('format') != FORMAT or manifest.get('version') != FORMAT_VERSION:
+            raise ValueError(f"{directory}: formato {manifest.get('format')} v{manifest.get('version')} no soportado")
+
+        shape = (manifest['n_docs'], manifest['n_terms'])
+        postings = {}
+        for field, nnz in manifest['fields'].items():
+            data, indices, indptr = (np.load(os.path.join(directory, manifest['files'][f'{field}_{name}']), mmap_mode='r')
+                                     for name in ('data', 'indices', 'indptr'))
+            if len(indptr) != shape[1] + 1 or len(data) != nnz:
+                raise ValueError(f"{directory}: los arreglos de {field} no coinciden con el manifiesto")
+            postings[field] = sp.csc_matrix((data, indices, indptr), shape=shape)
+        return cls(postings, manifest['build_id'])
+
+    def score(self, query_vector, weights: Mapping[str, float],
+              allowed: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Suma ponderada de los puntajes por campo (sólo documentos con algún término en esos campos)"""
+        parts = [(ids, scores * np.float32(weight))
+                 for field, weight in weights.items() if weight > 0 and field in self.scorers
+                 for ids, scores in [self.scorers[field].score(query_vector, allowed)]]
+        if not parts:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        ids, inverse = np.unique(np.concatenate([ids for ids, _ in parts]), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate([scores for _, scores in parts])).astype(np.float32)
+        return ids, scores
+
+    def top_k(self, query_vector, k: int, weights: Mapping[str, float], min_score: float = 0.0,
+              allowed: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Los k documentos con mayor puntaje ponderado (índices, puntajes) en orden descendente"""
+        ids, scores = self.score(query_vector, weights, allowed)
+        return select_top_k(ids, scores, k, min_score)
@@ -0,0 +1,120 @@
+"""
+Recuperación híbrida: varios recuperadores en paralelo + fusión por rango recíproco.
+
+En vez de la cascada de ``search_documents`` (el primer paso con resultados
+gana), cada recuperador (título exacto, TF-IDF, keywords, denso) aporta su
+ranking y se combinan con Reciprocal Rank Fusion (RRF) ponderada:
+
+    score(d) = sum_r  w_r / (k + rank_r(d))
+
+Cada recuperador tiene un plazo; si no responde a tiempo se descarta su
+ranking en lugar de bloquear la solicitud.
+"""
+
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+
+# Constante k de RRF (valor estándar de la literatura)
+RRF_K = 60
+
+
+@dataclass(frozen=True)
+class HybridQuery:
+    """Consulta compartida por todos los recuperadores (se normaliza una sola vez).
+    allowed: máscara opcional de documentos candidatos (filtros por faceta).
+    """
+    raw: str
+    normalized: str
+    allowed: Optional[Any] = field(default=None, compare=False)
+
+
+# Un recuperador recibe la consulta y la profundidad, y retorna ids de documento en orden
+Retriever = Callable[[HybridQuery, int], Sequence[int]]
+
+
+def reciprocal_rank_fusion(rankings: Dict[str, Sequence[int]],
+                           weights: Optional[Dict[str, float]] = None,
+                           k: int = RRF_K) -> List[Tuple[int, float]]:
+    """Fusiona rankings (nombre -> ids ordenados) en pares (doc_id, score) descendentes"""
+    weights = weights or {}
+    fused: Dict[int, float] = {}
+    for name, ranking in rankings.items():
+        weight = weights.get(name, 1.0)
+        if weight <= 0:
+            continue
+        seen = set()
+        for rank, doc_id in enumerate(ranking, start=1):
+            if doc_id in seen:
+                continue
+            seen.add(doc_id)
+            fused[doc_id] = fused.get(doc_id, 0.0) + weight / (k + rank)
+    return sorted(fused.items(), key=lambda item: (-item[1], item[0]))
+
+
+def validate_weights(overrides: Any, defaults: Dict[str, float]) -> Dict[str, float]:
+    """Pesos RRF {recuperador: peso >= 0} sobre los de defaults.
+    ValueError si no es un objeto, nombra recuperadores desconocidos o trae pesos no numéricos o negativos.
+    """
+    if not isinstance(overrides, dict):
+        raise ValueError("los pesos deben ser un objeto {recuperador: peso}")
+    unknown = set(overrides) - set(defaults)
+    if unknown:
+        raise ValueError(f"Recuperadores desconocidos: {', '.join(sorted(unknown))} (válidos: {', '.join(defaults)})")
+    weights = dict(defaults)
+    for name, weight in overrides.items():
+        if isinstance(weight, bool) or not isinstance(weight, (int, float)) or weight < 0:
+            raise ValueError(f"El peso de {name} debe ser un número >= 0")
+        weights[name] = float(weight)
+    return weights
+
+
+class HybridRetriever:
+    """Ejecuta recuperadores en paralelo (con plazo individual) y fusiona con RRF"""
+
+    def __init__(self,
+                 retrievers: Dict[str, Retriever],
+                 weights: Optional[Dict[str, float]] = None,
+                 deadlines: Optional[Dict[str, float]] = None,
+                 default_deadline: float = 0.5,
+                 rrf_k: int = RRF_K,
+                 max_workers: int = 8):
+        self.retrievers = dict(retrievers)
+        self.weights = dict(weights or {})
+        self.deadlines = dict(deadlines or {})
+        self.default_deadline = default_deadline
+        self.rrf_k = rrf_k
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='hybrid')
+
+    def retrieve(self, query: HybridQuery, depth: int) -> Dict[str, List[int]]:
+        """Rankings de cada recuperador que respondió dentro de su plazo"""
+        start = time.monotonic()
+        # Cada recuperador corre con el contexto del llamador (p. ej. la generación de índices fijada)
+        futures = {
+            name: self._executor.submit(contextvars.copy_context().run, retriever, query, depth)
+            for name, retriever in self.retrievers.items()
+            if self.weights.get(name, 1.0) > 0
+        }
+
+        rankings: Dict[str, List[int]] = {}
+        for name, future in futures.items():
+            deadline = self.deadlines.get(name, self.default_deadline)
+            remaining = max(0.0, deadline - (time.monotonic() - start))
+            try:
+                rankings[name] = list(future.result(timeout=remaining))
+            except FutureTimeout:
+                # Etapa lenta: se descarta (el hilo termina por su cuenta)
+                future.cancel()
+                print(f"⏱️ Recuperador '{name}' excedió su plazo ({deadline:.2f}s); se descarta")
+            except Exception as e:
+                print(f"⚠️ Recuperador '{name}' falló: {e}")
+        return rankings
+
+    def search(self, query: HybridQuery, top_k: int = 15, depth: Optional[int] = None) -> List[Tuple[int, float]]:
+        """Top-k fusionado: pares (doc_id, score RRF)"""
+        depth = depth or max(top_k * 3, 30)
+        rankings = self.retrieve(query, depth)
+        return reciprocal_rank_fusion(rankings, self.weights, self.rrf_k)[:top_k]
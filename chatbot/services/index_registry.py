@@ -0,0 +1,156 @@
+"""
+Registro de índices con recarga en caliente e intercambio atómico.
+
+Todos los artefactos de búsqueda (corpus, TF-IDF, LSA, BM25F, embeddings,
+categorías) forman una *generación*. Al cambiar los archivos (o por orden de
+un administrador) se carga y calienta la nueva generación en segundo plano y
+luego se publica con una sola asignación de referencia. Una solicitud en curso
+conserva la generación que tomó al empezar, así que termina sobre los índices
+viejos; las siguientes ya ven los nuevos. No se reinicia el proceso ni se
+pierden las sesiones en memoria.
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Generic, Optional, TypeVar
+
+
+T = TypeVar('T')
+
+
+class ArtifactMismatchError(RuntimeError):
+    """Un artefacto no corresponde al resto de la generación (build a medio escribir o de otro build).
+    El loader la lanza para que la recarga se aborte y siga sirviendo la generación activa.
+    """
+
+
+@dataclass(frozen=True)
+class IndexGeneration(Generic[T]):
+    """Una generación publicada: número correlativo, huella de artefactos e índices"""
+    number: int
+    version: str
+    loaded_at: float
+    indexes: T
+
+
+class IndexRegistry(Generic[T]):
+    """Mantiene la generación activa y la reemplaza cuando cambian los artefactos.
+
+    loader:      construye los índices (se ejecuta fuera del lock, en segundo plano)
+    fingerprint: huella barata de los artefactos en disco (sello del build, mtimes)
+    warmup:      opcional; se ejecuta sobre la generación nueva antes de publicarla
+    """
+
+    def __init__(self,
+                 loader: Callable[[], T],
+                 fingerprint: Callable[[], str],
+                 warmup: Optional[Callable[[T], None]] = None):
+        self._loader = loader
+        self._fingerprint = fingerprint
+        self._warmup = warmup
+        self._current: Optional[IndexGeneration[T]] = None
+        self._reload_lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.last_error: Optional[str] = None
+        self.last_reload_seconds: Optional[float] = None
+
+    @property
+    def current(self) -> IndexGeneration[T]:
+        """Generación activa (leer la referencia es atómico; no requiere lock)"""
+        if self._current is None:
+            self.reload(force=True)
+        return self._current
+
+    @property
+    def generation(self) -> int:
+        """Número de la generación activa (0 si todavía no hay ninguna)"""
+        return self._current.number if self._current else 0
+
+    # ------------------------------------------------------------------
+    # Recarga
+    # ------------------------------------------------------------------
+
+    def is_stale(self) -> bool:
+        """True si los artefactos en disco cambiaron respecto de la generación activa"""
+        return self._current is None or self._fingerprint() != self._current.version
+
+    def reload(self, force: bool = False) -> bool:
+        """Carga, calienta y publica una generación nueva. Retorna True si hubo intercambio.
+
+        Si otra recarga está en curso, no hace nada. Si la carga falla, la
+        generación activa sigue sirviendo y el error queda en last_error.
+        """
+        if not self._reload_lock.acquire(blocking=self._current is None):
+            return False
+        try:
+            if not force and not self.is_stale():
+                return False
+
+            start = time.monotonic()
+            version = self._fingerprint()
+            try:
+                indexes = self._loader()
+                if self._warmup is not None:
+                    self._warmup(indexes)
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                print(f"❌ Recarga de índices fallida (se mantiene la generación actual): {self.last_error}")
+                if self._current is None:
+                    raise
+                return False
+
+            number = self._current.number + 1 if self._current else 1
+            # Intercambio atómico: una sola asignación de referencia
+            self._current = IndexGeneration(number, version, time.time(), indexes)
+            self.last_error = None
+            self.last_reload_seconds = time.monotonic() - start
+            print(f"🔁 Índices: generación {number} activa ({version}, {self.last_reload_seconds:.2f}s)")
+            return True
+        finally:
+            self._reload_lock.release()
+
+    def reload_async(self, force: bool = False) -> bool:
+        """Lanza la recarga en un hilo de fondo. Retorna False si ya había una en curso."""
+        if self._reload_lock.locked():
+            return False
+        threading.Thread(target=self.reload, kwargs={'force': force}, name='index-reload', daemon=True).start()
+        return True
+
+    # ------------------------------------------------------------------
+    # Vigilancia de artefactos
+    # ------------------------------------------------------------------
+
+    def start_watcher(self, interval: float) -> None:
+        """Revisa la huella de los artefactos cada interval segundos y recarga si cambió"""
+        if interval <= 0 or (self._watcher is not None and self._watcher.is_alive()):
+            return
+        self._stop.clear()
+
+        def watch():
+            while not self._stop.wait(interval):
+                try:
+                    if self.is_stale():
+                        self.reload()
+                except Exception as e:
+                    self.last_error = f"{type(e).__name__}: {e}"
+                    print(f"⚠️ Vigilancia de índices: {self.last_error}")
+
+        self._watcher = threading.Thread(target=watch, name='index-watcher', daemon=True)
+        self._watcher.start()
+
+    def stop_watcher(self) -> None:
+        self._stop.set()
+
+    def status(self) -> Dict[str, Any]:
+        current = self._current
+        return {
+            'generation': current.number if current else 0,
+            'version': current.version if current else None,
+            'loaded_at': current.loaded_at if current else None,
+            'reloading': self._reload_lock.locked(),
+            'watching': self._watcher is not None and self._watcher.is_alive() and not self._stop.is_set(),
+            'last_reload_seconds': self.last_reload_seconds,
+            'last_error': self.last_error,
+        }
@@ -0,0 +1,76 @@
+"""
+Paginación por cursor sobre listas rankeadas.
+
+La primera página de una consulta rankea una lista más profunda que la página
+(ids y puntajes, sin documentos) y la guarda en un cache acotado bajo la clave
+de la consulta. El cursor es opaco: codifica esa clave y el desplazamiento de la
+siguiente página. Pedir la página 2 sólo rebana la lista guardada y materializa
+esos documentos; no se vuelve a puntuar. La lista recuerda la generación de
+índices con que se rankeó, así sus ids siguen apuntando a los mismos
+documentos aunque entre tanto se recarguen los índices.
+"""
+
+import base64
+import hashlib
+import json
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+
+class CursorError(ValueError):
+    """Cursor mal formado o cuya lista rankeada ya salió del cache"""
+
+
+@dataclass(frozen=True)
+class RankedList:
+    """Hits (doc_id, score, match_type) de una consulta, en orden, y su generación de índices"""
+    key: str
+    hits: Tuple[Tuple[int, float, str], ...]
+    generation: Any
+    # Calcula la distribución por faceta de todos los documentos que cumplen la consulta (no sólo
+    # de los hits); se invoca recién cuando alguien pide las facetas
+    count_facets: Optional[Callable[[], Dict[str, Any]]] = field(default=None, repr=False, compare=False)
+
+    def __len__(self) -> int:
+        return len(self.hits)
+
+    @cached_property
+    def facets(self) -> Optional[Dict[str, Any]]:
+        """Facetas de la lista: se calculan la primera vez que se piden y quedan guardadas con ella"""
+        if self.count_facets is None:
+            return None
+        facets = self.count_facets()
+        # Suelta la máscara de candidatos y demás estado que retenía el cálculo
+        object.__setattr__(self, 'count_facets', None)
+        return facets
+
+    def page(self, offset: int, size: int) -> List[Tuple[int, float, str]]:
+        return list(self.hits[offset:offset + size])
+
+    def next_cursor(self, offset: int, size: int) -> Optional[str]:
+        """Cursor de la página siguiente, o None si ésta es la última"""
+        return encode_cursor(self.key, offset + size) if offset + size < len(self.hits) else None
+
+
+def ranking_key(parts: Hashable) -> str:
+    """Clave corta y estable de una consulta (texto, modo, filtros, años, generación)"""
+    return hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()[:16]
+
+
+def encode_cursor(key: str, offset: int) -> str:
+    payload = json.dumps({'k': key, 'o': offset}, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """(clave de la lista rankeada, desplazamiento); CursorError si el cursor es inválido"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        key, offset = payload['k'], payload['o']
+    except (AttributeError, TypeError, ValueError, KeyError):
+        raise CursorError("Cursor inválido")
+    if not isinstance(key, str) or not isinstance(offset, int) or isinstance(offset, bool) or offset < 0:
+        raise CursorError("Cursor inválido")
+    return key, offset
@@ -0,0 +1,164 @@
+"""
+Índice posicional para frases entre comillas y consultas NEAR/k.
+
+Reemplaza la aproximación de frases con n-gramas del TfidfVectorizer
+(``ngram_range=(1, 3)``). Para cada término se guardan los documentos que lo
+contienen y, por documento, las posiciones de sus apariciones (estilo CSR en
+dos niveles: término -> postings -> posiciones). Cada valor de campo (título,
+una materia, un autor...) se indexa separado del siguiente por un hueco de
+posiciones, así una frase o un NEAR nunca cruza de un valor al otro.
+
+Una frase "consejo de gabinete" se resuelve sólo sobre los documentos que
+tienen los tres términos: las posiciones se codifican como
+``doc * STRIDE + posición - i`` (i = lugar del término en la frase) y la
+intersección de esos arreglos son los inicios exactos de la frase. NEAR/k usa
+búsqueda binaria de cada posición de un término en las del otro.
+"""
+
+import re
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+# Posiciones vacías entre valores de campo (mayor que cualquier k de NEAR/k)
+FIELD_GAP = 64
+
+# Las posiciones de un documento nunca llegan a STRIDE: doc * STRIDE + pos no se mezcla entre documentos
+STRIDE = np.int64(1) << 32
+
+# Distancia de "a NEAR b" sin /k
+DEFAULT_NEAR = 5
+
+_PHRASE_RE = re.compile(r'["“”«»]([^"“”«»]+)["“”«»]')
+_NEAR_RE = re.compile(r'([\w-]+)\s+NEAR(?:/(\d+))?\s+([\w-]+)', re.IGNORECASE)
+
+
+def extract_proximity(query: str) -> Tuple[str, List[str], List[Tuple[str, str, int]]]:
+    """Separa frases y NEAR de la consulta: ('"consejo de gabinete" 1990') ->
+    ('consejo de gabinete 1990', ['consejo de gabinete'], []).
+
+    El texto retornado conserva las palabras (para puntuar) sin comillas ni operadores.
+    """
+    phrases = [match.group(1).strip() for match in _PHRASE_RE.finditer(query) if match.group(1).strip()]
+    text = _PHRASE_RE.sub(lambda match: f' {match.group(1)} ', query)
+    nears = [(match.group(1), match.group(3), min(int(match.group(2) or DEFAULT_NEAR), FIELD_GAP - 1))
+             for match in _NEAR_RE.finditer(text)]
+    text = _NEAR_RE.sub(lambda match: f'{match.group(1)} {match.group(3)}', text)
+    return ' '.join(text.split()), phrases, nears
+
+
+class PositionalIndex:
+    """Postings por término (doc_ids) con sus posiciones por documento"""
+
+    def __init__(self, vocabulary: Sequence[str], term_indptr: np.ndarray, doc_ids: np.ndarray,
+                 position_indptr: np.ndarray, positions: np.ndarray, n_docs: int):
+        self.vocabulary = {term: i for i, term in enumerate(vocabulary)}
+        self.term_indptr = term_indptr
+        self.doc_ids = doc_ids
+        self.position_indptr = position_indptr
+        self.positions = positions
+        self.n_docs = n_docs
+
+    @classmethod
+    def build(cls, n_docs: int, spans: Iterable[Tuple[int, Sequence[str]]]) -> 'PositionalIndex':
+        """Desde (doc_id, tokens) por valor de campo, en el orden en que se indexan por documento"""
+        vocabulary = {}
+        next_position = np.zeros(n_docs, dtype=np.int64)
+        terms, docs, positions = [], [], []
+        for doc_id, tokens in spans:
+            start = int(next_position[doc_id])
+            for offset, token in enumerate(tokens):
+                terms.append(vocabulary.setdefault(token, len(vocabulary)))
+                docs.append(doc_id)
+                positions.append(start + offset)
+            next_position[doc_id] = start + len(tokens) + FIELD_GAP
+
+        # Vocabulario ordenado; postings ordenados por (término, documento, posición)
+        sorted_terms = sorted(vocabulary)
+        remap = np.empty(len(vocabulary), dtype=np.int64)
+        remap[[vocabulary[term] for term in sorted_terms]] = np.arange(len(sorted_terms))
+        terms = remap[np.asarray(terms, dtype=np.int64)] if terms else np.empty(0, dtype=np.int64)
+        docs = np.asarray(docs, dtype=np.int64)
+        positions = np.asarray(positions, dtype=np.int64)
+        order = np.lexsort((positions, docs, terms))
+        terms, docs, positions = terms[order], docs[order], positions[order]
+
+        keys = terms * max(n_docs, 1) + docs
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else np.empty(0, dtype=np.int64)
+        position_indptr = np.r_[starts, len(keys)].astype(np.int64)
+        term_indptr = np.searchsorted(terms[starts], np.arange(len(sorted_terms) + 1)).astype(np.int64)
+        return cls(sorted_terms, term_indptr, docs[starts].astype(np.int32),
+                   position_indptr, positions.astype(np.int32), n_docs)
+
+    def __len__(self) -> int:
+        return self.n_docs
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    def docs(self, term: str) -> np.ndarray:
+        """Ids (ascendentes) de los documentos que contienen el término"""
+        term_id = self.vocabulary.get(term)
+        if term_id is None:
+            return np.empty(0, dtype=np.int32)
+        return self.doc_ids[self.term_indptr[term_id]:self.term_indptr[term_id + 1]]
+
+    def _keys(self, term: str, candidates: np.ndarray) -> np.ndarray:
+        """doc * STRIDE + posición de cada aparición del término en los candidatos (ordenado)"""
+        term_id = self.vocabulary[term]
+        lo = self.term_indptr[term_id]
+        rows = lo + np.flatnonzero(np.isin(self.doc_ids[lo:self.term_indptr[term_id + 1]], candidates))
+        starts = self.position_indptr[rows]
+        lengths = self.position_indptr[rows + 1] - starts
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        return np.repeat(self.doc_ids[rows].astype(np.int64), lengths) * STRIDE + self.positions[offsets]
+
+    def _candidates(self, terms: Sequence[str]) -> np.ndarray:
+        """Documentos con todos los términos (intersección desde el más raro)"""
+        postings = sorted((self.docs(term) for term in set(terms)), key=len)
+        if not postings:
+            return np.empty(0, dtype=np.int32)
+        candidates = postings[0]
+        for docs in postings[1:]:
+            candidates = np.intersect1d(candidates, docs, assume_unique=True)
+        return candidates
+
+    def phrase_docs(self, terms: Sequence[str]) -> np.ndarray:
+        """Documentos con los términos consecutivos y en orden"""
+        candidates = self._candidates(terms)
+        if len(terms) <= 1 or len(candidates) == 0:
+            return candidates
+        starts = self._keys(terms[0], candidates)
+        for i, term in enumerate(terms[1:], 1):
+            starts = np.intersect1d(starts, self._keys(term, candidates) - i, assume_unique=True)
+            if len(starts) == 0:
+                break
+        return np.unique(starts // STRIDE).astype(np.int32)
+
+    def near_docs(self, first: str, second: str, distance: int) -> np.ndarray:
+        """Documentos donde los términos aparecen a lo más distance posiciones de distancia"""
+        candidates = self._candidates([first, second])
+        if len(candidates) == 0 or first == second:
+            return candidates
+        first_keys = self._keys(first, candidates)
+        second_keys = self._keys(second, candidates)
+        lo = np.searchsorted(first_keys, second_keys - distance, side='left')
+        hi = np.searchsorted(first_keys, second_keys + distance, side='right')
+        return np.unique(second_keys[hi > lo] // STRIDE).astype(np.int32)
+
+    def mask(self, phrases: Sequence[Sequence[str]] = (),
+             nears: Sequence[Tuple[str, str, int]] = ()) -> Optional[np.ndarray]:
+        """Máscara de los documentos que cumplen todas las frases y NEAR (ya analizados); None si no hay"""
+        constraints = [self.phrase_docs(terms) for terms in phrases if terms]
+        constraints += [self.near_docs(first, second, distance) for first, second, distance in nears]
+        if not constraints:
+            return None
+        mask = np.zeros(self.n_docs, dtype=bool)
+        mask[constraints[0]] = True
+        for docs in constraints[1:]:
+            keep = np.zeros(self.n_docs, dtype=bool)
+            keep[docs] = True
+            mask &= keep
+        return mask
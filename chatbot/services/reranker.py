@@ -0,0 +1,156 @@
+"""
+Segunda etapa de ranking sobre los mejores candidatos de la primera.
+
+La primera etapa (título exacto, TF-IDF/BM25F, semántica o híbrida) entrega
+hasta ``RERANK_DEPTH`` candidatos; aquí se les calcula una matriz de rasgos
+baratos (candidatos x rasgos) y el puntaje final es esa matriz por un vector
+de pesos:
+
+- ``first_stage``: puntaje de la primera etapa (min-max entre los candidatos);
+- ``title_coverage``: fracción de los términos de la consulta que están en el título;
+- ``exact_phrase``: la consulta completa aparece tal cual en algún campo;
+- ``subject_match`` / ``creator_match`` / ``coverage_match``: fracción de
+  términos en materias, autores y lugares;
+- ``year_match``: el documento tiene algún año de los que nombra la consulta;
+- ``slug_match``: fracción de términos en la última parte del href.
+
+Los términos de cada campo se guardan por documento como ids enteros (CSR,
+sin repetir) sobre un vocabulario común, así la cobertura de N candidatos es
+un ``np.isin`` y un ``bincount``. Los pesos se leen de un archivo JSON
+(``reranker_weights.json``) y viajan con la generación de índices.
+"""
+
+import json
+import os
+from typing import Dict, Iterable, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+# Orden de las columnas de la matriz de rasgos
+FEATURES = ('first_stage', 'title_coverage', 'exact_phrase', 'subject_match',
+            'creator_match', 'coverage_match', 'year_match', 'slug_match')
+
+# Pesos sin archivo de configuración (o para los rasgos que el archivo omite)
+DEFAULT_WEIGHTS = {
+    'first_stage': 1.0,
+    'title_coverage': 0.6,
+    'exact_phrase': 0.4,
+    'subject_match': 0.3,
+    'creator_match': 0.2,
+    'coverage_match': 0.15,
+    'year_match': 0.3,
+    'slug_match': 0.1,
+}
+
+# Campo de términos -> rasgo de cobertura
+FIELD_FEATURES = {
+    'title': 'title_coverage',
+    'subject': 'subject_match',
+    'creator': 'creator_match',
+    'coverage': 'coverage_match',
+    'slug': 'slug_match',
+}
+
+
+def load_weights(path: str) -> Dict[str, float]:
+    """Pesos desde un JSON {rasgo: peso}; DEFAULT_WEIGHTS si el archivo no existe.
+    ValueError si nombra rasgos desconocidos o pesos no numéricos.
+    """
+    weights = dict(DEFAULT_WEIGHTS)
+    if not os.path.exists(path):
+        return weights
+    with open(path, 'r', encoding='utf-8') as f:
+        overrides = json.load(f)
+    if not isinstance(overrides, dict):
+        raise ValueError(f"{path} debe ser un objeto {{rasgo: peso}}")
+    unknown = set(overrides) - set(FEATURES)
+    if unknown:
+        raise ValueError(f"Rasgos desconocidos en {path}: {', '.join(sorted(unknown))} (válidos: {', '.join(FEATURES)})")
+    for feature, weight in overrides.items():
+        if isinstance(weight, bool) or not isinstance(weight, (int, float)):
+            raise ValueError(f"El peso de {feature} debe ser un número")
+        weights[feature] = float(weight)
+    return weights
+
+
+class FieldTerms:
+    """Términos (ids, sin repetir) de cada documento en cada campo, sobre un vocabulario común"""
+
+    def __init__(self, vocabulary: Mapping[str, int], fields: Dict[str, Tuple[np.ndarray, np.ndarray]], n_docs: int):
+        self.vocabulary = vocabulary
+        self.fields = fields
+        self.n_docs = n_docs
+
+    @classmethod
+    def build(cls, n_docs: int, field_spans: Mapping[str, Iterable[Tuple[int, Sequence[str]]]]) -> 'FieldTerms':
+        """Desde {campo: (doc_id, tokens)}; un documento puede aparecer varias veces por campo"""
+        vocabulary: Dict[str, int] = {}
+        fields = {}
+        for field, spans in field_spans.items():
+            docs, terms = [], []
+            for doc_id, tokens in spans:
+                for token in tokens:
+                    docs.append(doc_id)
+                    terms.append(vocabulary.setdefault(token, len(vocabulary)))
+            pairs = np.unique(np.asarray([docs, terms], dtype=np.int64).reshape(2, -1), axis=1)
+            indptr = np.zeros(n_docs + 1, dtype=np.int64)
+            np.cumsum(np.bincount(pairs[0], minlength=n_docs), out=indptr[1:])
+            fields[field] = (indptr, pairs[1].astype(np.int32))
+        return cls(vocabulary, fields, n_docs)
+
+    def term_ids(self, terms: Sequence[str]) -> np.ndarray:
+        """Ids de los términos conocidos (los desconocidos no coinciden en ningún campo)"""
+        return np.asarray([self.vocabulary[t] for t in terms if t in self.vocabulary], dtype=np.int32)
+
+    def matches(self, field: str, doc_ids: np.ndarray, term_ids: np.ndarray) -> np.ndarray:
+        """Cuántos de los términos tiene cada documento en el campo (uno por doc_id)"""
+        indptr, values = self.fields[field]
+        starts = indptr[doc_ids]
+        lengths = indptr[doc_ids + 1] - starts
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        rows = np.repeat(np.arange(len(doc_ids)), lengths)
+        return np.bincount(rows[np.isin(values[offsets], term_ids)], minlength=len(doc_ids))
+
+
+class Reranker:
+    """Puntaje lineal (matriz de rasgos x pesos) sobre los términos por campo de una generación"""
+
+    def __init__(self, field_terms: FieldTerms, weights: Optional[Mapping[str, float]] = None):
+        self.field_terms = field_terms
+        self.weights = dict(DEFAULT_WEIGHTS if weights is None else weights)
+        self.weight_vector = np.asarray([self.weights.get(f, 0.0) for f in FEATURES], dtype=np.float32)
+
+    def features(self, terms: Sequence[str], doc_ids: np.ndarray, first_stage: np.ndarray,
+                 exact_phrase: Optional[np.ndarray] = None, year_match: Optional[np.ndarray] = None) -> np.ndarray:
+        """Matriz (candidatos x FEATURES) en float32.
+
+        terms: términos de la consulta ya analizados; first_stage: puntajes de la primera etapa;
+        exact_phrase / year_match: banderas por candidato calculadas con otros índices (o None).
+        """
+        doc_ids = np.asarray(doc_ids, dtype=np.int64)
+        matrix = np.zeros((len(doc_ids), len(FEATURES)), dtype=np.float32)
+        first_stage = np.asarray(first_stage, dtype=np.float32)
+        if len(first_stage):
+            # Min-max entre los candidatos: los puntajes de una etapa suelen venir comprimidos (0.9-1.0)
+            low, high = first_stage.min(), first_stage.max()
+            matrix[:, FEATURES.index('first_stage')] = (first_stage - low) / (high - low) if high > low else 1.0
+        terms = list(dict.fromkeys(terms))
+        term_ids = self.field_terms.term_ids(terms)
+        if terms and len(term_ids):
+            for field, feature in FIELD_FEATURES.items():
+                matrix[:, FEATURES.index(feature)] = self.field_terms.matches(field, doc_ids, term_ids) / len(terms)
+        if exact_phrase is not None:
+            matrix[:, FEATURES.index('exact_phrase')] = exact_phrase
+        if year_match is not None:
+            matrix[:, FEATURES.index('year_match')] = year_match
+        return matrix
+
+    def score(self, features: np.ndarray) -> np.ndarray:
+        return features @ self.weight_vector
+
+    def rerank(self, features: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(posiciones de los top_k candidatos en el nuevo orden, sus puntajes); empates: orden original"""
+        scores = self.score(features)
+        order = np.argsort(-scores, kind='stable')[:top_k]
+        return order, scores[order]
@@ -0,0 +1,243 @@
+"""
+Índice por segmentos: base congelada + deltas de solo agregado + tombstones.
+
+Agregar unas pocas descripciones nuevas no debería obligar a reajustar el
+TF-IDF sobre todo el corpus. Los documentos nuevos van a *segmentos delta*
+pequeños, vectorizados con el vocabulario y los idf fijos de la base
+(``TfidfIndex.transform``); los borrados se marcan con *tombstones* (ids
+globales). Las búsquedas recorren todos los segmentos y descartan los
+borrados; la compactación (``update_search_index.py compact``) reconstruye
+la base con los documentos vivos y vacía los segmentos.
+
+Disposición en disco::
+
+    segments/
+        manifest.json        base a la que pertenecen, deltas en orden, tombstones
+        delta-000001/
+            corpus.bin       documentos del delta (DocumentStore)
+            data.npy         postings TF-IDF (CSC documentos x términos)
+            indices.npy
+            indptr.npy
+            segment.json
+
+Los ids globales son los de la base seguidos por los de cada delta en orden.
+"""
+
+import json
+import os
+import shutil
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import scipy.sparse as sp
+
+from .document_store import ChainedDocumentStore, DocumentStore
+from .tfidf_engine import SparseTopKScorer, select_top_k
+from .tfidf_index import TfidfIndex
+
+
+FORMAT = 'segments'
+FORMAT_VERSION = 1
+MANIFEST = 'manifest.json'
+
+
+def _write_json(path: str, data: Dict[str, Any]) -> None:
+    with open(f'{path}.tmp', 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(f'{path}.tmp', path)
+
+
+class DeltaSegment:
+    """Documentos agregados después de la base, con sus postings TF-IDF"""
+
+    def __init__(self, name: str, documents: DocumentStore, postings: sp.csc_matrix):
+        self.name = name
+        self.documents = documents
+        self.postings = postings
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    @classmethod
+    def build(cls, name: str, documents: Sequence[Dict[str, Any]], texts: Sequence[str],
+              base: TfidfIndex) -> 'DeltaSegment':
+        """Vectoriza los textos con el vocabulario/idf de la base (sin reajustar nada)"""
+        postings = base.transform(texts).astype(np.float32).tocsc()
+        postings.sort_indices()
+        postings.indices = postings.indices.astype(np.int32)
+        postings.indptr = postings.indptr.astype(np.int32)
+        return cls(name, DocumentStore(documents), postings)
+
+    def save(self, directory: str) -> None:
+        os.makedirs(directory, exist_ok=True)
+        self.documents.save(os.path.join(directory, 'corpus.bin'))
+        for name in ('data', 'indices', 'indptr'):
+            np.save(os.path.join(directory, f'{name}.npy'), getattr(self.postings, name))
+        _write_json(os.path.join(directory, 'segment.json'), {
+            'n_docs': len(self), 'n_terms': self.postings.shape[1], 'nnz': int(self.postings.nnz),
+        })
+
+    @classmethod
+    def open(cls, directory: str, name: str) -> 'DeltaSegment':
+        with open(os.path.join(directory, 'segment.json'), 'r', encoding='utf-8') as f:
+            info = json.load(f)
+        arrays = [np.load(os.path.join(directory, f'{part}.npy'), mmap_mode='r') for part in ('data', 'indices', 'indptr')]
+        postings = sp.csc_matrix(tuple(arrays), shape=(info['n_docs'], info['n_terms']))
+        return cls(name, DocumentStore.open(os.path.join(directory, 'corpus.bin')), postings)
+
+
+class SegmentedScorer:
+    """Top-k TF-IDF sobre la base y los deltas (ids globales), sin documentos borrados"""
+
+    def __init__(self, scorers: Sequence[SparseTopKScorer], offsets: Sequence[int], deleted: np.ndarray):
+        self.scorers = list(scorers)
+        self.offsets = list(offsets)
+        self.deleted = np.asarray(deleted, dtype=np.int64)
+        self.n_docs = sum(scorer.n_docs for scorer in self.scorers)
+
+    def score(self, query_vector, allowed: Optional[np.ndarray] = None):
+        parts = [(ids + offset, scores) for scorer, offset in zip(self.scorers, self.offsets)
+                 for ids, scores in [scorer.score(
+                     query_vector, None if allowed is None else allowed[offset:offset + scorer.n_docs])]]
+        ids = np.concatenate([ids for ids, _ in parts])
+        scores = np.concatenate([scores for _, scores in parts])
+        live = ~np.isin(ids, self.deleted)
+        return ids[live], scores[live]
+
+    def top_k(self, query_vector, k: int, min_score: float = 0.0, allowed: Optional[np.ndarray] = None):
+        ids, scores = self.score(query_vector, allowed)
+        return select_top_k(ids, scores, k, min_score)
+
+    def top_k_batch(self, query_matrix, k: int, min_score: float = 0.0):
+        # Cada segmento aporta k + (sus borrados) candidatos: el top-k vivo queda incluido
+        per_segment = []
+        for scorer, offset in zip(self.scorers, self.offsets):
+            n_deleted = int(np.count_nonzero((self.deleted >= offset) & (self.deleted < offset + scorer.n_docs)))
+            per_segment.append([(ids + offset, scores)
+                                for ids, scores in scorer.top_k_batch(query_matrix, k + n_deleted, min_score)])
+        results = []
+        for row in zip(*per_segment):
+            ids = np.concatenate([ids for ids, _ in row])
+            scores = np.concatenate([scores for _, scores in row])
+            live = ~np.isin(ids, self.deleted)
+            results.append(select_top_k(ids[live], scores[live], k, min_score))
+        return results
+
+
+class SegmentSet:
+    """Deltas y tombstones atados a una construcción de la base (build_id)"""
+
+    def __init__(self, directory: str, base_build: str, base_docs: int,
+                 deltas: Optional[List[DeltaSegment]] = None, deleted: Sequence[int] = ()):
+        self.directory = directory
+        self.base_build = base_build
+        self.base_docs = base_docs
+        self.deltas = deltas or []
+        self.deleted = np.unique(np.asarray(deleted, dtype=np.int64))
+
+    @property
+    def n_docs(self) -> int:
+        """Documentos totales (incluye borrados: sus ids siguen ocupados)"""
+        return self.base_docs + sum(len(delta) for delta in self.deltas)
+
+    @property
+    def offsets(self) -> List[int]:
+        """Id global del primer documento de la base y de cada delta"""
+        offsets = [0, self.base_docs]
+        for delta in self.deltas[:-1]:
+            offsets.append(offsets[-1] + len(delta))
+        return offsets[:len(self.deltas) + 1]
+
+    def __bool__(self) -> bool:
+        return bool(self.deltas) or len(self.deleted) > 0
+
+    # ------------------------------------------------------------------
+    # Persistencia
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def open(cls, directory: str, base: TfidfIndex) -> 'SegmentSet':
+        """Segmentos existentes de la base dada; vacío si no hay manifiesto.
+
+        ValueError si los segmentos pertenecen a otra construcción de la base.
+        """
+        path = os.path.join(directory, MANIFEST)
+        if not os.path.exists(path):
+            return cls(directory, base.build_id, base.shape[0])
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('format') != FORMAT or manifest.get('version') != FORMAT_VERSION:
+            raise ValueError(f"{path}: formato no soportado")
+        if manifest['base_build'] != base.build_id or manifest['base_docs'] != base.shape[0]:
+            raise ValueError(f"{directory} pertenece a otra construcción del índice base; compactar o borrar")
+        deltas = [DeltaSegment.open(os.path.join(directory, name), name) for name in manifest['deltas']]
+        return cls(directory, manifest['base_build'], manifest['base_docs'], deltas, manifest['tombstones'])
+
+    def save_manifest(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        _write_json(os.path.join(self.directory, MANIFEST), {
+            'format': FORMAT,
+            'version': FORMAT_VERSION,
+            'base_build': self.base_build,
+            'base_docs': self.base_docs,
+            'deltas': [delta.name for delta in self.deltas],
+            'tombstones': self.deleted.tolist(),
+            'updated_at': time.time(),
+        })
+
+    def add_documents(self, documents: Sequence[Dict[str, Any]], texts: Sequence[str],
+                      base: TfidfIndex) -> DeltaSegment:
+        """Escribe un delta nuevo y lo publica en el manifiesto (el manifiesto va al final)"""
+        number = max((int(delta.name.split('-')[-1]) for delta in self.deltas), default=0) + 1
+        delta = DeltaSegment.build(f'delta-{number:06d}', documents, texts, base)
+        delta.save(os.path.join(self.directory, delta.name))
+        self.deltas.append(delta)
+        self.save_manifest()
+        return delta
+
+    def delete(self, doc_ids: Sequence[int]) -> int:
+        """Marca ids globales como borrados; retorna cuántos eran nuevos"""
+        doc_ids = np.asarray([i for i in doc_ids if 0 <= i < self.n_docs], dtype=np.int64)
+        before = len(self.deleted)
+        self.deleted = np.union1d(self.deleted, doc_ids)
+        self.save_manifest()
+        return len(self.deleted) - before
+
+    def reset(self) -> None:
+        """Borra deltas y manifiesto (después de compactar en una base nueva)"""
+        if os.path.isdir(self.directory):
+            shutil.rmtree(self.directory)
+        self.deltas, self.deleted = [], np.empty(0, dtype=np.int64)
+
+    # ------------------------------------------------------------------
+    # Vistas combinadas
+    # ------------------------------------------------------------------
+
+    def documents(self, base_documents: DocumentStore) -> ChainedDocumentStore:
+        return ChainedDocumentStore([base_documents] + [delta.documents for delta in self.deltas], self.deleted)
+
+    def scorer(self, base_scorer: SparseTopKScorer) -> SegmentedScorer:
+        scorers = [base_scorer] + [SparseTopKScorer.from_normalized_csc(delta.postings) for delta in self.deltas]
+        return SegmentedScorer(scorers, self.offsets, self.deleted)
+
+    def delta_latent(self, projection: np.ndarray) -> np.ndarray:
+        """Proyección LSA de los documentos de los deltas (mismo espacio que la base)"""
+        if not self.deltas:
+            return np.empty((0, projection.shape[1]), dtype=np.float32)
+        return np.vstack([np.asarray(delta.postings @ projection, dtype=np.float32) for delta in self.deltas])
+
+    def live_ids(self) -> np.ndarray:
+        return np.setdiff1d(np.arange(self.n_docs, dtype=np.int64), self.deleted)
+
+    def needs_compaction(self, max_deltas: int = 8, max_ratio: float = 0.2) -> bool:
+        """Demasiados deltas o demasiados documentos fuera de la base"""
+        pending = self.n_docs - self.base_docs + len(self.deleted)
+        return len(self.deltas) > max_deltas or pending > max_ratio * max(self.base_docs, 1)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'deltas': len(self.deltas),
+            'delta_documents': self.n_docs - self.base_docs,
+            'tombstones': int(len(self.deleted)),
+        }
@@ -0,0 +1,167 @@
+"""
+Tolerancia a errores de tipeo: índice de trigramas sobre el vocabulario.
+
+Un término mal escrito ("dictadra", "allendee") no existe en el vocabulario
+TF-IDF y pesa cero en la consulta. El índice guarda, para cada trigrama de
+caracteres, los términos (vocabulario TF-IDF + palabras de títulos) que lo
+contienen. Para un término desconocido se juntan los postings de sus trigramas
+y sólo pasan los candidatos que comparten suficientes trigramas (un error de
+edición destruye a lo más 3) y cuyo largo difiere en no más de la distancia
+permitida; esos pocos se verifican con Levenshtein acotado. Gana la menor
+distancia y, a igualdad, el término más frecuente del corpus.
+
+Se construye en ``create_search_index.py`` y se guarda en ``spelling_index.npz``.
+"""
+
+from typing import AbstractSet, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .analyzer import TOKEN_PATTERN
+
+try:
+    # python-Levenshtein (ya está en requirements.txt): la misma distancia, en C
+    from Levenshtein import distance as _levenshtein
+except ImportError:
+    _levenshtein = None
+
+
+GRAM_SIZE = 3
+
+# Términos más cortos no se corrigen (demasiados vecinos a distancia 1)
+MIN_TERM_LENGTH = 4
+
+# Candidatos (los que más trigramas comparten) que se verifican con Levenshtein
+MAX_CANDIDATES = 32
+
+
+def term_grams(term: str) -> List[str]:
+    """Trigramas distintos del término con bordes marcados ('^di', 'dic', ..., 'ra$')"""
+    padded = f'^{term}$'
+    return sorted({padded[i:i + GRAM_SIZE] for i in range(len(padded) - GRAM_SIZE + 1)})
+
+
+def max_distance(term: str) -> int:
+    """Distancia de edición tolerada según el largo del término"""
+    return 1 if len(term) <= 7 else 2
+
+
+def bounded_levenshtein(a: str, b: str, limit: int) -> int:
+    """Distancia de edición entre a y b, o limit + 1 apenas se sabe que la supera"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    if _levenshtein is not None:
+        return _levenshtein(a, b, score_cutoff=limit)
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return min(previous[-1], limit + 1)
+
+
+class SpellingIndex:
+    """Postings trigrama -> ids de término (estilo CSR) + frecuencia de cada término"""
+
+    def __init__(self, terms: Sequence[str], counts: np.ndarray,
+                 grams: Sequence[str], indptr: np.ndarray, term_ids: np.ndarray):
+        self.terms = list(terms)
+        self.counts = np.asarray(counts, dtype=np.int64)
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.term_ids = np.asarray(term_ids, dtype=np.int32)
+        self._ids = {term: i for i, term in enumerate(self.terms)}
+        self._grams = {gram: i for i, gram in enumerate(grams)}
+        self._lengths = np.asarray([len(term) for term in self.terms], dtype=np.int32)
+        self._gram_counts = np.diff(np.searchsorted(np.sort(self.term_ids), np.arange(len(self.terms) + 1)))
+
+    # ------------------------------------------------------------------
+    # Construcción y persistencia
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def build(cls, term_counts: Dict[str, int]) -> 'SpellingIndex':
+        """Desde {término: frecuencia en documentos}; los términos quedan ordenados"""
+        terms = sorted(term_counts)
+        postings: Dict[str, List[int]] = {}
+        for term_id, term in enumerate(terms):
+            for gram in term_grams(term):
+                postings.setdefault(gram, []).append(term_id)
+        grams = sorted(postings)
+        indptr = np.zeros(len(grams) + 1, dtype=np.int64)
+        np.cumsum([len(postings[gram]) for gram in grams], out=indptr[1:])
+        term_ids = np.asarray([i for gram in grams for i in postings[gram]], dtype=np.int32)
+        return cls(terms, [term_counts[t] for t in terms], grams, indptr, term_ids)
+
+    def save(self, path: str) -> None:
+        np.savez(
+            path,
+            terms=np.asarray(self.terms, dtype=str),
+            counts=self.counts,
+            grams=np.asarray(sorted(self._grams, key=self._grams.get), dtype=str),
+            indptr=self.indptr,
+            term_ids=self.term_ids,
+        )
+
+    @classmethod
+    def load(cls, path: str) -> 'SpellingIndex':
+        data = np.load(path, allow_pickle=False)
+        return cls(data['terms'].tolist(), data['counts'], data['grams'].tolist(),
+                   data['indptr'], data['term_ids'])
+
+    # ------------------------------------------------------------------
+    # Corrección
+    # ------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def __contains__(self, term: str) -> bool:
+        return term in self._ids
+
+    def suggest(self, term: str, limit: Optional[int] = None) -> Optional[str]:
+        """Término del vocabulario más cercano a uno desconocido (None si es conocido o no hay)"""
+        if term in self._ids or len(term) < MIN_TERM_LENGTH or not term.isalpha():
+            return None
+        limit = max_distance(term) if limit is None else limit
+        grams = term_grams(term)
+        slices = [self.term_ids[self.indptr[g]:self.indptr[g + 1]]
+                  for g in (self._grams.get(gram) for gram in grams) if g is not None]
+        if not slices:
+            return None
+
+        candidates, shared = np.unique(np.concatenate(slices), return_counts=True)
+        # Filtro de q-gramas: k ediciones cambian a lo más 3k trigramas de cada lado
+        keep = ((shared >= np.maximum(len(grams), self._gram_counts[candidates]) - GRAM_SIZE * limit)
+                & (np.abs(self._lengths[candidates] - len(term)) <= limit))
+        order = np.lexsort((-self.counts[candidates[keep]], -shared[keep]))[:MAX_CANDIDATES]
+
+        best, best_key = None, None
+        for term_id, n_shared in zip(candidates[keep][order].tolist(), shared[keep][order].tolist()):
+            # Con una corrección a distancia d, sólo interesan candidatos a distancia <= d
+            if n_shared < len(grams) - GRAM_SIZE * limit:
+                break
+            distance = bounded_levenshtein(term, self.terms[term_id], limit)
+            key = (distance, -int(self.counts[term_id]))
+            if distance <= limit and (best_key is None or key < best_key):
+                best, best_key, limit = self.terms[term_id], key, distance
+        return best
+
+    def correct(self, text: str, keep: AbstractSet[str] = frozenset()) -> Tuple[str, Dict[str, str]]:
+        """Reemplaza en el texto (ya normalizado) los términos desconocidos con corrección.
+        keep: términos que no se corrigen aunque no estén en el vocabulario (claves de expansión).
+        Retorna (texto corregido, {original: corrección}).
+        """
+        corrections: Dict[str, str] = {}
+
+        def replace(match):
+            term = match.group(0)
+            suggestion = None if term in keep else self.suggest(term)
+            if suggestion is None:
+                return term
+            corrections[term] = suggestion
+            return suggestion
+
+        return TOKEN_PATTERN.sub(replace, text), corrections
@@ -0,0 +1,88 @@
+"""
+Palabras clave y años por título, precalculados para las sugerencias de búsqueda.
+
+``generate_search_suggestions`` recorría con ``re.findall`` el título de cada
+resultado en cada solicitud (años y palabras de 4+ letras sin stopwords). Aquí
+esos términos se extraen una sola vez al cargar la generación: cada documento
+queda como un tramo de ids enteros (estilo CSR) sobre un vocabulario común, y
+las sugerencias de un conjunto de resultados son un conteo de enteros
+(``np.unique`` con conteos), sin expresiones regulares en la solicitud.
+"""
+
+import re
+from typing import Iterable, List, Sequence
+
+import numpy as np
+
+
+# Palabras de título que no se sugieren como tema
+STOPWORDS = frozenset({'de', 'la', 'el', 'los', 'las', 'del', 'para', 'por', 'con', 'en', 'a', 'y', 'o', 'un', 'una'})
+
+_YEAR_RE = re.compile(r'\b(19\d{2}|20\d{2})\b')
+_WORD_RE = re.compile(r'\b[a-záéíóúñ]{4,}\b')
+
+
+def title_terms(title: str):
+    """(años, palabras clave) de un título, en orden de aparición"""
+    years = _YEAR_RE.findall(title)
+    words = [word for word in _WORD_RE.findall(title.lower()) if word not in STOPWORDS]
+    return years, words
+
+
+def _gather(indptr: np.ndarray, values: np.ndarray, doc_ids: np.ndarray) -> np.ndarray:
+    """Concatenación de los tramos values[indptr[d]:indptr[d + 1]] de los documentos dados, en orden"""
+    starts = indptr[doc_ids]
+    lengths = indptr[doc_ids + 1] - starts
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+    return values[offsets]
+
+
+class TitleFeatures:
+    """Ids de términos (años + palabras) y de años por documento, sobre un vocabulario común"""
+
+    def __init__(self, vocabulary: Sequence[str], term_indptr: np.ndarray, term_ids: np.ndarray,
+                 year_indptr: np.ndarray, year_ids: np.ndarray):
+        self.vocabulary = list(vocabulary)
+        self.term_indptr = term_indptr
+        self.term_ids = term_ids
+        self.year_indptr = year_indptr
+        self.year_ids = year_ids
+
+    @classmethod
+    def build(cls, titles: Iterable[str]) -> 'TitleFeatures':
+        """Desde los títulos en orden de doc_id (un título vacío no aporta términos)"""
+        vocabulary = {}
+        term_ids, term_lengths, year_ids, year_lengths = [], [], [], []
+        for title in titles:
+            years, words = title_terms(title or '')
+            ids = [vocabulary.setdefault(term, len(vocabulary)) for term in years + words]
+            term_ids.extend(ids)
+            term_lengths.append(len(ids))
+            year_ids.extend(ids[:len(years)])
+            year_lengths.append(len(years))
+        return cls(list(vocabulary),
+                   np.r_[0, np.cumsum(term_lengths, dtype=np.int64)].astype(np.int64),
+                   np.asarray(term_ids, dtype=np.int32),
+                   np.r_[0, np.cumsum(year_lengths, dtype=np.int64)].astype(np.int64),
+                   np.asarray(year_ids, dtype=np.int32))
+
+    def __len__(self) -> int:
+        return len(self.term_indptr) - 1
+
+    def _valid(self, doc_ids: Iterable[int]) -> np.ndarray:
+        doc_ids = np.fromiter(doc_ids, dtype=np.int64)
+        return doc_ids[(doc_ids >= 0) & (doc_ids < len(self))]
+
+    def common_terms(self, doc_ids: Iterable[int], limit: int = 8, min_count: int = 2) -> List[str]:
+        """Términos más frecuentes en los títulos de los documentos (empates: primero el que apareció antes)"""
+        ids = _gather(self.term_indptr, self.term_ids, self._valid(doc_ids))
+        if len(ids) == 0:
+            return []
+        unique, first, counts = np.unique(ids, return_index=True, return_counts=True)
+        order = np.lexsort((first, -counts))[:limit]
+        return [self.vocabulary[unique[i]] for i in order if counts[i] >= min_count]
+
+    def years(self, doc_ids: Iterable[int]) -> List[str]:
+        """Años (ordenados, sin repetir) que aparecen en los títulos de los documentos"""
+        ids = np.unique(_gather(self.year_indptr, self.year_ids, self._valid(doc_ids)))
+        return sorted(self.vocabulary[i] for i in ids)
@@ -0,0 +1,116 @@
+"""
+Motor de puntaje disperso top-k para el índice TF-IDF.
+
+Reemplaza ``cosine_similarity`` + ``argsort`` completo en ``search_with_tfidf``:
+la matriz se normaliza una sola vez y se guarda por columnas (CSC), de modo que
+cada consulta sólo recorre las columnas de sus propios términos y la selección
+de los mejores resultados usa ``argpartition``.
+"""
+
+from typing import List, Optional, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+
+
+def l2_normalize_rows(matrix) -> sp.csr_matrix:
+    """Normaliza las filas de una matriz dispersa (norma L2) sin densificarla"""
+    csr = sp.csr_matrix(matrix, dtype=np.float32, copy=True)
+    norms = np.sqrt(np.asarray(csr.multiply(csr).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    csr.data /= np.repeat(norms, np.diff(csr.indptr)).astype(np.float32)
+    return csr
+
+
+def select_top_k(ids: np.ndarray, scores: np.ndarray, k: int, min_score: float = 0.0) -> Tuple[np.ndarray, np.ndarray]:
+    """Top-k por argpartition; sólo se ordenan los k elegidos"""
+    keep = scores > min_score
+    ids, scores = ids[keep], scores[keep]
+    if k <= 0 or len(scores) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+    if len(scores) > k:
+        part = np.argpartition(-scores, k - 1)[:k]
+        ids, scores = ids[part], scores[part]
+    order = np.argsort(-scores, kind='stable')
+    return ids[order], scores[order]
+
+
+class SparseTopKScorer:
+    """Similitud coseno dispersa contra una matriz documento x término.
+
+    Retorna índices de documentos y puntajes; nunca copia documentos.
+    """
+
+    def __init__(self, matrix):
+        normalized = l2_normalize_rows(matrix)
+        self.n_docs, self.n_terms = normalized.shape
+        # Por columnas: cada término da acceso directo a sus documentos
+        self._csc = normalized.tocsc()
+        self._csc.sort_indices()
+
+    @classmethod
+    def from_normalized_csc(cls, csc: sp.csc_matrix) -> 'SparseTopKScorer':
+        """Usa tal cual una matriz CSC con filas ya normalizadas y postings ordenados
+        (p. ej. arreglos mmap compartidos de TfidfIndex): no copia nada."""
+        scorer = cls.__new__(cls)
+        scorer.n_docs, scorer.n_terms = csc.shape
+        scorer._csc = csc
+        return scorer
+
+    @property
+    def matrix(self) -> sp.csc_matrix:
+        """Matriz normalizada (documentos x términos, formato CSC)"""
+        return self._csc
+
+    def score(self, query_vector, allowed: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Puntajes de los documentos que comparten algún término con la consulta.
+
+        query_vector: fila dispersa 1 x n_terms (salida de vectorizer.transform).
+        allowed: máscara booleana opcional (n_docs); sólo se puntúan esos documentos.
+        """
+        query = sp.csr_matrix(query_vector)
+        terms, weights = query.indices, query.data.astype(np.float32)
+        norm = np.sqrt(np.dot(weights, weights))
+        if len(terms) == 0 or norm == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        weights = weights / norm
+
+        indptr, indices, data = self._csc.indptr, self._csc.indices, self._csc.data
+        starts, ends = indptr[terms], indptr[terms + 1]
+        lengths = ends - starts
+        if lengths.sum() == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        # Posiciones de los postings de los términos de la consulta (sin bucle Python)
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        docs = indices[offsets]
+        contributions = data[offsets] * np.repeat(weights, lengths)
+        if allowed is not None:
+            keep = allowed[docs]
+            docs, contributions = docs[keep], contributions[keep]
+
+        ids, inverse = np.unique(docs, return_inverse=True)
+        scores = np.bincount(inverse, weights=contributions).astype(np.float32)
+        return ids.astype(np.int64), scores
+
+    def top_k(self, query_vector, k: int, min_score: float = 0.0,
+              allowed: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Los k documentos más similares (índices, puntajes) en orden descendente"""
+        ids, scores = self.score(query_vector, allowed)
+        return select_top_k(ids, scores, k, min_score)
+
+    def top_k_batch(self, query_matrix, k: int, min_score: float = 0.0) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """Top-k para N consultas con un solo producto disperso matriz-matriz.
+
+        query_matrix: N x n_terms (salida de vectorizer.transform con N textos).
+        """
+        queries = l2_normalize_rows(query_matrix)
+        # (N x términos) @ (términos x docs) -> N x docs, disperso por filas
+        similarities = (queries @ self._csc.T).tocsr()
+        results = []
+        for row in range(similarities.shape[0]):
+            start, end = similarities.indptr[row], similarities.indptr[row + 1]
+            ids = similarities.indices[start:end].astype(np.int64)
+            scores = similarities.data[start:end].astype(np.float32)
+            results.append(select_top_k(ids, scores, k, min_score))
+        return results
@@ -0,0 +1,209 @@
+"""
+Índice TF-IDF en disco sin pickle, cargable con ``mmap``.
+
+Reemplaza ``search_index.pkl`` (vectorizador sklearn + matriz + textos
+pickleados). El índice es un directorio:
+
+    manifest.json      formato, versión, dimensiones y parámetros del analizador
+    data.npy           pesos TF-IDF (float32, filas de documento ya normalizadas)
+    indices.npy        ids de documento (int32)
+    indptr.npy         inicio de los postings de cada término (int32)
+    idf.npy            idf de cada término (float32)
+    vocab_offsets.npy  tabla de términos ordenados: offsets (int64)...
+    vocab_data.npy     ...sobre un buffer UTF-8 (uint8)
+
+La matriz se guarda por término (CSR de términos x documentos, es decir la CSC
+de documentos x términos): es lo que recorre ``SparseTopKScorer`` en cada
+consulta. Todo se abre con ``np.load(mmap_mode='r')``: cargar toma
+milisegundos y los workers comparten las páginas de sólo lectura.
+
+``transform`` reproduce ``TfidfVectorizer.transform`` (n-gramas de palabras,
+tf * idf, norma L2) a partir del vocabulario y los idf guardados.
+"""
+
+import json
+import os
+import re
+import uuid
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import scipy.sparse as sp
+
+from .tfidf_engine import l2_normalize_rows
+
+
+FORMAT = 'tfidf-postings'
+FORMAT_VERSION = 1
+
+_ARRAYS = ('data', 'indices', 'indptr', 'idf', 'vocab_offsets', 'vocab_data')
+
+
+class VocabularyTable:
+    """Términos ordenados en un buffer UTF-8 con offsets; búsqueda binaria sin dict"""
+
+    def __init__(self, offsets: np.ndarray, data: np.ndarray):
+        self.offsets = offsets
+        self.data = data
+
+    @classmethod
+    def from_terms(cls, terms: Sequence[str]) -> 'VocabularyTable':
+        """terms debe venir ordenado (como el vocabulario de sklearn por id)"""
+        encoded = [term.encode('utf-8') for term in terms]
+        if encoded != sorted(encoded):
+            raise ValueError("El vocabulario debe estar ordenado")
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(e) for e in encoded], out=offsets[1:])
+        return cls(offsets, np.frombuffer(b''.join(encoded), dtype=np.uint8))
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def _raw(self, term_id: int) -> bytes:
+        return self.data[self.offsets[term_id]:self.offsets[term_id + 1]].tobytes()
+
+    def __getitem__(self, term_id: int) -> str:
+        return self._raw(term_id).decode('utf-8')
+
+    def lookup(self, term: str) -> int:
+        """Id del término, o -1 si no está en el vocabulario"""
+        key = term.encode('utf-8')
+        low, high = 0, len(self)
+        while low < high:
+            mid = (low + high) // 2
+            if self._raw(mid) < key:
+                low = mid + 1
+            else:
+                high = mid
+        return low if low < len(self) and self._raw(low) == key else -1
+
+
+class TfidfIndex:
+    """Postings TF-IDF normalizados + vocabulario + idf, con codificación de consultas"""
+
+    def __init__(self, postings: sp.csc_matrix, idf: np.ndarray, vocabulary: VocabularyTable,
+                 token_pattern: str, ngram_range: Sequence[int], build_id: Optional[str] = None):
+        self.postings = postings
+        self.idf = idf
+        self.vocabulary = vocabulary
+        self.token_pattern = token_pattern
+        self.ngram_range = tuple(ngram_range)
+        self._token_re = re.compile(token_pattern)
+        # Identifica esta construcción (los segmentos delta se atan a ella)
+        self.build_id = build_id or uuid.uuid4().hex
+
+    @property
+    def shape(self):
+        """(documentos, términos)"""
+        return self.postings.shape
+
+    # ------------------------------------------------------------------
+    # Construcción y persistencia
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_vectorizer(cls, vectorizer, matrix) -> 'TfidfIndex':
+        """Desde un TfidfVectorizer ajustado y su matriz documentos x términos"""
+        if vectorizer.analyzer != 'word' or vectorizer.sublinear_tf or vectorizer.norm != 'l2' or not vectorizer.lowercase:
+            raise ValueError("Sólo se soporta analyzer='word', lowercase, norm='l2' y tf lineal")
+        terms = sorted(vectorizer.vocabulary_, key=vectorizer.vocabulary_.get)
+        postings = l2_normalize_rows(matrix).tocsc()
+        postings.sort_indices()
+        postings.indices = postings.indices.astype(np.int32)
+        postings.indptr = postings.indptr.astype(np.int32)
+        return cls(postings, vectorizer.idf_.astype(np.float32), VocabularyTable.from_terms(terms),
+                   vectorizer.token_pattern, vectorizer.ngram_range)
+
+    def save(self, directory: str) -> None:
+        """Escribe cada arreglo vía archivo temporal + rename; el manifiesto va al final"""
+        os.makedirs(directory, exist_ok=True)
+        arrays = {
+            'data': self.postings.data.astype(np.float32, copy=False),
+            'indices': self.postings.indices,
+            'indptr': self.postings.indptr,
+            'idf': self.idf,
+            'vocab_offsets': self.vocabulary.offsets,
+            'vocab_data': self.vocabulary.data,
+        }
+        for name, array in arrays.items():
+            path = os.path.join(directory, f'{name}.npy')
+            with open(f'{path}.tmp', 'wb') as f:
+                np.save(f, np.ascontiguousarray(array))
+            os.replace(f'{path}.tmp', path)
+
+        n_docs, n_terms = self.shape
+        manifest = {
+            'format': FORMAT,
+            'version': FORMAT_VERSION,
+            'build_id': self.build_id,
+            'n_docs': n_docs,
+            'n_terms': n_terms,
+            'nnz': int(self.postings.nnz),
+            'layout': 'terms x docs (CSR) = docs x terms (CSC)',
+            'analyzer': {
+                'token_pattern': self.token_pattern,
+                'ngram_range': list(self.ngram_range),
+                'lowercase': True,
+                'norm': 'l2',
+            },
+            'files': {name: f'{name}.npy' for name in arrays},
+        }
+        path = os.path.join(directory, 'manifest.json')
+        with open(f'{path}.tmp', 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(f'{path}.tmp', path)
+
+    @classmethod
+    def open(cls, directory: str) -> 'TfidfIndex':
+        """Abre el índice con mmap (sin copiar arreglos)"""
+        with open(os.path.join(directory, 'manifest.json'), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('format') != FORMAT or manifest.get('version') != FORMAT_VERSION:
+            raise ValueError(f"{directory}: formato {manifest.get('format')} v{manifest.get('version')} no soportado")
+
+        arrays: Dict[str, np.ndarray] = {
+            name: np.load(os.path.join(directory, manifest['files'][name]), mmap_mode='r')
+            for name in _ARRAYS
+        }
+        n_docs, n_terms = manifest['n_docs'], manifest['n_terms']
+        if len(arrays['indptr']) != n_terms + 1 or len(arrays['data']) != manifest['nnz']:
+            raise ValueError(f"{directory}: los arreglos no coinciden con el manifiesto")
+
+        postings = sp.csc_matrix((arrays['data'], arrays['indices'], arrays['indptr']), shape=(n_docs, n_terms))
+        analyzer = manifest['analyzer']
+        return cls(postings, arrays['idf'], VocabularyTable(arrays['vocab_offsets'], arrays['vocab_data']),
+                   analyzer['token_pattern'], analyzer['ngram_range'],
+                   manifest.get('build_id') or f"{n_docs}x{n_terms}:{manifest['nnz']}")
+
+    # ------------------------------------------------------------------
+    # Codificación de consultas
+    # ------------------------------------------------------------------
+
+    def _ngrams(self, text: str) -> List[str]:
+        tokens = self._token_re.findall(text.lower())
+        min_n, max_n = self.ngram_range
+        return [' '.join(tokens[i:i + n])
+                for n in range(min_n, max_n + 1)
+                for i in range(len(tokens) - n + 1)]
+
+    def transform(self, texts: Sequence[str]) -> sp.csr_matrix:
+        """Vectores TF-IDF (N x términos, filas con norma L2) como TfidfVectorizer.transform"""
+        data: List[float] = []
+        indices: List[int] = []
+        indptr = [0]
+        for text in texts:
+            counts: Dict[int, int] = {}
+            for gram in self._ngrams(text):
+                term_id = self.vocabulary.lookup(gram)
+                if term_id >= 0:
+                    counts[term_id] = counts.get(term_id, 0) + 1
+            term_ids = sorted(counts)
+            weights = np.asarray([counts[t] for t in term_ids], dtype=np.float64) * self.idf[term_ids]
+            norm = np.sqrt(np.dot(weights, weights))
+            if norm > 0:
+                weights /= norm
+            indices.extend(term_ids)
+            data.extend(weights.tolist())
+            indptr.append(len(indices))
+        return sp.csr_matrix((np.asarray(data, dtype=np.float64), np.asarray(indices, dtype=np.int32),
+                              np.asarray(indptr, dtype=np.int32)), shape=(len(texts), self.shape[1]))
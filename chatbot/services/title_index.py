@@ -0,0 +1,209 @@
+"""
+Índice invertido de títulos para la búsqueda exacta por título.
+
+Se construye una sola vez al cargar los documentos y reemplaza el recorrido
+lineal de ``search_exact_title``: los candidatos salen de intersecciones de
+postings (palabras y trigramas de caracteres) y sólo ellos se verifican con
+las mismas reglas de puntaje que la versión original.
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+# Tamaño de n-grama de caracteres usado para las búsquedas por substring
+GRAM_SIZE = 3
+
+# Al intersectar postings, con esta cantidad de candidatos conviene verificar directo
+VERIFY_THRESHOLD = 64
+
+
+def _grams(text: str) -> set:
+    """Trigramas de caracteres distintos de un texto"""
+    return {text[i:i + GRAM_SIZE] for i in range(len(text) - GRAM_SIZE + 1)}
+
+
+def _freeze(postings: Dict[str, List[int]]) -> Dict[str, np.ndarray]:
+    """Convierte listas de ids (ya ordenadas) en arreglos compactos int32"""
+    return {key: np.asarray(ids, dtype=np.int32) for key, ids in postings.items()}
+
+
+class TitleIndex:
+    """Postings de palabras y trigramas sobre títulos y hrefs en minúsculas.
+
+    Las reglas (y sus puntajes) son las de la búsqueda exacta original:
+    - 1.0  título idéntico a la consulta
+    - 0.9  el título contiene la consulta
+    - 0.85 la consulta contiene el título
+    - 0.8  el href contiene la consulta con guiones o sin espacios
+    - 0.6+ al menos 3 palabras en común
+    """
+
+    def __init__(self, documents: Iterable[Dict], deleted: Iterable[int] = ()):
+        # Documentos borrados (tombstones): conservan su id pero se indexan vacíos
+        self._deleted = frozenset(int(i) for i in deleted)
+        self.titles: List[str] = []
+        self.hrefs: List[str] = []
+
+        exact: Dict[str, List[int]] = {}
+        words: Dict[str, List[int]] = {}
+        title_grams: Dict[str, List[int]] = {}
+        href_grams: Dict[str, List[int]] = {}
+        short_titles: Dict[str, List[int]] = {}
+        gram_counts: List[int] = []
+
+        for idx, doc in enumerate(documents):
+            if idx in self._deleted:
+                self.titles.append('')
+                self.hrefs.append('')
+                gram_counts.append(0)
+                continue
+            title = doc.get('title', '').lower()
+            href = doc.get('href', '').lower()
+            self.titles.append(title)
+            self.hrefs.append(href)
+
+            exact.setdefault(title, []).append(idx)
+            for word in set(title.split()):
+                words.setdefault(word, []).append(idx)
+
+            grams = _grams(title)
+            gram_counts.append(len(grams))
+            for gram in grams:
+                title_grams.setdefault(gram, []).append(idx)
+            if 0 < len(title) < GRAM_SIZE:
+                short_titles.setdefault(title, []).append(idx)
+
+            for gram in _grams(href):
+                href_grams.setdefault(gram, []).append(idx)
+
+        self._exact = exact
+        self._words = _freeze(words)
+        self._title_grams = _freeze(title_grams)
+        self._href_grams = _freeze(href_grams)
+        self._short_titles = short_titles
+        self._gram_counts = np.asarray(gram_counts, dtype=np.int32)
+        self._title_lengths = np.fromiter((len(t) for t in self.titles), dtype=np.int32, count=len(self.titles))
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    # ------------------------------------------------------------------
+    # Candidatos por postings
+    # ------------------------------------------------------------------
+
+    def _substring_candidates(self, postings: Dict[str, np.ndarray], pattern: str) -> Optional[np.ndarray]:
+        """Docs que contienen todos los trigramas del patrón (superconjunto de los matches).
+
+        Retorna None si el patrón es demasiado corto para usar trigramas.
+        """
+        grams = _grams(pattern)
+        if not grams:
+            return None
+        lists = []
+        for gram in grams:
+            ids = postings.get(gram)
+            if ids is None:
+                return np.empty(0, dtype=np.int32)
+            lists.append(ids)
+        lists.sort(key=len)
+
+        candidates = lists[0]
+        for ids in lists[1:]:
+            if len(candidates) <= VERIFY_THRESHOLD:
+                break
+            candidates = np.intersect1d(candidates, ids, assume_unique=True)
+        return candidates
+
+    def _contained_titles(self, query: str) -> List[int]:
+        """Docs cuyo título (no vacío) podría estar contenido en la consulta"""
+        found = [idx for title, ids in self._short_titles.items() if title in query for idx in ids]
+
+        query_grams = [self._title_grams[g] for g in _grams(query) if g in self._title_grams]
+        if query_grams:
+            # Un título contenido en la consulta tiene TODOS sus trigramas en ella
+            hits = np.bincount(np.concatenate(query_grams), minlength=len(self.titles))
+            mask = (hits == self._gram_counts) & (self._gram_counts > 0) & (self._title_lengths <= len(query))
+            found.extend(np.flatnonzero(mask).tolist())
+        return found
+
+    def _scan(self, query: str, scores: Dict[int, float]) -> None:
+        """Recorrido directo, sólo para consultas más cortas que un trigrama"""
+        dashed, joined = query.replace(' ', '-'), query.replace(' ', '')
+        for idx, title in enumerate(self.titles):
+            if query in title:
+                scores[idx] = max(scores.get(idx, 0), 0.9)
+            elif title and title in query:
+                scores[idx] = max(scores.get(idx, 0), 0.85)
+            elif dashed in self.hrefs[idx] or joined in self.hrefs[idx]:
+                scores[idx] = max(scores.get(idx, 0), 0.8)
+
+    def _admits(self, idx: int, allowed: Optional[np.ndarray]) -> bool:
+        """Documento no borrado y dentro de los candidatos (filtros por faceta)"""
+        return idx not in self._deleted and (allowed is None or bool(allowed[idx]))
+
+    # ------------------------------------------------------------------
+    # Búsqueda
+    # ------------------------------------------------------------------
+
+    def search(self, query: str, top_k: int = 15, allowed: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """Retorna hasta top_k pares (doc_id, score) ordenados por score descendente.
+        allowed: máscara booleana opcional (por doc_id) de documentos admitidos.
+        """
+        query_lower = query.lower().strip()
+        scores: Dict[int, float] = {}
+
+        def bump(ids, score):
+            for idx in ids:
+                if scores.get(idx, 0) < score:
+                    scores[idx] = score
+
+        bump(self._exact.get(query_lower, ()), 1.0)
+
+        if len(query_lower) < GRAM_SIZE:
+            self._scan(query_lower, scores)
+        else:
+            candidates = self._substring_candidates(self._title_grams, query_lower)
+            bump((i for i in candidates.tolist() if query_lower in self.titles[i]), 0.9)
+
+            bump((i for i in self._contained_titles(query_lower) if self.titles[i] in query_lower), 0.85)
+
+            for pattern in {query_lower.replace(' ', '-'), query_lower.replace(' ', '')}:
+                candidates = self._substring_candidates(self._href_grams, pattern)
+                ids = range(len(self.hrefs)) if candidates is None else candidates.tolist()
+                bump((i for i in ids if pattern in self.hrefs[i]), 0.8)
+
+        # Coincidencia parcial: al menos 3 palabras en común
+        query_words = set(query_lower.split())
+        if len(query_words) >= 3:
+            postings = [self._words[w] for w in query_words if w in self._words]
+            if len(postings) >= 3:
+                common = np.bincount(np.concatenate(postings), minlength=len(self.titles))
+                for idx in np.flatnonzero(common >= 3).tolist():
+                    score = 0.6 + (common[idx] / len(query_words)) * 0.2
+                    if scores.get(idx, 0) < score:
+                        scores[idx] = float(score)
+
+        ranked = sorted((item for item in scores.items() if item[1] > 0.5 and self._admits(item[0], allowed)),
+                        key=lambda item: (-item[1], item[0]))
+        return ranked[:top_k]
+
+    def search_keywords(self, query: str, top_k: int = 6, allowed: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """Puntaje de la búsqueda por keywords: palabras en común + 10 si el título contiene la consulta"""
+        query_lower = query.lower()
+        query_words = set(query_lower.split())
+
+        postings = [self._words[w] for w in query_words if w in self._words]
+        common = np.bincount(np.concatenate(postings), minlength=len(self.titles)) if postings else np.zeros(len(self.titles), dtype=np.int64)
+        scores = {idx: float(common[idx]) for idx in np.flatnonzero(common).tolist()}
+
+        candidates = self._substring_candidates(self._title_grams, query_lower)
+        ids = range(len(self.titles)) if candidates is None else candidates.tolist()
+        for idx in ids:
+            if query_lower in self.titles[idx]:
+                scores[idx] = float(common[idx]) + 10
+
+        ranked = sorted((item for item in scores.items() if self._admits(item[0], allowed)),
+                        key=lambda item: (-item[1], item[0]))
+        return ranked[:top_k]
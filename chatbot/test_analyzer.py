@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""Test del analizador compartido (índice y consultas)"""
+
+import sys
+sys.path.insert(0, '/app')
+sys.path.insert(0, '/app/services')
+
+from services.analyzer import analyze_query, expand_terms, normalize_text, strip_accents, tokens
+
+print("=" * 60)
+print("TEST 1: Normalización")
+print("=" * 60)
+
+assert strip_accents('Concepción, Ñuñoa') == 'Concepcion, Nunoa'
+assert strip_accents('acta') == 'acta'
+assert tokens('Derechos Humanos, 1973.') == ['derecho', 'humano', '1973']     # la puntuación no frena el stemming
+assert normalize_text('  Árboles  y CANCIONES ') == 'arbol y cancion'
+assert normalize_text('Carta-poder (copia)') == 'carta-poder copia'
+assert normalize_text(1990) == '1990'
+print("✅ Minúsculas, sin acentos ni puntuación y plurales recortados")
+
+print("\n" + "=" * 60)
+print("TEST 2: Expansiones por palabra completa")
+print("=" * 60)
+
+assert expand_terms(normalize_text('ddhh')) == 'derecho humano'
+assert expand_terms(normalize_text('DD.HH. en Chile')) == 'derecho humano en chile'
+assert expand_terms(normalize_text('mir')) == 'movimiento izquierda revolucionaria'
+assert expand_terms(normalize_text('mirada')) == 'mirada'                     # antes: 'movimiento ...ada'
+assert expand_terms(normalize_text('dictadura')) == 'dictadura'               # 'dicta' no la reescribe
+assert expand_terms(normalize_text('fotos del 73')) == 'fotografia del 1973'
+assert expand_terms(normalize_text('capsula')) == 'capsula'                   # 'ps' sólo como palabra
+# Las claves se comparan ya lematizadas: el singular expande igual que el plural de TERM_EXPANSIONS
+# (antes 'foto' e 'imagen' no expandían). Es intencional: los documentos se indexan con la misma forma.
+assert expand_terms(normalize_text('foto')) == expand_terms(normalize_text('fotos')) == 'fotografia'
+assert expand_terms(normalize_text('Imagen de Allende')) == 'fotografia de salvador allende'
+assert expand_terms(normalize_text('fotografía')) == 'fotografia'
+print("✅ Una sola pasada, sin reescribir el interior de otras palabras")
+
+print("\n" + "=" * 60)
+print("TEST 3: Memo")
+print("=" * 60)
+
+analyze_query.cache_clear()
+assert analyze_query('Cartas de Allende') == 'carta de allende'
+assert analyze_query('Cartas de Allende') == 'carta de allende'
+info = analyze_query.cache_info()
+assert (info.hits, info.misses) == (1, 1)
+print(f"✅ Consultas repetidas desde el LRU: {info}")
+
+print("\n✅ Todos los tests completados")
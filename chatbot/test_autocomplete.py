@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""Test del autocompletado por prefijo (títulos y categorías)"""
+
+import sys
+sys.path.insert(0, '/app')
+sys.path.insert(0, '/app/services')
+
+from services.autocomplete import PrefixIndex, fold
+
+categories = {
+    'materias': [{'name': 'Allende Gossens, Salvador', 'count': 120}, {'name': 'Derechos Humanos', 'count': 300}],
+    'autores': [{'name': 'Aylwin Azócar, Patricio', 'count': 900}, {'name': 'Vicaría de la Solidaridad', 'count': 40}],
+    'lugares': [{'name': 'Santiago (Chile)', 'count': 4500}, {'name': 'San Bernardo (Chile)', 'count': 17}],
+    'tipos': [{'name': 'Carta', 'count': 1365}],
+}
+titles = ['Carta de Salvador Allende', 'Carta', 'Carta', 'Fotografía de marcha', '', 'Acta de gabinete']
+index = PrefixIndex.build(categories, titles)
+
+def texts(results):
+    return [(item['text'], item['type']) for item in results]
+
+print("=" * 60)
+print("TEST 1: Prefijos")
+print("=" * 60)
+
+assert fold('  Vicaría  de la SOLIDARIDAD ') == 'vicaria de la solidaridad'
+assert texts(index.suggest('san')) == [('Santiago (Chile)', 'lugares'), ('San Bernardo (Chile)', 'lugares')]
+assert texts(index.suggest('ALLE')) == [('Allende Gossens, Salvador', 'materias'), ('Carta de Salvador Allende', 'titulos')]
+assert texts(index.suggest('solid')) == [('Vicaría de la Solidaridad', 'autores')]     # palabra interior
+assert texts(index.suggest('fotografia')) == [('Fotografía de marcha', 'titulos')]     # sin acentos
+assert index.suggest('carta')[0] == {'text': 'Carta', 'type': 'titulos', 'count': 2}    # títulos repetidos
+assert all(item['type'] != 'tipos' for item in index.suggest('c', 20))
+assert index.suggest('') == [] and index.suggest('xyz') == []
+print(f"'sa': {texts(index.suggest('sa', 3))}")
+print("✅ Coincidencias por palabra, ordenadas por count")
+
+print("\n" + "=" * 60)
+print("TEST 2: Límite, tipos y memo")
+print("=" * 60)
+
+everything = index.suggest('a', 20)
+counts = [item['count'] for item in everything]
+assert counts == sorted(counts, reverse=True)
+assert len({item['text'] + item['type'] for item in everything}) == len(everything)    # sin repetidos
+assert index.suggest('a', 2) == everything[:2]
+assert texts(index.suggest('a', 5, ['titulos'])) == [('Acta de gabinete', 'titulos'), ('Carta de Salvador Allende', 'titulos')]
+assert index.suggest('sa') is index.suggest('sa')                                       # memorizado
+print("✅ Límite, filtro por tipo y prefijos cortos memorizados")
+
+print("\n✅ Todos los tests completados")
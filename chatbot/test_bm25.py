@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Test del backend BM25F por campos"""
+
+import sys
+sys.path.insert(0, '/app')
+sys.path.insert(0, '/app/services')
+
+import math
+import os
+import tempfile
+
+import numpy as np
+
+from services.bm25 import BM25FIndex, DEFAULT_FIELD_B, DEFAULT_FIELD_WEIGHTS, DEFAULT_K1, FIELDS, tokenize
+
+docs = [
+    {'title': tokenize('acta consejo de gabinete'), 'subject': tokenize('gobierno'), 'date': ['1990']},
+    {'title': tokenize('carta'), 'subject': tokenize('derechos humanos vicaria'), 'creator': tokenize('vicaria de la solidaridad')},
+    {'title': tokenize('derechos humanos'), 'coverage': tokenize('santiago')},
+    {'title': tokenize('informe sobre derechos humanos y la situacion de los presos politicos en chile')},
+]
+
+index = BM25FIndex.build(docs)
+
+
+def brute_force(query_tokens):
+    """BM25F directo desde la definición"""
+    n = len(docs)
+    lengths = np.array([[len(d.get(f, [])) for f in FIELDS] for d in docs], dtype=float)
+    avg = lengths.mean(axis=0)
+    avg[avg == 0] = 1.0
+    scores = {}
+    for term in set(query_tokens):
+        df = sum(any(term in d.get(f, []) for f in FIELDS) for d in docs)
+        if df == 0:
+            continue
+        idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+        for i, d in enumerate(docs):
+            tf = 0.0
+            for f, field in enumerate(FIELDS):
+                count = d.get(field, []).count(term)
+                norm = 1 - DEFAULT_FIELD_B[f] + DEFAULT_FIELD_B[f] * lengths[i, f] / avg[f]
+                tf += DEFAULT_FIELD_WEIGHTS[f] * count / norm
+            if tf > 0:
+                scores[i] = scores.get(i, 0.0) + idf * tf / (DEFAULT_K1 + tf)
+    return scores
+
+print("=" * 60)
+print("TEST 1: Puntajes iguales a la definición de BM25F")
+print("=" * 60)
+
+for query in ['derechos humanos', 'vicaria', 'gabinete 1990', 'zzzz']:
+    tokens = tokenize(query)
+    ids, scores = index.top_k(tokens, 10)
+    expected = brute_force(tokens)
+    print(f"'{query}' -> {ids.tolist()}")
+    assert set(ids.tolist()) == set(expected)
+    for doc_id, score in zip(ids.tolist(), scores.tolist()):
+        assert abs(score - expected[doc_id]) < 1e-4
+
+# El título corto gana al título largo con los mismos términos
+ids, _ = index.top_k(tokenize('derechos humanos'), 3)
+assert ids[0] == 2
+
+print("\n" + "=" * 60)
+print("TEST 2: Guardar y cargar (.npz sin pickle)")
+print("=" * 60)
+
+with tempfile.TemporaryDirectory() as tmp:
+    path = os.path.join(tmp, 'bm25_index.npz')
+    index.save(path)
+    loaded = BM25FIndex.load(path)
+
+ids, scores = index.top_k(tokenize('derechos humanos vicaria'), 5)
+loaded_ids, loaded_scores = loaded.top_k(tokenize('derechos humanos vicaria'), 5)
+assert ids.tolist() == loaded_ids.tolist() and np.allclose(scores, loaded_scores)
+print("✅ Índice recargado con los mismos resultados")
+
+print("\n✅ Todos los tests completados")
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""Test del índice de años (dc:date + títulos) y de los rangos en consultas"""
+
+import sys
+sys.path.insert(0, '/app')
+sys.path.insert(0, '/app/services')
+
+import numpy as np
+
+from services.date_index import YearIndex, extract_year_range, parse_year_range, years_in_date
+from services.document_store import DocumentStore
+
+print("=" * 60)
+print("TEST 1: Rangos de años en la consulta")
+print("=" * 60)
+
+cases = {
+    'fotos 1980-1985': ('fotos', (1980, 1985)),
+    'cartas entre 1973 y 1990 sobre dictadura': ('cartas sobre dictadura', (1973, 1990)),
+    'desde 1990 hasta 1994 gabinete': ('gabinete', (1990, 1994)),
+    'década de 1970 prensa': ('prensa', (1970, 1979)),
+    'volantes años 80': ('volantes', (1980, 1989)),
+    'actas antes de 1973': ('actas', (1800, 1972)),
+    'dictadura militar': ('dictadura militar', None),
+    # Números sueltos: términos de búsqueda, no filtros
+    'decreto 1800': ('decreto 1800', None),
+    'ley 2000 de 1990': ('ley 2000 de 1990', None),
+    'constitución 1980': ('constitución 1980', None),
+    'protestas 1983 1986': ('protestas 1983 1986', None),
+    # Refinamientos de seguimiento: los años llegan siempre como rango
+    'fotografías 1985-1985': ('fotografías', (1985, 1985)),
+}
+for query, expected in cases.items():
+    result = extract_year_range(query)
+    print(f"  '{query}' -> {result}")
+    assert result == expected, result
+
+assert extract_year_range('protestas 1983 1986', lone_years=True) == ('protestas', (1983, 1986))
+assert extract_year_range('ley 2000 de 1990', lone_years=True) == ('ley de', (1990, 2000))
+
+assert parse_year_range('1980-1985') == (1980, 1985)
+assert parse_year_range('1985') == (1985, 1985)
+assert parse_year_range([1990, 1980]) == (1980, 1990)
+assert parse_year_range(None) is None
+for bad in ['sin años', [1980], True]:
+    try:
+        parse_year_range(bad)
+        assert False, f"debió rechazar {bad}"
+    except ValueError:
+        pass
+print("✅ Rangos explícitos reconocidos y quitados del texto; números sueltos quedan")
+
+print("\n" + "=" * 60)
+print("TEST 2: Índice (año, doc_id) y búsqueda por rango")
+print("=" * 60)
+
+assert years_in_date('1985-03-12') == [1985]
+assert years_in_date('1980-1983') == [1980, 1981, 1982, 1983]
+assert years_in_date('s.f.') == []
+
+docs = [
+    {'title': 'Acta de gabinete', 'dc:date': ['1990-03-12']},
+    {'title': 'Plebiscito de 1988', 'dc:date': ['1988']},
+    {'title': 'Volantes', 'dc:date': ['1982-1984']},
+    {'title': 'Carta sin fecha'},
+    {'title': 'Informe 1975', 'dc:date': ['1976']},
+]
+index = YearIndex.from_documents(DocumentStore(docs))
+assert index.span == (1975, 1990)
+assert np.all(np.diff(index.years) >= 0)                          # ordenado por año
+assert index.docs_between(1983, 1983).tolist() == [2]
+assert index.docs_between(1975, 1976).tolist() == [4]             # año del título y de dc:date, sin repetir
+assert index.docs_between(1985, 1990).tolist() == [0, 1]
+assert index.docs_between(1991, 2000).tolist() == []
+assert np.flatnonzero(index.mask(1980, 1988)).tolist() == [1, 2]
+
+without_deleted = YearIndex.from_documents(DocumentStore(docs), deleted=[1])
+assert without_deleted.docs_between(1988, 1988).tolist() == []
+
+assert index.decade_counts([0, 1, 2, 3, 4]) == [{'name': 1970, 'count': 1}, {'name': 1980, 'count': 2},
+                                                {'name': 1990, 'count': 1}]
+assert index.decade_counts([2]) == [{'name': 1980, 'count': 1}]          # 1982-1984: una vez por década
+assert index.decade_counts([3]) == [] and without_deleted.decade_counts([1]) == []
+print("✅ Búsqueda binaria sobre arreglos ordenados")
+
+print("\n✅ Todos los tests completados")
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""Test del índice vectorial denso con vectores sintéticos (sin red)"""
+
+import sys
+sys.path.insert(0, '/app')
+sys.path.insert(0, '/app/services')
+
+import numpy as np
+
+from services.dense_index import DenseVectorIndex
+
+rng = np.random.default_rng(42)
+vectors = rng.normal(size=(50, 16))
+
+# Documentos 3 y 7 sin embedding; el 99 no existe en el corpus
+embeddings = {idx: vectors[idx].tolist() for idx in range(50) if idx not in (3, 7)}
+embeddings[99] = vectors[0].tolist()
+
+index = DenseVectorIndex.from_embeddings(embeddings, n_docs=50)
+
+print("=" * 60)
+print("TEST 1: Construcción de la matriz")
+print("=" * 60)
+
+assert len(index) == 48 and index.dim == 16
+assert index.matrix.dtype == np.float32 and index.matrix.flags['C_CONTIGUOUS']
+assert np.allclose(np.linalg.norm(index.matrix, axis=1), 1.0, atol=1e-5)
+assert 3 not in index.doc_ids and 7 not in index.doc_ids and 99 not in index.doc_ids
+print(f"✅ {len(index)} filas x {index.dim} dimensiones")
+
+print("\n" + "=" * 60)
+print("TEST 2: Top-k igual a la similitud coseno por fuerza bruta")
+print("=" * 60)
+
+query = vectors[10] + 0.1 * rng.normal(size=16)
+ids, scores = index.top_k(query, 5)
+
+brute = []
+for idx, vec in embeddings.items():
+    if idx < 50:
+        vec = np.asarray(vec)
+        brute.append((idx, float(vec @ query / (np.linalg.norm(vec) * np.linalg.norm(query)))))
+brute.sort(key=lambda x: x[1], reverse=True)
+
+print(f"top-5: {ids.tolist()}")
+assert ids[0] == 10
+assert ids.tolist() == [idx for idx, _ in brute[:5]]
+assert np.allclose(scores, [s for _, s in brute[:5]], atol=1e-5)
+
+print("\n" + "=" * 60)
+print("TEST 3: Casos límite")
+print("=" * 60)
+
+assert DenseVectorIndex.from_embeddings({}) is None
+try:
+    index.top_k(np.ones(8), 5)
+    assert False, "debió fallar por dimensión"
+except ValueError:
+    print("✅ Dimensión incorrecta rechazada")
+
+print("\n✅ Todos los tests completados")
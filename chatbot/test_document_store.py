@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Test del almacén columnar de documentos"""
+
+import sys
+sys.path.insert(0, '/app')
+sys.path.insert(0, '/app/services')
+
+import os
+import tempfile
+
+from services.document_store import DocumentStore
+
+docs = [
+    {'title': 'Carta de Aylwin', 'href': 'https://archivo/carta-aylwin',
+     'dc:subject': ['Correspondencia', 'Transición'], 'dc:creator': ['Aylwin Azócar, Patricio'],
+     'dc:coverage': ['Santiago'], 'dc:date': ['1990']},
+    {'title': 'Volante de protesta', 'href': 'https://archivo/volante',
+     'dc:subject': ['Volantes', 'Dictadura'], 'dc:creator': [], 'dc:coverage': ['Valparaíso']},
+    {'title': 'Fotografía ñuñoa', 'href': 'https://archivo/foto',
+     'dc:subject': 'Fotografías', 'notes': {'x': 1}},
+    {'title': 'Carta pastoral', 'href': 'https://archivo/pastoral',
+     'dc:subject': ['Correspondencia'], 'dc:creator': ['Silva Henríquez, Raúl']},
+]
+store = DocumentStore(docs)
+
+print("=" * 60)
+print("TEST 1: Ida y vuelta a dict")
+print("=" * 60)
+
+assert len(store) == 4
+for idx, doc in enumerate(docs):
+    assert store.to_dict(idx) == doc, (store.to_dict(idx), doc)
+print("✅ to_dict reproduce los documentos originales (incluye escalares y claves extra)")
+
+print("\n" + "=" * 60)
+print("TEST 2: Vistas de registro")
+print("=" * 60)
+
+record = store[1]
+assert record['title'] == 'Volante de protesta' and record.href == 'https://archivo/volante'
+assert record.get('dc:subject', []) == ['Volantes', 'Dictadura']
+assert record.get('dc:date', []) == [] and 'dc:date' not in record
+assert store[-1].title == 'Carta pastoral'
+assert record.copy() == docs[1]
+try:
+    store[0]['no-existe']
+    raise AssertionError("se esperaba KeyError")
+except KeyError:
+    pass
+assert [r.title for r in store] == list(store.titles())
+print("✅ Vistas se leen como el dict original")
+
+print("\n" + "=" * 60)
+print("TEST 3: Valores internados y filtros por categoría")
+print("=" * 60)
+
+counts = store.value_counts('dc:subject')
+print(f"materias: {counts}")
+assert counts[0] == {'name': 'Correspondencia', 'count': 2}
+assert store.match_values('dc:subject', 'correspond').tolist() == [0, 3]
+assert store.match_values('dc:subject', 'correspond', limit=1).tolist() == [0]
+assert store.match_values('dc:coverage', 'VALPARA').tolist() == [1]
+assert store.match_values('dc:creator', 'nadie').tolist() == []
+print("✅ Conteos y filtros sobre valores internados")
+
+print("\n" + "=" * 60)
+print("TEST 4: Corpus binario (mmap)")
+print("=" * 60)
+
+path = os.path.join(tempfile.mkdtemp(), 'corpus.bin')
+store.save(path)
+mapped = DocumentStore.open(path)
+assert len(mapped) == len(store)
+for idx, doc in enumerate(docs):
+    assert mapped.to_dict(idx) == doc
+assert mapped[2].title == 'Fotografía ñuñoa'
+assert mapped.value_counts('dc:subject') == counts
+assert mapped.match_values('dc:subject', 'correspond').tolist() == [0, 3]
+
+with open(path, 'r+b') as f:
+    f.write(b'NOTACORP')
+try:
+    DocumentStore.open(path)
+    raise AssertionError("se esperaba ValueError")
+except ValueError as e:
+    print(f"Cabecera inválida rechazada: {e}")
+print("✅ save/open reproduce el almacén en memoria")
+
+print("\n✅ Todos los tests completados")
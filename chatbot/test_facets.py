@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""Test de filtros por faceta (bitmaps por materia/autor/lugar)"""
+
+import sys
+sys.path.insert(0, '/app')
+sys.path.insert(0, '/app/services')
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from services.bm25 import BM25FIndex, tokenize
+from services.dense_index import DenseVectorIndex
+from services.document_store import DocumentStore
+from services.facets import FacetIndex, normalize_filters
+from services.tfidf_engine import SparseTopKScorer
+from services.title_index import TitleIndex
+
+docs = [
+    {'title': 'Volantes contra la dictadura', 'dc:subject': ['Derechos Humanos', 'Dictadura'], 'dc:coverage': ['Santiago (Chile)']},
+    {'title': 'Carta sobre la dictadura', 'dc:subject': ['Dictadura'], 'dc:coverage': ['Concepción (Chile)']},
+    {'title': 'Informe de la dictadura', 'dc:subject': ['Derechos Humanos'], 'dc:coverage': ['Concepción (Chile)'],
+     'dc:creator': ['Vicaría de la Solidaridad']},
+    {'title': 'Fotografía de marcha', 'dc:subject': ['Derechos Humanos', 'Protesta'], 'dc:coverage': ['Santiago (Chile)']},
+    {'title': 'Acta de gabinete', 'dc:subject': ['Gobierno'], 'dc:creator': ['Aylwin Azócar, Patricio']},
+    {'title': 'Discurso', 'dc:subject': ['África', 'X']},
+]
+documents = DocumentStore(docs)
+facets = FacetIndex.from_documents(documents)
+
+def ids(mask):
+    return np.flatnonzero(mask).tolist()
+
+print("=" * 60)
+print("TEST 1: AND/OR de bitmaps")
+print("=" * 60)
+
+assert facets.select({}) is None
+assert ids(facets.select({'materias': 'Derechos Humanos'})) == [0, 2, 3]
+assert ids(facets.select({'materias': ['Protesta', 'Gobierno']})) == [3, 4]                  # OR
+assert ids(facets.select({'materias': {'all': ['Derechos Humanos', 'Dictadura']}})) == [0]     # AND en una faceta
+assert ids(facets.select({'materias': 'derechos humanos', 'lugares': 'Santiago'})) == [0, 3]   # AND entre facetas
+assert ids(facets.select({'lugares': 'Valparaíso'})) == []
+assert ids(facets.select({'autores': 'vicaría'})) == [2]
+assert 'X' not in facets.values('materias')          # como extract_categories: se omiten valores de 1 carácter
+for filters in [{'materias': ['Dictadura']}, {'lugares': 'Chile'}, {'autores': ['Aylwin', 'Vicaría']}]:
+    field = {'materias': 'dc:subject', 'lugares': 'dc:coverage', 'autores': 'dc:creator'}[next(iter(filters))]
+    expected = sorted({i for text in normalize_filters(filters)[next(iter(filters))]['any']
+                       for i in documents.match_values(field, text).tolist()})
+    assert ids(facets.select(filters)) == expected
+print("✅ Mismos candidatos que el recorrido de /api/search-by-category")
+
+for bad in [{'colores': 'rojo'}, {'materias': {'none': ['x']}}, {'materias': [1]}, ['materias']]:
+    try:
+        normalize_filters(bad)
+        assert False, f"debió rechazar {bad}"
+    except ValueError:
+        pass
+print("✅ Filtros inválidos rechazados")
+
+print("\n" + "=" * 60)
+print("TEST 2: Puntaje restringido a los candidatos")
+print("=" * 60)
+
+allowed = facets.select({'materias': 'Derechos Humanos', 'lugares': 'Concepción'})
+titles = [doc['title'].lower() for doc in docs]
+vectorizer = TfidfVectorizer()
+scorer = SparseTopKScorer(vectorizer.fit_transform(titles))
+query = vectorizer.transform(['dictadura'])
+assert sorted(scorer.top_k(query, 5)[0].tolist()) == [0, 1, 2]
+assert scorer.top_k(query, 5, allowed=allowed)[0].tolist() == [2]
+
+bm25 = BM25FIndex.build([{'title': tokenize(t)} for t in titles])
+assert sorted(bm25.top_k(tokenize('dictadura'), 5)[0].tolist()) == [0, 1, 2]
+assert bm25.top_k(tokenize('dictadura'), 5, allowed=allowed)[0].tolist() == [2]
+
+dense = DenseVectorIndex(np.eye(6, dtype=np.float32) + 0.1, np.arange(6))
+assert dense.top_k(np.eye(6)[0], 3, allowed=allowed)[0].tolist() == [2]
+
+title_index = TitleIndex(docs)
+assert [idx for idx, _ in title_index.search('dictadura')] == [0, 1, 2]
+assert [idx for idx, _ in title_index.search('dictadura', allowed=allowed)] == [2]
+print("✅ TF-IDF, BM25F, denso y títulos sólo devuelven candidatos")
+
+print("\n" + "=" * 60)
+print("TEST 3: Distribución por faceta de un conjunto de resultados")
+print("=" * 60)
+
+counts = facets.counts([0, 1, 2, 3])
+assert counts['materias'] == [{'name': 'Derechos Humanos', 'count': 3}, {'name': 'Dictadura', 'count': 2},
+                              {'name': 'Protesta', 'count': 1}]
+assert counts['lugares'] == [{'name': 'Santiago (Chile)', 'count': 2}, {'name': 'Concepción (Chile)', 'count': 2}]
+assert counts['autores'] == [{'name': 'Vicaría de la Solidaridad', 'count': 1}]
+assert facets.counts([0, 1, 2, 3], limit=1)['materias'] == [{'name': 'Derechos Humanos', 'count': 3}]
+assert facets.counts([]) == {'materias': [], 'autores': [], 'lugares': []}
+for subset in [[0, 2], [1, 3, 4, 5], list(range(6))]:
+    for facet, field in [('materias', 'dc:subject'), ('lugares', 'dc:coverage')]:
+        expected = {}
+        for i in subset:
+            for value in docs[i].get(field, []):
+                if len(value) > 1:
+                    expected[value] = expected.get(value, 0) + 1
+        assert {item['name']: item['count'] for item in facets.counts(subset, limit=20)[facet]} == expected
+print("✅ Conteos por bincount iguales a recorrer los documentos")
+
+print("\n" + "=" * 60)
+print("TEST 4: Valor exacto antes que subcadena, memoizado")
+print("=" * 60)
+
+places = FacetIndex.from_documents(DocumentStore([
+    {'title': 'a', 'dc:coverage': ['Santiago']},
+    {'title': 'b', 'dc:coverage': ['Santiago (Chile)']},
+    {'title': 'c', 'dc:coverage': ['Santiago de Compostela']},
+])).facets['lugares']
+assert places.match('santiago ') == [0]                           # nombre exacto: sin recorrer los demás
+assert places.match('SANTIAGO (CHILE)') == [1]
+assert places.match('Santiago d') == [2] and places.match('chile') == [1]     # sin exacto: subcadena
+assert places.match('Valparaíso') == [] and places.match('') == []
+assert places.match('santiago') is places.match('Santiago')       # memo por texto normalizado
+print("✅ Diccionario de nombres, subcadena sólo si no hay exacto")
+
+print("\n✅ Todos los tests completados")
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Test de los sub-índices TF-IDF por campo con pesos por consulta"""
+
+import sys
+sys.path.insert(0, '/app')
+sys.path.insert(0, '/app/services')
+
+import os
+import tempfile
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from services.field_index import DEFAULT_FIELD_WEIGHTS, FieldIndex, normalize_field_weights
+from services.tfidf_engine import l2_normalize_rows
+
+docs = [
+    {'title': 'carta de aylwin', 'creator': 'ministerio del interior', 'coverage': 'santiago'},
+    {'title': 'acta de gabinete', 'creator': 'aylwin azocar patricio', 'coverage': 'valparaiso'},
+    {'title': 'volante', 'creator': 'vicaria de la solidaridad', 'coverage': 'santiago chile'},
+    {'title': 'santiago de noche', 'creator': '', 'coverage': ''},
+]
+vectorizer = TfidfVectorizer(token_pattern=r'(?u)\b[\w-]+\b')
+vectorizer.fit([' '.join(doc.values()) for doc in docs])
+matrices = {field: vectorizer.transform([doc[field] for doc in docs]) for field in ('title', 'creator', 'coverage')}
+index = FieldIndex.from_matrices(matrices, build_id='b1')
+
+def top(query, weights, k=4):
+    return index.top_k(vectorizer.transform([query]), k, weights)[0].tolist()
+
+print("=" * 60)
+print("TEST 1: Pesos por campo")
+print("=" * 60)
+
+assert top('aylwin', {'title': 1}) == [0]
+assert top('aylwin', {'creator': 1}) == [1]
+assert top('aylwin', {'title': 1, 'creator': 2})[0] == 1
+assert top('aylwin', {'title': 3, 'creator': 1})[0] == 0
+assert top('santiago', {'coverage': 1}) == [0, 2]
+assert top('santiago', {'title': 1}) == [3]
+assert index.top_k(vectorizer.transform(['santiago']), 4, {'coverage': 1}, allowed=np.array([0, 0, 1, 0], bool))[0].tolist() == [2]
+
+# Suma ponderada de cosenos por campo, contra el cálculo denso
+weights = {'title': 3.0, 'creator': 0.5, 'coverage': 2.0}
+query = l2_normalize_rows(vectorizer.transform(['santiago aylwin chile'])).toarray().ravel()
+expected = sum(w * (l2_normalize_rows(matrices[f]).toarray() @ query) for f, w in weights.items())
+ids, scores = index.score(vectorizer.transform(['santiago aylwin chile']), weights)
+assert np.allclose(scores, expected[ids], atol=1e-6)
+assert set(ids.tolist()) == set(np.flatnonzero(expected > 0).tolist())
+print("✅ Suma ponderada de productos dispersos por campo")
+
+print("\n" + "=" * 60)
+print("TEST 2: Pesos de la solicitud y persistencia")
+print("=" * 60)
+
+assert normalize_field_weights(None) == {}
+assert normalize_field_weights(['creator']) == {'creator': 1.0}
+assert normalize_field_weights('creator, title') == {'creator': 1.0, 'title': 3.0}     # query string
+assert normalize_field_weights({'coverage': 3})['coverage'] == 3.0
+assert normalize_field_weights({'coverage': 3})['title'] == DEFAULT_FIELD_WEIGHTS['title']
+assert 'title' not in normalize_field_weights({'title': 0})
+for bad in [['colores'], {'title': -1}, {'title': 'alto'}, {f: 0 for f in DEFAULT_FIELD_WEIGHTS}, 3, [1]]:
+    try:
+        normalize_field_weights(bad)
+        assert False, f"debió rechazar {bad}"
+    except ValueError:
+        pass
+print("✅ Listas, objetos y pesos inválidos")
+
+with tempfile.TemporaryDirectory() as tmp:
+    directory = os.path.join(tmp, 'field_index')
+    index.save(directory)
+    opened = FieldIndex.open(directory)
+    assert opened.build_id == 'b1' and opened.shape == index.shape
+    assert not opened.postings['title'].data.flags.writeable                # arreglos de sólo lectura (mmap)
+    for field in matrices:
+        assert (opened.postings[field] != index.postings[field]).nnz == 0
+print("✅ Guardado y abierto con mmap")
+
+print("\n✅ Todos los tests completados")
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""Test de la recuperación híbrida (RRF + plazos por recuperador)"""
+
+import sys
+sys.path.insert(0, '/app')
+sys.path.insert(0, '/app/services')
+
+import time
+
+from services.hybrid import HybridQuery, HybridRetriever, reciprocal_rank_fusion, validate_weights
+
+print("=" * 60)
+print("TEST 1: Reciprocal Rank Fusion")
+print("=" * 60)
+
+fused = reciprocal_rank_fusion({'a': [1, 2, 3], 'b': [3, 1]}, k=60)
+print(f"fusión: {fused}")
+assert [doc_id for doc_id, _ in fused] == [1, 3, 2]
+assert abs(fused[0][1] - (1 / 61 + 1 / 62)) < 1e-12
+
+# Un peso alto para 'b' cambia el orden; peso 0 lo ignora
+assert reciprocal_rank_fusion({'a': [1, 2, 3], 'b': [3, 1]}, {'b': 3.0})[0][0] == 3
+assert [d for d, _ in reciprocal_rank_fusion({'a': [1, 2], 'b': [9]}, {'b': 0})] == [1, 2]
+
+print("\n" + "=" * 60)
+print("TEST 2: Recuperador lento se descarta por plazo")
+print("=" * 60)
+
+def fast(query, depth):
+    return [5, 6, 7][:depth]
+
+def slow(query, depth):
+    time.sleep(0.5)
+    return [99]
+
+def broken(query, depth):
+    raise RuntimeError("falla simulada")
+
+retriever = HybridRetriever(
+    {'fast': fast, 'slow': slow, 'broken': broken},
+    deadlines={'fast': 0.2, 'slow': 0.05, 'broken': 0.2},
+)
+
+start = time.monotonic()
+results = retriever.search(HybridQuery('Dictadura', 'dictadura'), top_k=2)
+elapsed = time.monotonic() - start
+print(f"resultados: {results} en {elapsed:.3f}s")
+assert [doc_id for doc_id, _ in results] == [5, 6]
+assert elapsed < 0.4
+
+print("\n" + "=" * 60)
+print("TEST 3: Pesos desde configuración")
+print("=" * 60)
+
+defaults = {'exact_title': 1.0, 'tfidf': 1.0, 'keywords': 0.5, 'dense': 0.8}
+assert validate_weights({}, defaults) == defaults
+assert validate_weights({'tfidf': 2, 'keywords': 0}, defaults) == {'exact_title': 1.0, 'tfidf': 2.0, 'keywords': 0.0, 'dense': 0.8}
+for bad in [{'tfidf': '2'}, {'tfidf': True}, {'tfidf': -1}, {'bm25': 1}, ['tfidf'], 'tfidf=2']:
+    try:
+        validate_weights(bad, defaults)
+        assert False, f"debió rechazar {bad}"
+    except ValueError:
+        pass
+print("✅ Sólo recuperadores conocidos con pesos numéricos >= 0")
+
+print("\n✅ Todos los tests completados")
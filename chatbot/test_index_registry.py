@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Test del registro de índices (recarga en caliente con intercambio atómico)"""
+
+import sys
+sys.path.insert(0, '/app')
+sys.path.insert(0, '/app/services')
+
+import threading
+import time
+
+from services.index_registry import ArtifactMismatchError, IndexRegistry
+
+# Artefactos simulados: la "huella" es un contador que cambia al reconstruir
+state = {'version': 'v1', 'fail': False, 'loads': 0}
+warmed = []
+
+def loader():
+    state['loads'] += 1
+    if state['fail'] == 'mismatch':
+        raise ArtifactMismatchError("field_index/ no corresponde a tfidf_index/")
+    if state['fail']:
+        raise RuntimeError("índice corrupto")
+    return {'docs': [f"doc-{state['version']}"]}
+
+registry = IndexRegistry(loader, lambda: state['version'], warmup=warmed.append)
+
+print("=" * 60)
+print("TEST 1: Carga inicial y recarga sólo si cambian los artefactos")
+print("=" * 60)
+
+first = registry.current
+assert first.number == 1 and first.version == 'v1' and first.indexes == {'docs': ['doc-v1']}
+assert warmed == [first.indexes]                     # se calienta antes de publicar
+assert registry.reload() is False                    # sin cambios: no recarga
+assert state['loads'] == 1
+
+state['version'] = 'v2'
+assert registry.is_stale()
+assert registry.reload() is True
+second = registry.current
+assert second.number == 2 and second.indexes == {'docs': ['doc-v2']}
+# Quien tomó la generación anterior la conserva intacta
+assert first.indexes == {'docs': ['doc-v1']}
+print(f"status: {registry.status()}")
+print("✅ Generación 2 publicada; la 1 sigue válida para solicitudes en curso")
+
+print("\n" + "=" * 60)
+print("TEST 2: Una carga fallida no reemplaza la generación activa")
+print("=" * 60)
+
+state['version'], state['fail'] = 'v3', True
+assert registry.reload() is False
+assert registry.current is second
+assert 'índice corrupto' in registry.status()['last_error']
+# Un build a medio escribir (artefactos de builds distintos): tampoco se publica
+state['fail'] = 'mismatch'
+assert registry.reload(force=True) is False
+assert registry.current is second
+assert registry.status()['last_error'].startswith('ArtifactMismatchError')
+state['fail'] = False
+assert registry.reload() is True and registry.current.number == 3
+assert registry.status()['last_error'] is None
+print("✅ Error registrado y generación anterior conservada")
+
+print("\n" + "=" * 60)
+print("TEST 3: Recarga en segundo plano y vigilancia")
+print("=" * 60)
+
+release = threading.Event()
+def slow_loader():
+    release.wait(2)
+    return {'docs': ['lento']}
+
+slow = IndexRegistry(slow_loader, lambda: state['version'])
+release.set()
+slow.current                                          # carga inicial
+release.clear()
+assert slow.reload_async(force=True) is True
+time.sleep(0.05)
+assert slow.reload_async(force=True) is False         # ya hay una recarga en curso
+assert slow.current.number == 1                       # mientras tanto sirve la anterior
+release.set()
+for _ in range(100):
+    if slow.current.number == 2:
+        break
+    time.sleep(0.01)
+assert slow.current.number == 2
+
+state['version'] = 'v4'
+registry.start_watcher(0.05)
+for _ in range(100):
+    if registry.current.version == 'v4':
+        break
+    time.sleep(0.01)
+registry.stop_watcher()
+assert registry.current.version == 'v4' and registry.current.number == 4
+print("✅ Recarga asíncrona y vigilancia de artefactos")
+
+print("\n✅ Todos los tests completados")
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Test de la búsqueda semántica local (LSA): SVD, proyección de consultas y máscara de candidatos"""
+
+import sys
+sys.path.insert(0, '/app')
+sys.path.insert(0, '/app/services')
+
+import os
+import tempfile
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from create_search_index import create_lsa_index
+from services.dense_index import DenseVectorIndex
+
+# Dos temas; "regimen" y "hinchas" sólo aparecen junto a los demás términos de su tema
+corpus = [
+    'dictadura militar represion',
+    'regimen militar represion',
+    'dictadura militar exilio',
+    'futbol estadio gol',
+    'estadio gol hinchas',
+    'futbol estadio partido',
+]
+vectorizer = TfidfVectorizer()
+tfidf_matrix = vectorizer.fit_transform(corpus)
+
+def project(query, projection):
+    """Igual que rank_with_lsa: sólo las filas de la proyección de los términos de la consulta"""
+    query_vector = vectorizer.transform([query])
+    return query_vector.data.astype(np.float32) @ projection[query_vector.indices]
+
+print("=" * 60)
+print("TEST 1: SVD y proyección guardada")
+print("=" * 60)
+
+lsa = create_lsa_index(tfidf_matrix, n_components=2)
+assert lsa['matrix'].shape == (6, 2) and lsa['projection'].shape == (len(vectorizer.vocabulary_), 2)
+assert lsa['matrix'].dtype == np.float32 and lsa['projection'].flags['C_CONTIGUOUS']
+assert create_lsa_index(tfidf_matrix, n_components=500)['matrix'].shape[1] == 5     # acotado al corpus
+
+with tempfile.TemporaryDirectory() as tmp:
+    path = os.path.join(tmp, 'lsa_index.npz')
+    np.savez(path, matrix=lsa['matrix'], projection=lsa['projection'])
+    saved = np.load(path)
+    matrix, projection = saved['matrix'], saved['projection']
+
+# Un documento proyectado con los componentes guardados cae sobre su propia fila
+for doc_id, text in enumerate(corpus):
+    assert np.allclose(project(text, projection), matrix[doc_id], atol=1e-5)
+print("✅ Proyección término -> espacio latente consistente con la matriz de documentos")
+
+print("\n" + "=" * 60)
+print("TEST 2: Consulta sólo con sinónimos")
+print("=" * 60)
+
+index = DenseVectorIndex(matrix, np.arange(len(corpus)))
+query = 'hinchas'
+assert (tfidf_matrix[3] @ vectorizer.transform([query]).T).sum() == 0     # sin términos en común
+ids, scores = index.top_k(project(query, projection), 3, min_score=0.1)
+print(f"  '{query}' -> {ids.tolist()} {np.round(scores, 3).tolist()}")
+assert set(ids.tolist()) == {3, 4, 5}
+assert not set(index.top_k(project('regimen', projection), 3, min_score=0.1)[0].tolist()) & {3, 4, 5}
+print("✅ 'hinchas' recupera 'futbol estadio gol' sin compartir términos")
+
+print("\n" + "=" * 60)
+print("TEST 3: Máscara de candidatos")
+print("=" * 60)
+
+allowed = np.zeros(len(corpus), dtype=bool)
+allowed[[0, 3]] = True
+ids, _ = index.top_k(project(query, projection), 3, min_score=0.1, allowed=allowed)
+assert ids.tolist() == [3]                                  # el 4 y el 5 quedan fuera por la máscara
+ids, _ = index.top_k(project(query, projection), 3, min_score=0.1, allowed=~allowed)
+assert ids.tolist() and set(ids.tolist()) <= {1, 2, 4, 5} and 3 not in ids
+assert len(index.top_k(project('partido', projection), 3, min_score=0.1, allowed=np.zeros(6, bool))[0]) == 0
+print("✅ Sólo se puntúan los documentos permitidos")
+
+print("\n✅ Todos los tests completados")
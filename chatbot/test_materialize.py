@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Test de la materialización de resultados: sólo la página pedida se copia a dicts"""
+
+import sys
+sys.path.insert(0, '/app')
+sys.path.insert(0, '/app/services')
+
+import json
+import os
+import tempfile
+
+# Índices de un corpus pequeño en un directorio temporal (la API los abre desde el directorio actual)
+os.environ['GEMINI_API_KEY'] = ''
+os.environ['INDEX_WATCH_INTERVAL'] = '0'
+os.chdir(tempfile.mkdtemp())
+
+topics = ['dictadura militar', 'derechos humanos', 'movimiento obrero', 'prensa clandestina']
+places = ['Santiago', 'Valparaíso', 'Concepción']
+corpus = [
+    {
+        'title': f"{kind} sobre {topics[i % len(topics)]} {1973 + i % 17}",
+        'href': f"https://archivopatrimonial.uahurtado.cl/index.php/documento-{i}",
+        'dc:subject': [topics[i % len(topics)].title()],
+        'dc:creator': [f"Autor {i % 5}"],
+        'dc:coverage': [places[i % len(places)]],
+        'dc:date': [str(1973 + i % 17)],
+    }
+    for i, kind in enumerate(['Carta', 'Volante', 'Fotografía', 'Acta'] * 10)
+]
+with open('clean_with_metadata.json', 'w', encoding='utf-8') as f:
+    json.dump(corpus, f, ensure_ascii=False)
+
+import create_search_index
+index = create_search_index.create_search_index(create_search_index.load_documents())
+create_search_index.save_index(index)
+create_search_index.save_lsa_index(create_search_index.create_lsa_index(index['matrix']))
+
+import api_chatbot as api
+
+def ranked(query, top_k):
+    """Hits de la búsqueda (cascada y re-ranking), sin materializar"""
+    return api.rank_documents(query, top_k, api.SEARCH_MODE)
+
+print("=" * 60)
+print("TEST 1: search_documents = materialize_results(rank_documents)")
+print("=" * 60)
+
+for query in ['dictadura', 'carta derechos humanos', 'volante santiago', 'xyzzy']:
+    results, _ = api.search_documents(query, top_k=5, include_suggestions=False)
+    assert results == api.materialize_results(ranked(query, 5)), query
+    assert len(results) <= 5
+    assert all({'title', 'href', 'relevance_score', '_match_type'} <= set(doc) for doc in results)
+    print(f"  '{query}' -> {len(results)} documentos")
+print("✅ Mismos documentos, puntajes y tipo de match")
+
+print("\n" + "=" * 60)
+print("TEST 2: Sólo se materializa la página")
+print("=" * 60)
+
+materialized = []
+store = api.active_indexes().documents
+to_dict = store.to_dict
+store.to_dict = lambda idx: materialized.append(idx) or to_dict(idx)
+
+hits = ranked('acta', 40)
+assert len(hits) > 3
+results, _ = api.search_documents('acta', top_k=3, include_suggestions=False)
+assert materialized == [idx for idx, _, _ in hits[:3]]
+store.to_dict = to_dict
+print(f"✅ {len(hits)} documentos rankeados, sólo 3 convertidos a dict")
+
+print("\n" + "=" * 60)
+print("TEST 3: Ids fuera de rango")
+print("=" * 60)
+
+n_docs = len(store)
+hits = [(-1, 0.9, 'tfidf'), (0, 0.8, 'tfidf'), (n_docs, 0.7, 'tfidf'), (n_docs - 1, 0.6, 'lsa')]
+results = api.materialize_results(hits)
+assert [doc['href'] for doc in results] == [store.href(0), store.href(n_docs - 1)]
+assert [doc['_match_type'] for doc in results] == ['tfidf', 'lsa']
+assert api.materialize_results([]) == []
+print("✅ Ids negativos o más allá del corpus se omiten")
+
+print("\n" + "=" * 60)
+print("TEST 4: top_k más allá de SEARCH_PAGE_DEPTH, sin facetas")
+print("=" * 60)
+
+depth = api.SEARCH_PAGE_DEPTH
+api.SEARCH_PAGE_DEPTH = 4
+counted = []
+facet_counts = api.facet_counts
+api.facet_counts = lambda ix, doc_ids: counted.append(len(doc_ids)) or facet_counts(ix, doc_ids)
+
+results, _ = api.search_documents('acta', top_k=8, include_suggestions=False)
+assert len(results) == 8 and results == api.materialize_results(ranked('acta', 8))
+assert not counted                                       # search_documents no pide facetas
+docs, _, next_cursor, total, facets = api.search_page('acta', page_size=2)
+assert total == 4 and next_cursor and facets['materias'] and len(counted) == 1
+assert api.search_page(cursor=next_cursor, page_size=2)[4] is facets and len(counted) == 1
+api.SEARCH_PAGE_DEPTH, api.facet_counts = depth, facet_counts
+print(f"✅ top_k=8 con SEARCH_PAGE_DEPTH=4 -> {len(results)} documentos; facetas sólo en search_page, una vez")
+
+print("\n✅ Todos los tests completados")
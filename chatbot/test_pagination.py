@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""Test de paginación por cursor sobre listas rankeadas"""
+
+import sys
+sys.path.insert(0, '/app')
+sys.path.insert(0, '/app/services')
+
+from services.pagination import CursorError, RankedList, decode_cursor, encode_cursor, ranking_key
+from services.result_cache import ResultCache
+
+print("=" * 60)
+print("TEST 1: Cursores")
+print("=" * 60)
+
+key = ranking_key(('dictadura', 'cascade', '{}', None, 1))
+assert key == ranking_key(('dictadura', 'cascade', '{}', None, 1))
+assert key != ranking_key(('dictadura', 'cascade', '{}', None, 2))      # otra generación, otra lista
+assert decode_cursor(encode_cursor(key, 12)) == (key, 12)
+for bad in ['', 'zzz', encode_cursor(key, 0)[:-3], 'eyJrIjoxLCJvIjotMX0', 'W10']:
+    try:
+        decode_cursor(bad)
+        assert False, f"debió rechazar {bad!r}"
+    except CursorError:
+        pass
+print("✅ Cursores opacos, estables y validados")
+
+print("\n" + "=" * 60)
+print("TEST 2: Páginas sin volver a puntuar")
+print("=" * 60)
+
+hits = tuple((doc_id, 1.0 - doc_id / 100, 'tfidf') for doc_id in range(14))
+ranked_lists = ResultCache(max_entries=2, ttl=60)
+ranked_lists.put(key, RankedList(key, hits, generation='g1'))
+
+pages, cursor = [], encode_cursor(key, 0)
+while cursor:
+    cached_key, offset = decode_cursor(cursor)
+    ranked = ranked_lists.get(cached_key)
+    pages.append([doc_id for doc_id, _, _ in ranked.page(offset, 6)])
+    cursor = ranked.next_cursor(offset, 6)
+print(f"páginas: {pages}")
+assert pages == [list(range(0, 6)), list(range(6, 12)), [12, 13]]
+assert RankedList(key, hits[:6], 'g1').next_cursor(0, 6) is None
+assert RankedList(key, (), 'g1').page(0, 6) == []
+
+ranked_lists.put('a', RankedList('a', (), 'g1'))
+ranked_lists.put('b', RankedList('b', (), 'g1'))                        # expulsa la lista de key
+assert ranked_lists.get(key) is None
+print("✅ Páginas consecutivas, última sin cursor, cache acotado")
+
+print("\n" + "=" * 60)
+print("TEST 3: Facetas diferidas")
+print("=" * 60)
+
+calls = []
+ranked = RankedList(key, hits, 'g1', lambda: calls.append(1) or {'materias': [('Dictadura', 14)]})
+assert ranked.page(0, 6) and ranked.next_cursor(0, 6) and not calls      # paginar no las calcula
+assert ranked.facets == {'materias': [('Dictadura', 14)]} and ranked.facets is ranked.facets
+assert calls == [1] and ranked.count_facets is None                      # una sola vez por lista
+assert RankedList(key, hits, 'g1').facets is None
+print("✅ Las facetas se calculan sólo al pedirlas, una vez por lista")
+
+print("\n✅ Todos los tests completados")
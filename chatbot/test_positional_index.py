@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Test del índice posicional (frases entre comillas y NEAR/k)"""
+
+import sys
+sys.path.insert(0, '/app')
+sys.path.insert(0, '/app/services')
+
+import random
+
+import numpy as np
+
+from services.positional_index import PositionalIndex, extract_proximity
+
+# (doc_id, tokens) por valor de campo: título y luego materias
+spans = [
+    (0, 'acta del consejo de gabinete'.split()),
+    (0, ['gobierno']),
+    (1, 'consejo de ministros y gabinete'.split()),
+    (2, 'carta de gabinete'.split()),
+    (2, ['consejo']),                                   # otro valor: no forma frase con el título
+    (3, 'gabinete consejo de gabinete consejo'.split()),
+    (4, 'carta enviada al ministro del interior'.split()),
+]
+index = PositionalIndex.build(5, spans)
+
+print("=" * 60)
+print("TEST 1: Frases y NEAR/k")
+print("=" * 60)
+
+assert index.phrase_docs(['consejo', 'de', 'gabinete']).tolist() == [0, 3]
+assert index.phrase_docs(['gabinete', 'consejo']).tolist() == [3]
+assert index.phrase_docs(['de', 'gabinete', 'consejo']).tolist() == [3]
+assert index.phrase_docs(['gabinete']).tolist() == [0, 1, 2, 3]
+assert index.phrase_docs(['gabinete', 'desconocido']).tolist() == []
+assert index.near_docs('consejo', 'gabinete', 2).tolist() == [0, 3]
+assert index.near_docs('consejo', 'gabinete', 4).tolist() == [0, 1, 3]
+assert index.near_docs('carta', 'ministro', 3).tolist() == [4]
+assert index.near_docs('carta', 'ministro', 2).tolist() == []
+mask = index.mask([['consejo', 'de', 'gabinete']], [('consejo', 'gabinete', 1)])
+assert np.flatnonzero(mask).tolist() == [3]
+assert index.mask() is None
+print("✅ Frases exactas y proximidad, sin cruzar entre valores de campo")
+
+assert extract_proximity('"consejo de gabinete" 1990') == ('consejo de gabinete 1990', ['consejo de gabinete'], [])
+assert extract_proximity('carta NEAR/3 ministro') == ('carta ministro', [], [('carta', 'ministro', 3)])
+assert extract_proximity('allende near aylwin') == ('allende aylwin', [], [('allende', 'aylwin', 5)])
+assert extract_proximity('“derechos humanos”') == ('derechos humanos', ['derechos humanos'], [])
+assert extract_proximity('dictadura militar') == ('dictadura militar', [], [])
+print("✅ Comillas y operadores separados del texto a puntuar")
+
+print("\n" + "=" * 60)
+print("TEST 2: Contra fuerza bruta")
+print("=" * 60)
+
+random.seed(3)
+words = ['a', 'b', 'c', 'd']
+docs = [[[random.choice(words) for _ in range(random.randint(1, 8))] for _ in range(random.randint(1, 3))]
+        for _ in range(200)]
+index = PositionalIndex.build(len(docs), [(doc_id, tokens) for doc_id, values in enumerate(docs) for tokens in values])
+
+def has_phrase(values, phrase):
+    return any(tokens[i:i + len(phrase)] == phrase for tokens in values for i in range(len(tokens)))
+
+def has_near(values, first, second, k):
+    return any(abs(i - j) <= k for tokens in values
+               for i, x in enumerate(tokens) if x == first for j, y in enumerate(tokens) if y == second)
+
+for _ in range(50):
+    phrase = [random.choice(words) for _ in range(random.randint(2, 3))]
+    expected = [doc_id for doc_id, values in enumerate(docs) if has_phrase(values, phrase)]
+    assert index.phrase_docs(phrase).tolist() == expected, phrase
+    first, second, k = random.choice(words), random.choice(words), random.randint(1, 3)
+    if first != second:
+        expected = [doc_id for doc_id, values in enumerate(docs) if has_near(values, first, second, k)]
+        assert index.near_docs(first, second, k).tolist() == expected, (first, second, k)
+print("✅ Mismos documentos que el recorrido lineal")
+
+print("\n✅ Todos los tests completados")
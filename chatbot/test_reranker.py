@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Test del re-ranker de segunda etapa (rasgos por campo x pesos)"""
+
+import sys
+sys.path.insert(0, '/app')
+sys.path.insert(0, '/app/services')
+
+import json
+import os
+import tempfile
+
+import numpy as np
+
+from services.reranker import DEFAULT_WEIGHTS, FEATURES, FieldTerms, Reranker, load_weights
+
+# (doc_id, tokens) por campo, ya analizados
+field_terms = FieldTerms.build(4, {
+    'title': [(0, ['carta', 'de', 'allende']), (1, ['acta', 'de', 'gabinete']), (2, ['carta']), (3, ['volante'])],
+    'subject': [(1, ['allende']), (1, ['gobierno']), (3, ['derecho', 'humano'])],
+    'creator': [(2, ['allende', 'gossen', 'salvador'])],
+    'coverage': [(0, ['santiago']), (3, ['santiago'])],
+    'slug': [(2, ['carta', 'allende'])],
+})
+reranker = Reranker(field_terms)
+
+def column(matrix, feature):
+    return matrix[:, FEATURES.index(feature)].tolist()
+
+print("=" * 60)
+print("TEST 1: Matriz de rasgos")
+print("=" * 60)
+
+doc_ids = np.array([0, 1, 2, 3])
+features = reranker.features(['carta', 'allende'], doc_ids, np.array([0.9, 1.0, 0.5, 0.5]),
+                             exact_phrase=np.array([False, False, True, False]))
+assert features.shape == (4, len(FEATURES)) and features.dtype == np.float32
+assert np.allclose(column(features, 'first_stage'), [0.8, 1.0, 0.0, 0.0])   # min-max entre candidatos
+assert column(features, 'title_coverage') == [1.0, 0.0, 0.5, 0.0]
+assert column(features, 'subject_match') == [0.0, 0.5, 0.0, 0.0]
+assert column(features, 'creator_match') == [0.0, 0.0, 0.5, 0.0]
+assert column(features, 'slug_match') == [0.0, 0.0, 1.0, 0.0]
+assert column(features, 'exact_phrase') == [0.0, 0.0, 1.0, 0.0]
+assert column(features, 'year_match') == [0.0] * 4
+assert column(reranker.features(['santiago', 'desconocido'], doc_ids, np.ones(4)), 'coverage_match') == [0.5, 0, 0, 0.5]
+assert column(reranker.features(['desconocido'], doc_ids, np.ones(4)), 'title_coverage') == [0.0] * 4
+print("✅ Cobertura por campo con ids enteros, banderas y puntaje de primera etapa")
+
+print("\n" + "=" * 60)
+print("TEST 2: Puntaje y pesos desde archivo")
+print("=" * 60)
+
+order, scores = reranker.rerank(features, 3)
+expected = features @ np.array([DEFAULT_WEIGHTS[f] for f in FEATURES], dtype=np.float32)
+assert np.allclose(scores, np.sort(expected)[::-1][:3])
+assert order.tolist() == [0, 1, 2]
+
+with tempfile.TemporaryDirectory() as tmp:
+    path = os.path.join(tmp, 'reranker_weights.json')
+    assert load_weights(path) == DEFAULT_WEIGHTS                       # sin archivo
+    with open(path, 'w') as f:
+        json.dump({'first_stage': 3, 'slug_match': 0}, f)
+    weights = load_weights(path)
+    assert weights['first_stage'] == 3.0 and weights['slug_match'] == 0.0
+    assert weights['title_coverage'] == DEFAULT_WEIGHTS['title_coverage']
+    assert Reranker(field_terms, weights).rerank(features, 4)[0].tolist()[0] == 1     # domina la primera etapa
+    for bad in [{'colores': 1}, {'first_stage': 'alto'}, [1, 2]]:
+        with open(path, 'w') as f:
+            json.dump(bad, f)
+        try:
+            load_weights(path)
+            assert False, f"debió rechazar {bad}"
+        except ValueError:
+            pass
+print("✅ Matriz x vector de pesos; pesos parciales e inválidos desde JSON")
+
+print("\n✅ Todos los tests completados")
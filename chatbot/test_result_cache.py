@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""Test del cache de resultados (LRU + TTL)"""
+
+import sys
+sys.path.insert(0, '/app')
+sys.path.insert(0, '/app/services')
+
+import time
+
+from services.result_cache import ResultCache
+
+print("=" * 60)
+print("TEST 1: LRU")
+print("=" * 60)
+
+cache = ResultCache(max_entries=2, ttl=60)
+cache.put(('dictadura', 6, 'v1'), ['a'])
+cache.put(('aylwin', 6, 'v1'), ['b'])
+assert cache.get(('dictadura', 6, 'v1')) == ['a']      # 'dictadura' pasa a ser la más reciente
+cache.put(('ddhh', 6, 'v1'), ['c'])                    # expulsa 'aylwin'
+assert cache.get(('aylwin', 6, 'v1')) is None
+assert cache.get(('ddhh', 6, 'v1')) == ['c']
+
+# Otra versión del índice es otra clave
+assert cache.get(('dictadura', 6, 'v2')) is None
+
+stats = cache.stats()
+print(f"stats: {stats}")
+assert stats['hits'] == 2 and stats['misses'] == 2 and stats['evictions'] == 1 and stats['size'] == 2
+
+print("\n" + "=" * 60)
+print("TEST 2: TTL")
+print("=" * 60)
+
+cache = ResultCache(max_entries=10, ttl=0.05)
+cache.put('fotos', [1])
+assert cache.get('fotos') == [1]
+time.sleep(0.1)
+assert cache.get('fotos') is None
+assert cache.stats()['expirations'] == 1 and len(cache) == 0
+print("✅ Entrada expirada")
+
+print("\n✅ Todos los tests completados")
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Test de segmentos delta y tombstones (actualización incremental del índice)"""
+
+import sys
+sys.path.insert(0, '/app')
+sys.path.insert(0, '/app/services')
+
+import os
+import tempfile
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from services.document_store import DocumentStore
+from services.segments import SegmentSet
+from services.tfidf_engine import SparseTopKScorer
+from services.tfidf_index import TfidfIndex
+from services.title_index import TitleIndex
+
+def make_doc(title, subject):
+    return {'title': title, 'href': f"https://archivo/{title.lower().replace(' ', '-')}", 'dc:subject': [subject]}
+
+base_docs = [
+    make_doc("Consejo de gabinete 1990", "Gobierno"),
+    make_doc("Carta de Aylwin a la junta", "Gobierno"),
+    make_doc("Volantes de protesta 1983", "Dictadura"),
+    make_doc("Vicaria de la solidaridad", "Derechos humanos"),
+]
+new_docs = [
+    make_doc("Acta del consejo de gabinete", "Gobierno"),
+    make_doc("Marcha de protesta en Santiago", "Dictadura"),
+]
+texts = [doc['title'].lower() for doc in base_docs]
+vectorizer = TfidfVectorizer(token_pattern=r'(?u)\b[\w-]+\b')
+matrix = vectorizer.fit_transform(texts)
+
+root = tempfile.mkdtemp()
+TfidfIndex.from_vectorizer(vectorizer, matrix).save(os.path.join(root, 'tfidf_index'))
+base = TfidfIndex.open(os.path.join(root, 'tfidf_index'))
+base_store = DocumentStore(base_docs)
+directory = os.path.join(root, 'segments')
+
+print("=" * 60)
+print("TEST 1: Delta con el vocabulario de la base")
+print("=" * 60)
+
+segments = SegmentSet.open(directory, base)
+assert not segments and segments.n_docs == 4
+segments.add_documents(new_docs, [doc['title'].lower() for doc in new_docs], base)
+segments = SegmentSet.open(directory, base)                # reabrir desde disco
+assert segments.n_docs == 6 and segments.offsets == [0, 4]
+
+documents = segments.documents(base_store)
+assert len(documents) == 6 and documents.title(4) == "Acta del consejo de gabinete"
+scorer = segments.scorer(SparseTopKScorer.from_normalized_csc(base.postings))
+ids, scores = scorer.top_k(base.transform(["consejo de gabinete"]), 3)
+print(f"top-k 'consejo de gabinete': {ids.tolist()}")
+assert set(ids[:2].tolist()) == {0, 4}
+print("✅ El documento nuevo se encuentra sin reajustar el TF-IDF")
+
+print("\n" + "=" * 60)
+print("TEST 2: Tombstones")
+print("=" * 60)
+
+assert segments.delete([0, 5, 99]) == 2                    # 99 no existe
+segments = SegmentSet.open(directory, base)
+documents = segments.documents(base_store)
+scorer = segments.scorer(SparseTopKScorer.from_normalized_csc(base.postings))
+queries = base.transform(["consejo de gabinete", "protesta"])
+single = [scorer.top_k(queries[row], 5) for row in range(2)]
+batch = scorer.top_k_batch(queries, 5)
+for (ids, scores), (batch_ids, batch_scores) in zip(single, batch):
+    assert not set(ids.tolist()) & {0, 5}
+    assert ids.tolist() == batch_ids.tolist() and np.allclose(scores, batch_scores)
+print(f"'consejo de gabinete': {single[0][0].tolist()}  'protesta': {single[1][0].tolist()}")
+
+counts = {item['name']: item['count'] for item in documents.value_counts('dc:subject')}
+assert counts == {'Gobierno': 2, 'Dictadura': 1, 'Derechos humanos': 1}
+assert documents.match_values('dc:subject', 'dictadura').tolist() == [2]
+titles = TitleIndex(documents, segments.deleted.tolist())
+assert 0 not in dict(titles.search("Consejo de gabinete 1990"))
+assert 5 not in dict(titles.search_keywords("marcha de protesta"))
+assert segments.live_ids().tolist() == [1, 2, 3, 4]
+print("✅ Borrados fuera del top-k, de los conteos y de los títulos")
+
+print("\n" + "=" * 60)
+print("TEST 3: Segmentos de otra base y compactación")
+print("=" * 60)
+
+rebuilt = TfidfIndex.from_vectorizer(vectorizer, matrix)   # nueva construcción (otro build_id)
+try:
+    SegmentSet.open(directory, rebuilt)
+    assert False, "debió rechazar segmentos de otra base"
+except ValueError as e:
+    print(f"rechazado: {e}")
+
+assert not segments.needs_compaction(max_deltas=8, max_ratio=1.0)
+assert segments.needs_compaction(max_deltas=8, max_ratio=0.2)
+segments.reset()
+assert not os.path.exists(directory) and not SegmentSet.open(directory, base)
+print("✅ Segmentos atados a su base; reset tras compactar")
+
+print("\n✅ Todos los tests completados")
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""Test del índice de trigramas para tolerancia a tipeos"""
+
+import sys
+sys.path.insert(0, '/app')
+sys.path.insert(0, '/app/services')
+
+import os
+import random
+import tempfile
+
+from services import spelling
+from services.analyzer import EXPANSION_TERMS, expand_terms
+from services.spelling import SpellingIndex, bounded_levenshtein
+
+term_counts = {
+    'dictadura': 120, 'dictador': 15, 'allende': 80, 'aylwin': 40, 'santiago': 300,
+    'protesta': 60, 'vicaria': 25, 'solidaridad': 30, 'carta': 200, 'cartel': 12,
+    'gabinete': 18, 'fotografia': 90, 'militar': 70,
+}
+index = SpellingIndex.build(term_counts)
+
+print("=" * 60)
+print("TEST 1: Correcciones")
+print("=" * 60)
+
+expected = {
+    'dictadra': 'dictadura',      # omisión
+    'allendee': 'allende',        # inserción
+    'aylwn': 'aylwin',
+    'santaigo': 'santiago',       # transposición (2 ediciones)
+    'fotogrfia': 'fotografia',
+    'cartas': 'carta',            # cartel queda a distancia 2
+}
+for typo, correct in expected.items():
+    assert index.suggest(typo) == correct, (typo, index.suggest(typo))
+    print(f"{typo} -> {correct}")
+
+assert index.suggest('dictadura') is None       # conocido
+assert index.suggest('xyz') is None             # muy corto
+assert index.suggest('1973') is None            # números no se corrigen
+assert index.suggest('zzzzzzzz') is None        # sin vecinos
+assert index.suggest('santaigo', limit=1) is None
+text, corrections = index.correct('carta de allendee sobre la dictadra 1973')
+assert text == 'carta de allende sobre la dictadura 1973'
+assert corrections == {'allendee': 'allende', 'dictadra': 'dictadura'}
+print("✅ Términos desconocidos -> el más cercano del vocabulario")
+
+# Claves de expansión de 4+ letras fuera del vocabulario: no se "corrigen" antes de expandirse
+with_dicha = SpellingIndex.build(dict(term_counts, dicha=5))
+assert with_dicha.suggest('dicta') == 'dicha'
+assert {'dicta', 'ddhh', 'golpe'} <= EXPANSION_TERMS
+text, corrections = with_dicha.correct('carta dicta ddhh allendee', keep=EXPANSION_TERMS)
+assert text == 'carta dicta ddhh allende' and corrections == {'allendee': 'allende'}
+assert expand_terms(text) == 'carta dictadura militar derecho humano salvador allende'
+print("✅ Las abreviaturas llegan intactas a la expansión")
+
+print("\n" + "=" * 60)
+print("TEST 2: Levenshtein acotado y persistencia")
+print("=" * 60)
+
+def levenshtein(a, b):
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+random.seed(7)
+c_levenshtein = spelling._levenshtein
+for _ in range(300):
+    a = ''.join(random.choice('abcd') for _ in range(random.randint(0, 8)))
+    b = ''.join(random.choice('abcd') for _ in range(random.randint(0, 8)))
+    limit = random.randint(0, 3)
+    expected_distance = min(levenshtein(a, b), limit + 1)
+    spelling._levenshtein = None                          # versión en Python
+    assert bounded_levenshtein(a, b, limit) == expected_distance, (a, b, limit)
+    spelling._levenshtein = c_levenshtein
+    assert bounded_levenshtein(a, b, limit) == expected_distance, (a, b, limit)
+
+path = os.path.join(tempfile.mkdtemp(), 'spelling_index.npz')
+index.save(path)
+loaded = SpellingIndex.load(path)
+assert len(loaded) == len(index) and 'vicaria' in loaded
+assert all(loaded.suggest(typo) == correct for typo, correct in expected.items())
+print("✅ Distancia acotada exacta; el índice se recarga igual desde .npz")
+
+print("\n✅ Todos los tests completados")
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""Test de los términos de título precalculados para sugerencias"""
+
+import sys
+sys.path.insert(0, '/app')
+sys.path.insert(0, '/app/services')
+
+import random
+import re
+from collections import Counter
+
+from services.suggestion_features import TitleFeatures
+
+titles = [
+    'Carta de Salvador Allende, 1973',
+    'Carta al ministro del Interior 1973 1974',
+    'Fotografía de marcha por los derechos humanos',
+    '',
+    'Acta del Consejo de Gabinete 1990',
+    'Carta de renuncia',
+]
+features = TitleFeatures.build(titles)
+
+print("=" * 60)
+print("TEST 1: Términos y años")
+print("=" * 60)
+
+assert len(features) == 6
+assert features.common_terms([0, 1, 5]) == ['carta', '1973']
+assert features.common_terms([0, 1, 5], min_count=1)[:3] == ['carta', '1973', 'salvador']
+assert features.common_terms([3]) == [] and features.common_terms([]) == []
+assert features.years([0, 1, 4]) == ['1973', '1974', '1990']
+assert features.years([2, 3, 99, -1]) == []                            # ids fuera de rango se ignoran
+print("✅ Conteo por ids y años ordenados sin repetir")
+
+print("\n" + "=" * 60)
+print("TEST 2: Igual que el recorrido con regex")
+print("=" * 60)
+
+stopwords = {'de', 'la', 'el', 'los', 'las', 'del', 'para', 'por', 'con', 'en', 'a', 'y', 'o', 'un', 'una'}
+
+def regex_terms(doc_ids):
+    keywords = []
+    for idx in doc_ids:
+        keywords.extend(re.findall(r'\b(19\d{2}|20\d{2})\b', titles[idx]))
+        words = re.findall(r'\b[a-záéíóúñ]{4,}\b', titles[idx].lower())
+        keywords.extend([w for w in words if w not in stopwords])
+    return [word for word, count in Counter(keywords).most_common(8) if count > 1]
+
+random.seed(5)
+vocabulary = ['carta', 'acta', 'marcha', 'gabinete', 'de', 'los', 'Santiago', 'prensa', '1973', '1985', '2001']
+titles = [' '.join(random.choice(vocabulary) for _ in range(random.randint(0, 6))) for _ in range(300)]
+features = TitleFeatures.build(titles)
+for _ in range(200):
+    doc_ids = random.sample(range(len(titles)), random.randint(1, 30))
+    assert features.common_terms(doc_ids) == regex_terms(doc_ids), doc_ids
+    expected = sorted({y for idx in doc_ids for y in re.findall(r'\b(19\d{2}|20\d{2})\b', titles[idx])})
+    assert features.years(doc_ids) == expected
+print("✅ Mismos temas (y mismo orden en empates) que Counter.most_common")
+
+print("\n✅ Todos los tests completados")
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""Test del motor disperso top-k contra cosine_similarity de sklearn"""
+
+import sys
+sys.path.insert(0, '/app')
+sys.path.insert(0, '/app/services')
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+
+from services.tfidf_engine import SparseTopKScorer
+
+texts = [
+    'acta consejo de gabinete',
+    'carta vicaria de la solidaridad',
+    'fotografia patricio aylwin',
+    'dictadura militar derechos humanos',
+    'declaracion derechos humanos vicaria',
+    'golpe de estado 1973',
+]
+
+vectorizer = TfidfVectorizer()
+matrix = vectorizer.fit_transform(texts)
+scorer = SparseTopKScorer(matrix)
+
+print("=" * 60)
+print("TEST 1: Mismos resultados que cosine_similarity")
+print("=" * 60)
+
+for query in ['derechos humanos', 'vicaria', 'acta de gabinete 1973']:
+    query_vector = vectorizer.transform([query])
+    expected = cosine_similarity(query_vector, matrix).flatten()
+    ids, scores = scorer.top_k(query_vector, 3)
+    print(f"'{query}' -> {ids.tolist()}")
+    assert np.allclose(scores, np.sort(expected)[::-1][:len(scores)], atol=1e-6)
+    assert np.allclose(expected[ids], scores, atol=1e-6)
+    assert all(scores[i] >= scores[i + 1] for i in range(len(scores) - 1))
+
+print("\n" + "=" * 60)
+print("TEST 2: Consulta sin términos conocidos")
+print("=" * 60)
+
+ids, scores = scorer.top_k(vectorizer.transform(['zzzz']), 5)
+assert len(ids) == 0 and len(scores) == 0
+print("✅ Sin resultados")
+
+print("\n" + "=" * 60)
+print("TEST 3: Lote de consultas == consultas individuales")
+print("=" * 60)
+
+batch_queries = ['derechos humanos', 'zzzz', 'golpe 1973', 'vicaria']
+batch = scorer.top_k_batch(vectorizer.transform(batch_queries), 3)
+assert len(batch) == len(batch_queries)
+for query, (ids, scores) in zip(batch_queries, batch):
+    single_ids, single_scores = scorer.top_k(vectorizer.transform([query]), 3)
+    print(f"'{query}' -> {ids.tolist()}")
+    assert ids.tolist() == single_ids.tolist()
+    assert np.allclose(scores, single_scores, atol=1e-6)
+
+print("\n✅ Todos los tests completados")
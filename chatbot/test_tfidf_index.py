@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Test del índice TF-IDF sin pickle (arreglos .npy + manifiesto, abiertos con mmap)"""
+
+import sys
+sys.path.insert(0, '/app')
+sys.path.insert(0, '/app/services')
+
+import json
+import os
+import tempfile
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from services.tfidf_engine import SparseTopKScorer
+from services.tfidf_index import TfidfIndex, VocabularyTable
+
+texts = [
+    "consejo de gabinete aylwin 1990",
+    "carta de aylwin a la junta militar",
+    "dictadura militar volantes protesta 1983",
+    "derechos humanos vicaria de la solidaridad",
+    "fotografia marcha derechos humanos santiago",
+    "consejo de gabinete acta sesion",
+]
+vectorizer = TfidfVectorizer(ngram_range=(1, 3), max_df=0.90, token_pattern=r'(?u)\b[\w-]+\b')
+matrix = vectorizer.fit_transform(texts)
+
+directory = os.path.join(tempfile.mkdtemp(), 'tfidf_index')
+TfidfIndex.from_vectorizer(vectorizer, matrix).save(directory)
+index = TfidfIndex.open(directory)
+
+print("=" * 60)
+print("TEST 1: Manifiesto y mmap")
+print("=" * 60)
+
+with open(os.path.join(directory, 'manifest.json'), encoding='utf-8') as f:
+    manifest = json.load(f)
+print(f"manifiesto: {manifest['format']} v{manifest['version']} {manifest['n_docs']}x{manifest['n_terms']}")
+assert index.shape == matrix.shape
+assert manifest['nnz'] == matrix.nnz
+assert index.idf.dtype == np.float32
+assert not index.postings.data.flags.writeable      # arreglos de sólo lectura (mmap)
+assert not os.path.exists(os.path.join(directory, 'search_index.pkl'))
+print("✅ Índice abierto desde .npy + manifest.json")
+
+print("\n" + "=" * 60)
+print("TEST 2: Vocabulario ordenado")
+print("=" * 60)
+
+for term, term_id in vectorizer.vocabulary_.items():
+    assert index.vocabulary.lookup(term) == term_id
+    assert index.vocabulary[term_id] == term
+assert index.vocabulary.lookup('inexistente') == -1
+assert VocabularyTable.from_terms([]).lookup('a') == -1
+print("✅ Búsqueda binaria coincide con vocabulary_ de sklearn")
+
+print("\n" + "=" * 60)
+print("TEST 3: transform y ranking iguales a sklearn")
+print("=" * 60)
+
+queries = ["consejo de gabinete", "Derechos Humanos Santiago", "aylwin", "nada que ver", ""]
+expected = vectorizer.transform(queries)
+actual = index.transform(queries)
+assert expected.indptr.tolist() == actual.indptr.tolist()
+assert expected.indices.tolist() == actual.indices.tolist()
+assert np.allclose(expected.data, actual.data, atol=1e-6)
+
+reference = SparseTopKScorer(matrix)
+scorer = SparseTopKScorer.from_normalized_csc(index.postings)
+for row in range(len(queries)):
+    ids_ref, scores_ref = reference.top_k(expected[row], 3)
+    ids, scores = scorer.top_k(actual[row], 3)
+    print(f"  '{queries[row]}': {ids.tolist()}")
+    assert ids.tolist() == ids_ref.tolist()
+    assert np.allclose(scores, scores_ref, atol=1e-5)
+print("✅ Mismos términos, pesos y top-k")
+
+print("\n✅ Todos los tests completados")
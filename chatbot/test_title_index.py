@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""Test del índice invertido de títulos (search_exact_title)"""
+
+import sys
+sys.path.insert(0, '/app')
+sys.path.insert(0, '/app/services')
+
+from services.title_index import TitleIndex
+
+docs = [
+    {'title': 'Acta de sesión', 'href': 'https://archivo.cl/index.php/acta-de-sesion'},
+    {'title': 'Carta de la Vicaría de la Solidaridad', 'href': 'https://archivo.cl/index.php/carta-vicaria'},
+    {'title': 'Fotografías de Patricio Aylwin en La Moneda', 'href': 'https://archivo.cl/index.php/fotos-aylwin'},
+    {'title': 'Acta', 'href': 'https://archivo.cl/index.php/acta'},
+    {'title': 'Declaración pública sobre derechos humanos', 'href': 'https://archivo.cl/index.php/declaracion-ddhh'},
+]
+
+index = TitleIndex(docs)
+
+print("=" * 60)
+print("TEST 1: Reglas de puntaje")
+print("=" * 60)
+
+cases = [
+    ('Acta', [(3, 1.0), (0, 0.9)]),                            # exacto + contiene
+    ('vicaría de la', [(1, 0.9)]),                             # substring del título
+    ('busco el acta de sesión de 1990', [(0, 0.85), (3, 0.85)]),  # la query contiene el título
+    ('fotos aylwin', [(2, 0.8)]),                              # match en href
+    ('derechos humanos declaración pública', [(4, 0.8)]),     # 4 palabras en común
+]
+
+for query, expected in cases:
+    results = index.search(query)
+    print(f"'{query}' -> {results}")
+    assert [idx for idx, _ in results] == [idx for idx, _ in expected]
+    for (_, got), (_, want) in zip(results, expected):
+        assert abs(got - want) < 1e-9
+
+print("\n" + "=" * 60)
+print("TEST 2: Sin resultados y top_k")
+print("=" * 60)
+
+assert index.search('zzzz inexistente') == []
+assert len(index.search('a', top_k=2)) == 2
+print("✅ Casos límite correctos")
+
+print("\n✅ Todos los tests completados")
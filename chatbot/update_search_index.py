@@ -0,0 +1,126 @@
+"""
+Actualización incremental del índice de búsqueda (sin reconstruir todo).
+
+    python update_search_index.py add nuevos.json       # agrega documentos en un segmento delta
+    python update_search_index.py delete <href> [...]   # marca documentos como borrados
+    python update_search_index.py compact               # reconstruye la base con los vivos
+    python update_search_index.py status
+
+Los deltas se vectorizan con el vocabulario e idf de la base (ver
+services/segments.py); la API los toma en la siguiente recarga de índices.
+Cuando hay demasiados deltas o documentos pendientes, ``add`` lanza la
+compactación en segundo plano.
+"""
+import fcntl
+import json
+import os
+import pickle
+import subprocess
+import sys
+from contextlib import contextmanager
+
+from create_search_index import build_indexes, document_text, write_build_stamp
+from services.document_store import DocumentStore
+from services.segments import SegmentSet
+from services.tfidf_index import TfidfIndex
+
+SEGMENTS_DIR = 'segments'
+LOCK_FILE = 'segments.lock'
+
+# Umbrales de compactación automática
+MAX_DELTAS = 8
+MAX_DELTA_RATIO = 0.2
+
+@contextmanager
+def segments_lock():
+    """Un solo escritor a la vez (add/delete esperan a que termine una compactación)"""
+    with open(LOCK_FILE, 'w') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def open_base():
+    base = TfidfIndex.open('tfidf_index')
+    documents = DocumentStore.open('corpus.bin')
+    if base.shape[0] != len(documents):
+        raise SystemExit("❌ tfidf_index/ y corpus.bin no coinciden. Ejecuta create_search_index.py.")
+    return base, documents, SegmentSet.open(SEGMENTS_DIR, base)
+
+def add(path):
+    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+        new_docs = json.load(f)
+    if isinstance(new_docs, dict):
+        new_docs = [new_docs]
+    with segments_lock():
+        base, _, segments = open_base()
+        delta = segments.add_documents(new_docs, [document_text(doc) for doc in new_docs], base)
+        print(f"✅ {len(delta)} documentos agregados en {SEGMENTS_DIR}/{delta.name}")
+        needs_compaction = segments.needs_compaction(MAX_DELTAS, MAX_DELTA_RATIO)
+    if needs_compaction:
+        print("🔄 Umbral de segmentos superado: compactando en segundo plano")
+        subprocess.Popen([sys.executable, os.path.abspath(__file__), 'compact'], start_new_session=True)
+
+def delete(hrefs):
+    with segments_lock():
+        base, base_documents, segments = open_base()
+        documents = segments.documents(base_documents)
+        wanted = set(hrefs)
+        ids = [idx for idx, href in enumerate(documents.hrefs()) if href in wanted]
+        count = segments.delete(ids)
+        print(f"✅ {count} documentos marcados como borrados ({len(wanted)} hrefs pedidos)")
+
+def compact():
+    """Base nueva = base + deltas - borrados; los embeddings se reubican a los ids nuevos"""
+    with segments_lock():
+        _, base_documents, segments = open_base()
+        if not segments:
+            print("✅ Nada que compactar")
+            return
+        documents = segments.documents(base_documents)
+        live_ids = segments.live_ids().tolist()
+        docs = [documents.to_dict(idx) for idx in live_ids]
+        print(f"🔄 Compactando: {len(docs)} documentos vivos ({segments.stats()})")
+
+        # El JSON primero: corpus.bin (escrito por build_indexes) queda más nuevo
+        with open('clean_with_metadata.json.tmp', 'w', encoding='utf-8') as f:
+            json.dump(docs, f, ensure_ascii=False)
+        os.replace('clean_with_metadata.json.tmp', 'clean_with_metadata.json')
+        # El sello va al final: la API no debe cargar la base nueva con los embeddings
+        # y segmentos de la anterior
+        build_id = build_indexes(docs, stamp=False)
+
+        if os.path.exists('embeddings_cache.pkl'):
+            with open('embeddings_cache.pkl', 'rb') as f:
+                embeddings = pickle.load(f)
+            remapped = {new: embeddings[old] for new, old in enumerate(live_ids) if old in embeddings}
+            with open('embeddings_cache.pkl.tmp', 'wb') as f:
+                pickle.dump(remapped, f)
+            os.replace('embeddings_cache.pkl.tmp', 'embeddings_cache.pkl')
+            print(f"💾 Embeddings reubicados: {len(remapped)} de {len(embeddings)}")
+
+        segments.reset()
+        write_build_stamp(build_id, len(docs))
+        print("✅ Compactación lista: segmentos vaciados")
+
+def status():
+    _, base_documents, segments = open_base()
+    stats = segments.stats()
+    print(f"📊 Base: {len(base_documents)} documentos")
+    print(f"📊 Deltas: {stats['deltas']} ({stats['delta_documents']} documentos), borrados: {stats['tombstones']}")
+    print(f"📊 Compactación pendiente: {'sí' if segments.needs_compaction(MAX_DELTAS, MAX_DELTA_RATIO) else 'no'}")
+
+if __name__ == "__main__":
+    command, args = (sys.argv[1], sys.argv[2:]) if len(sys.argv) > 1 else (None, [])
+    if command == 'add' and len(args) == 1:
+        add(args[0])
+    elif command == 'delete' and args:
+        delete(args)
+    elif command == 'compact':
+        compact()
+    elif command == 'status':
+        status()
+    else:
+        print(__doc__)
+        sys.exit(1)